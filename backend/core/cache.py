@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+
+from core.database import BaseRepository
+from core.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(*parts: Any) -> str:
+    """Build a stable content-addressed key from arbitrary JSON-serializable parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class CacheRepository(BaseRepository):
+    """Mongo-backed key/value cache with TTL expiry and size-based eviction.
+
+    Entries expire through a TTL index on ``expires_at``. When the collection
+    grows beyond ``max_entries`` the least recently used entries are evicted.
+    Lookups are counted per process in ``hits``/``misses``.
+    """
+
+    def __init__(self, collection_name: str, ttl_seconds: int, max_entries: Optional[int] = None):
+        super().__init__(collection_name)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup hit/miss counts since process start."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+    def _set_update(self, value: Any, ttl_seconds: Optional[int], metadata: Optional[Dict[str, Any]], now: datetime) -> Dict[str, Any]:
+        return {
+            "$set": {
+                "value": value,
+                "metadata": metadata or {},
+                "expires_at": now + timedelta(seconds=ttl_seconds or self.ttl_seconds),
+                "last_accessed_at": now
+            },
+            "$setOnInsert": {"created_at": now, "hits": 0}
+        }
+
+    async def ensure_indexes(self):
+        """Create the TTL, key and LRU indexes used by the cache."""
+        try:
+            await self.collection.create_index([("key", ASCENDING)], unique=True)
+            await self.collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+            await self.collection.create_index([("last_accessed_at", ASCENDING)])
+        except Exception as e:
+            raise DatabaseError(f"ensure_indexes in {self.collection_name}", e)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or None on a miss or expired entry."""
+        try:
+            now = datetime.utcnow()
+            doc = await self.collection.find_one_and_update(
+                {"key": key, "expires_at": {"$gt": now}},
+                {"$set": {"last_accessed_at": now}, "$inc": {"hits": 1}},
+                projection={"value": 1},
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            raise DatabaseError(f"cache get in {self.collection_name}", e)
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return doc["value"]
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return ``{key: value}`` for every live entry among ``keys``; absent keys are misses."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            now = datetime.utcnow()
+            cursor = self.collection.find(
+                {"key": {"$in": keys}, "expires_at": {"$gt": now}},
+                {"key": 1, "value": 1}
+            )
+            found = {doc["key"]: doc["value"] async for doc in cursor}
+            if found:
+                await self.collection.update_many(
+                    {"key": {"$in": list(found)}},
+                    {"$set": {"last_accessed_at": now}, "$inc": {"hits": 1}}
+                )
+        except Exception as e:
+            raise DatabaseError(f"cache get_many in {self.collection_name}", e)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None, metadata: Optional[Dict[str, Any]] = None):
+        """Store ``value`` under ``key``, replacing any previous entry."""
+        try:
+            now = datetime.utcnow()
+            await self.collection.update_one(
+                {"key": key},
+                self._set_update(value, ttl_seconds, metadata, now),
+                upsert=True
+            )
+        except Exception as e:
+            raise DatabaseError(f"cache set in {self.collection_name}", e)
+        await self.evict()
+
+    async def set_many(self, values: Dict[str, Any], ttl_seconds: Optional[int] = None):
+        """Store every ``{key: value}`` pair in one bulk write, then evict once."""
+        if not values:
+            return
+        try:
+            now = datetime.utcnow()
+            await self.collection.bulk_write(
+                [
+                    UpdateOne({"key": key}, self._set_update(value, ttl_seconds, None, now), upsert=True)
+                    for key, value in values.items()
+                ],
+                ordered=False
+            )
+        except Exception as e:
+            raise DatabaseError(f"cache set_many in {self.collection_name}", e)
+        await self.evict()
+
+    async def evict(self) -> int:
+        """Evict least recently used entries beyond ``max_entries``."""
+        if not self.max_entries:
+            return 0
+        try:
+            overflow = await self.collection.estimated_document_count() - self.max_entries
+            if overflow <= 0:
+                return 0
+            cursor = self.collection.find({}, {"_id": 1}).sort("last_accessed_at", ASCENDING).limit(overflow)
+            stale_ids = [doc["_id"] async for doc in cursor]
+            result = await self.collection.delete_many({"_id": {"$in": stale_ids}})
+            logger.info(f"Evicted {result.deleted_count} entries from {self.collection_name}")
+            return result.deleted_count
+        except Exception as e:
+            raise DatabaseError(f"cache evict in {self.collection_name}", e)
@@ -0,0 +1,44 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+Merge = Callable[[Any, Any], Any]
+Flush = Callable[[Hashable, Any], Awaitable[Any]]
+
+
+class WriteCoalescer:
+    """Merge writes for the same key arriving within a short window into one flush.
+
+    The first write for a key opens a window; later writes for that key are
+    merged into the pending value. When the window closes the merged value is
+    flushed once, and every caller that contributed receives the flush result.
+    Coalescing is per process.
+    """
+
+    def __init__(self, window_seconds: float, merge: Merge, flush: Flush):
+        self.window_seconds = window_seconds
+        self.merge = merge
+        self.flush = flush
+        self._pending: Dict[Hashable, Dict[str, Any]] = {}
+
+    async def submit(self, key: Hashable, value: Any) -> Any:
+        """Queue ``value`` for ``key`` and wait for the coalesced flush result."""
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = {"value": value, "future": asyncio.get_running_loop().create_future()}
+            self._pending[key] = pending
+            asyncio.create_task(self._flush_after_window(key))
+        else:
+            pending["value"] = self.merge(pending["value"], value)
+        return await asyncio.shield(pending["future"])
+
+    async def _flush_after_window(self, key: Hashable):
+        await asyncio.sleep(self.window_seconds)
+        pending = self._pending.pop(key)
+        try:
+            pending["future"].set_result(await self.flush(key, pending["value"]))
+        except Exception as e:
+            logger.error(f"Coalesced flush for {key} failed: {e}")
+            pending["future"].set_exception(e)
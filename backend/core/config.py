@@ -9,10 +9,82 @@ class Settings(BaseSettings):
     # Database
     mongodb_uri: str = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
     database_name: str = os.getenv('DATABASE_NAME', 'CollegeCounselingDB')
+    # Connection pool (per process): total server connections ~= workers x mongodb_max_pool_size
+    mongodb_max_pool_size: int = int(os.getenv('MONGODB_MAX_POOL_SIZE', '20'))
+    mongodb_min_pool_size: int = int(os.getenv('MONGODB_MIN_POOL_SIZE', '2'))
+    mongodb_max_idle_time_ms: int = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+    mongodb_wait_queue_timeout_ms: int = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+    mongodb_connect_timeout_ms: int = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '10000'))
+    mongodb_server_selection_timeout_ms: int = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '10000'))
+    mongodb_read_preference: str = os.getenv('MONGODB_READ_PREFERENCE', 'primary')
+    # Comma-separated wire compressors (zlib needs no extra packages; snappy/zstd do)
+    mongodb_compressors: str = os.getenv('MONGODB_COMPRESSORS', 'zlib')
+    # Connections opened at startup so the first requests don't pay for the handshake
+    mongodb_prewarm_connections: int = int(os.getenv('MONGODB_PREWARM_CONNECTIONS', '2'))
     
     # OpenAI
     openai_api_key: str = os.getenv('OPENAI_API_KEY', '')
-    
+    openai_timeout_seconds: float = float(os.getenv('OPENAI_TIMEOUT_SECONDS', '120'))
+    openai_connect_timeout_seconds: float = float(os.getenv('OPENAI_CONNECT_TIMEOUT_SECONDS', '10'))
+    openai_max_retries: int = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+    openai_max_connections: int = int(os.getenv('OPENAI_MAX_CONNECTIONS', '200'))
+    openai_max_keepalive_connections: int = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '40'))
+
+    # LLM admission control (per process): interactive chat is prioritized over batch generation
+    llm_max_concurrency: int = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+    llm_interactive_reserved: int = int(os.getenv('LLM_INTERACTIVE_RESERVED', '4'))
+    llm_interactive_max_wait_seconds: float = float(os.getenv('LLM_INTERACTIVE_MAX_WAIT_SECONDS', '15'))
+    llm_batch_max_wait_seconds: float = float(os.getenv('LLM_BATCH_MAX_WAIT_SECONDS', '300'))
+
+    # Profile generation: write independent section groups in concurrent calls instead of one large call
+    profile_sectional_generation: bool = os.getenv('PROFILE_SECTIONAL_GENERATION', 'False').lower() == 'true'
+    profile_section_concurrency: int = int(os.getenv('PROFILE_SECTION_CONCURRENCY', '6'))
+
+    # Token budgets: student answers in generation prompts, and recent chat history per turn
+    prompt_context_max_tokens: int = int(os.getenv('PROMPT_CONTEXT_MAX_TOKENS', '6000'))
+    chat_history_max_tokens: int = int(os.getenv('CHAT_HISTORY_MAX_TOKENS', '3000'))
+    # Rendered student contexts memoized per process (LRU, by user)
+    student_context_cache_size: int = int(os.getenv('STUDENT_CONTEXT_CACHE_SIZE', '1000'))
+    # Budget for the student summary placed in the mentor chat system prompt
+    chat_profile_max_tokens: int = int(os.getenv('CHAT_PROFILE_MAX_TOKENS', '600'))
+    # Chat memory: messages past the running summary are sent verbatim; once a batch has left
+    # the recent window it is folded into the summary
+    chat_history_messages: int = int(os.getenv('CHAT_HISTORY_MESSAGES', '10'))
+    chat_summary_batch_messages: int = int(os.getenv('CHAT_SUMMARY_BATCH_MESSAGES', '20'))
+    chat_summary_max_tokens: int = int(os.getenv('CHAT_SUMMARY_MAX_TOKENS', '400'))
+
+    # Recommendation cache
+    recommendation_cache_ttl_seconds: int = int(os.getenv('RECOMMENDATION_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+    recommendation_cache_max_entries: int = int(os.getenv('RECOMMENDATION_CACHE_MAX_ENTRIES', '10000'))
+    # Web search URL cache: misses (no link found) are retried after the shorter negative TTL
+    url_cache_ttl_seconds: int = int(os.getenv('URL_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+    url_cache_negative_ttl_seconds: int = int(os.getenv('URL_CACHE_NEGATIVE_TTL_SECONDS', str(24 * 3600)))
+    url_cache_max_entries: int = int(os.getenv('URL_CACHE_MAX_ENTRIES', '50000'))
+    # Concurrent per-college web searches within one recommendation generation
+    web_search_concurrency: int = int(os.getenv('WEB_SEARCH_CONCURRENCY', '9'))
+
+    # Autosave: merge PATCHes for the same form arriving within this window (0 disables)
+    autosave_coalesce_window_ms: int = int(os.getenv('AUTOSAVE_COALESCE_WINDOW_MS', '0'))
+
+    # Background jobs
+    job_worker_inline: bool = os.getenv('JOB_WORKER_INLINE', 'True').lower() == 'true'
+    job_worker_concurrency: int = int(os.getenv('JOB_WORKER_CONCURRENCY', '4'))
+    job_max_attempts: int = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    job_lease_seconds: int = int(os.getenv('JOB_LEASE_SECONDS', '60'))
+    job_retry_base_seconds: int = int(os.getenv('JOB_RETRY_BASE_SECONDS', '10'))
+    job_poll_interval_seconds: float = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', '1'))
+    job_retention_seconds: int = int(os.getenv('JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+    # How long shutdown waits for the inline worker's in-flight jobs
+    job_shutdown_grace_seconds: float = float(os.getenv('JOB_SHUTDOWN_GRACE_SECONDS', '20'))
+
+    # Status streams: re-check interval when no event arrives, and maximum stream duration
+    status_stream_recheck_seconds: float = float(os.getenv('STATUS_STREAM_RECHECK_SECONDS', '15'))
+    status_stream_max_seconds: int = int(os.getenv('STATUS_STREAM_MAX_SECONDS', '600'))
+    # Relay generation status writes from other processes via MongoDB change streams (replica sets only)
+    status_change_streams: bool = os.getenv('STATUS_CHANGE_STREAMS', 'False').lower() == 'true'
+    # Without change streams a job usually runs in another worker process, so streams poll this often
+    status_stream_poll_seconds: float = float(os.getenv('STATUS_STREAM_POLL_SECONDS', '1'))
+
     # API
     api_title: str = "College Counseling API"
     api_version: str = "1.0.0"
@@ -1,13 +1,125 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import Optional, Dict, Any, List
-from bson import ObjectId
+from typing import Optional, Dict, Any, List, Tuple
+from bson import ObjectId, json_util
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.monitoring import ConnectionPoolListener
+import asyncio
+import base64
 import logging
+import os
+import threading
+import time
 
 from core.config import settings
-from core.exceptions import DatabaseError
+from core.exceptions import DatabaseError, ValidationError
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PoolStats(ConnectionPoolListener):
+    """Connection pool listener recording checkout wait times for this process.
+
+    PyMongo publishes checkout events synchronously on the thread performing
+    the checkout, so the start time is kept per thread and matched with the
+    checked-out (or failed) event that follows it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Clear all counters."""
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.open_connections = 0
+            self.checked_out = 0
+
+    def _record_wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.monotonic() - started) * 1000 if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.monotonic()
+
+    def connection_checked_out(self, event):
+        wait_ms = self._record_wait()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        self._record_wait()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage and checkout wait times for this process."""
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_checkout_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_checkout_wait_ms": round(self.max_wait_ms, 3)
+            }
+
+
+def client_options() -> Dict[str, Any]:
+    """Motor client options built from settings."""
+    options = {
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongodb_wait_queue_timeout_ms,
+        "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+        "readPreference": settings.mongodb_read_preference
+    }
+    if settings.mongodb_compressors:
+        options["compressors"] = settings.mongodb_compressors
+    return options
+
 
 class DatabaseManager:
     """Centralized database management."""
@@ -15,21 +127,46 @@ class DatabaseManager:
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.database: Optional[AsyncIOMotorDatabase] = None
+        self.pool_stats = PoolStats()
     
     async def connect(self):
-        """Connect to MongoDB."""
+        """Connect to MongoDB. A no-op when already connected, so each process keeps one pool."""
+        if self.client is not None:
+            return
         try:
-            self.client = AsyncIOMotorClient(settings.mongodb_uri)
+            self.client = AsyncIOMotorClient(
+                settings.mongodb_uri,
+                event_listeners=[self.pool_stats],
+                **client_options()
+            )
             self.database = self.client[settings.database_name]
             logger.info("Connected to MongoDB")
-            
-            # Update legacy db reference for backward compatibility
-            global db
-            db = self.database
-            
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise DatabaseError("connection", e)
+
+    async def prewarm(self, connections: int):
+        """Open up to ``connections`` pooled connections with concurrent pings.
+
+        Failures are logged rather than raised so a slow server delays nothing
+        beyond startup; the pool fills on demand instead.
+        """
+        if self.client is None or connections <= 0:
+            return
+        try:
+            await asyncio.gather(*(self.client.admin.command("ping") for _ in range(connections)))
+            logger.info(f"Pre-warmed {self.pool_stats.open_connections} MongoDB connection(s)")
+        except Exception as e:
+            logger.warning(f"MongoDB connection pre-warm failed: {e}")
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Pool configuration and usage for this worker process."""
+        return {
+            "pid": os.getpid(),
+            "max_pool_size": settings.mongodb_max_pool_size,
+            "min_pool_size": settings.mongodb_min_pool_size,
+            **self.pool_stats.stats()
+        }
     
     async def disconnect(self):
         """Disconnect from MongoDB."""
@@ -68,6 +205,37 @@ def serialize_docs(docs: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[s
     return [serialize_doc(doc) for doc in docs]
 
 
+def encode_cursor(doc: Dict[str, Any], sort_field: str = "_id") -> str:
+    """Encode the keyset position of a document as an opaque pagination token."""
+    position = {"id": str(doc["_id"])}
+    if sort_field != "_id":
+        position["v"] = doc.get(sort_field)
+    return base64.urlsafe_b64encode(json_util.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode a pagination token produced by encode_cursor."""
+    try:
+        position = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise ValidationError("Invalid pagination cursor")
+    if ObjectId.is_valid(position["id"]):
+        position["id"] = ObjectId(position["id"])
+    return position
+
+
+def keyset_filter(sort_field: str, direction: int, token: str) -> Dict[str, Any]:
+    """Build the filter selecting documents strictly after the cursor position."""
+    position = decode_cursor(token)
+    op = "$gt" if direction == ASCENDING else "$lt"
+    if sort_field == "_id":
+        return {"_id": {op: position["id"]}}
+    return {"$or": [
+        {sort_field: {op: position.get("v")}},
+        {sort_field: position.get("v"), "_id": {op: position["id"]}}
+    ]}
+
+
 class BaseRepository:
     """Base repository class with common CRUD operations."""
     
@@ -99,25 +267,81 @@ class BaseRepository:
         except Exception as e:
             raise DatabaseError(f"find_by_id in {self.collection_name}", e)
     
-    async def find_one(self, filter_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Find one document by filter."""
+    async def find_one(
+        self,
+        filter_dict: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[Tuple[str, int]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Find one document by filter, optionally the first in sort order."""
         try:
-            doc = await self.collection.find_one(filter_dict)
+            kwargs = {}
+            if projection is not None:
+                kwargs["projection"] = projection
+            if sort:
+                kwargs["sort"] = sort
+            doc = await self.collection.find_one(filter_dict, **kwargs)
             return serialize_doc(doc)
         except Exception as e:
             raise DatabaseError(f"find_one in {self.collection_name}", e)
     
-    async def find_many(self, filter_dict: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Find multiple documents by filter."""
+    async def find_many(
+        self,
+        filter_dict: Dict[str, Any],
+        limit: Optional[int] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        skip: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        after: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Find multiple documents by filter with optional sort, paging and projection.
+
+        ``after`` is a keyset pagination token from encode_cursor; it requires a
+        single-field sort (defaults to ``_id``) and ties are broken by ``_id``.
+        """
         try:
-            cursor = self.collection.find(filter_dict)
+            if after:
+                sort_field, direction = (sort or [("_id", ASCENDING)])[0]
+                filter_dict = {"$and": [filter_dict, keyset_filter(sort_field, direction, after)]}
+                sort = [(sort_field, direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+            cursor = self.collection.find(filter_dict, projection)
+            if sort:
+                cursor = cursor.sort(sort)
+            if skip:
+                cursor = cursor.skip(skip)
             if limit:
                 cursor = cursor.limit(limit)
+            if batch_size:
+                cursor = cursor.batch_size(batch_size)
             docs = await cursor.to_list(length=None)
             return serialize_docs(docs)
+        except ValidationError:
+            raise
         except Exception as e:
             raise DatabaseError(f"find_many in {self.collection_name}", e)
-    
+
+    async def find_page(
+        self,
+        filter_dict: Dict[str, Any],
+        limit: int,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        after: Optional[str] = None,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Fetch one keyset page: ``{"items": [...], "next_cursor": token or None}``."""
+        sort = sort or [("_id", ASCENDING)]
+        sort_field = sort[0][0]
+        if projection and sort_field not in projection and any(projection.values()):
+            projection = {**projection, sort_field: 1}
+        docs = await self.find_many(filter_dict, limit=limit + 1, sort=sort, projection=projection, after=after)
+        has_more = len(docs) > limit
+        items = docs[:limit]
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(items[-1], sort_field) if has_more else None
+        }
+
     async def update_one(self, filter_dict: Dict[str, Any], update_data: Dict[str, Any]) -> bool:
         try:
             result = await self.collection.update_one(filter_dict, {"$set": update_data})
@@ -126,6 +350,55 @@ class BaseRepository:
         except Exception as e:
             raise DatabaseError(f"update_one in {self.collection_name}", e)
 
+    async def upsert_one(
+        self,
+        filter_dict: Dict[str, Any],
+        update_data: Dict[str, Any],
+        set_on_insert: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Update or insert one document in a single round trip and return it.
+
+        Relies on a unique index over the filter fields; a concurrent insert
+        losing the race raises DuplicateKeyError and is retried as an update.
+        """
+        update = {"$set": update_data}
+        if set_on_insert:
+            update["$setOnInsert"] = set_on_insert
+        for attempt in range(2):
+            try:
+                doc = await self.collection.find_one_and_update(
+                    filter_dict,
+                    update,
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                return serialize_doc(doc)
+            except DuplicateKeyError as e:
+                if attempt:
+                    raise DatabaseError(f"upsert_one in {self.collection_name}", e)
+            except Exception as e:
+                raise DatabaseError(f"upsert_one in {self.collection_name}", e)
+
+    async def find_one_and_update(
+        self,
+        filter_dict: Dict[str, Any],
+        update: Any,
+        upsert: bool = False,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Apply a raw update document or aggregation pipeline and return the updated document."""
+        try:
+            doc = await self.collection.find_one_and_update(
+                filter_dict,
+                update,
+                projection=projection,
+                upsert=upsert,
+                return_document=ReturnDocument.AFTER
+            )
+            return serialize_doc(doc)
+        except Exception as e:
+            raise DatabaseError(f"find_one_and_update in {self.collection_name}", e)
+
     async def delete_one(self, filter_dict: Dict[str, Any]) -> bool:
         """Delete one document."""
         try:
@@ -143,11 +416,8 @@ class BaseRepository:
             raise DatabaseError(f"delete_many in {self.collection_name}", e)
 
 
-# Legacy compatibility - will be removed after refactoring
-async def get_database():
-    """Legacy function for backward compatibility."""
+def get_database() -> AsyncIOMotorDatabase:
+    """Request dependency resolving the connected database (opened once in the startup hook)."""
+    if db_manager.database is None:
+        raise DatabaseError("get_database", Exception("Database not connected"))
     return db_manager.database
-
-
-# Legacy compatibility - will be set after connection
-db = None 
\ No newline at end of file
@@ -0,0 +1,83 @@
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+
+from core.database import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    """In-process publish/subscribe for state-change notifications.
+
+    Events are wake-up hints: subscribers re-read the state they care about
+    when notified, so a dropped or coalesced event only costs latency.
+    Delivery is per process; ``relay_change_stream`` forwards writes made by
+    other processes (e.g. a separate job worker).
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def publish(self, topic: str, event: Optional[Dict[str, Any]] = None):
+        """Notify every current subscriber of ``topic``."""
+        for queue in list(self._subscribers.get(topic, ())):
+            queue.put_nowait(event or {})
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive events published to ``topic`` for the duration of the block."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[topic].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[topic].discard(queue)
+            if not self._subscribers[topic]:
+                del self._subscribers[topic]
+
+    def subscriber_count(self) -> int:
+        """Open subscriptions across all topics."""
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+async def wait_for_event(queue: asyncio.Queue, timeout: float) -> bool:
+    """Wait up to ``timeout`` seconds for an event, draining any backlog. Returns False on timeout."""
+    try:
+        await asyncio.wait_for(queue.get(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return False
+    while not queue.empty():
+        queue.get_nowait()
+    return True
+
+
+async def relay_change_stream(bus: EventBus, collection_name: str, topic_for: Callable[[str], str]):
+    """Publish every insert/update on ``collection_name`` to ``topic_for(document["user_id"])``.
+
+    Requires a replica set or sharded cluster (e.g. MongoDB Atlas); on a
+    standalone server the relay logs a warning and exits, leaving subscribers
+    on their periodic re-check.
+    """
+    pipeline = [
+        {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+        {"$project": {"fullDocument.user_id": 1, "fullDocument.status": 1}}
+    ]
+    try:
+        collection = db_manager.get_collection(collection_name)
+        async with collection.watch(pipeline, full_document="updateLookup") as stream:
+            logger.info(f"Relaying change stream for {collection_name}")
+            async for change in stream:
+                document = change.get("fullDocument")
+                if document and document.get("user_id"):
+                    bus.publish(topic_for(document["user_id"]), {"status": document.get("status")})
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Change stream relay for {collection_name} stopped: {e}")
+
+
+# Global event bus instance
+event_bus = EventBus()
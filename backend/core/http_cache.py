@@ -0,0 +1,56 @@
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+from core.cache import hash_key
+
+# Browsers may store the body but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+# Fields a version lookup needs; every write to a cached document bumps updated_at
+VERSION_PROJECTION = {"_id": 1, "updated_at": 1}
+
+
+def document_version(doc: Dict[str, Any]) -> Tuple[str, Optional[datetime]]:
+    """Strong ETag and Last-Modified time for a document, from its _id and updated_at.
+
+    Naive datetimes are treated as UTC.
+    """
+    updated_at = doc.get("updated_at")
+    etag = f'"{hash_key(str(doc["_id"]), updated_at)[:32]}"'
+    if isinstance(updated_at, datetime) and updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return etag, updated_at if isinstance(updated_at, datetime) else None
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """Validator and Cache-Control headers for a cacheable response."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the current version."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    """Empty 304 response carrying the current validators."""
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
@@ -0,0 +1,153 @@
+"""
+Declarative index registry and query-plan verification.
+
+Every collection the app queries declares its indexes here. ``ensure_indexes``
+applies them at startup, and ``verify_query_plans`` runs ``explain()`` on each
+known query shape to report any that still fall back to a collection scan:
+
+    python -m core.indexes
+"""
+from typing import Any, Dict, List
+import asyncio
+import logging
+import sys
+
+from pymongo import ASCENDING, DESCENDING
+
+from core.database import db_manager
+
+logger = logging.getLogger(__name__)
+
+# collection -> list of index definitions passed to create_index
+INDEX_REGISTRY: Dict[str, List[Dict[str, Any]]] = {
+    "users": [
+        # routes/users.py keys users by user_id, routes/auth.py by userId/email
+        {"keys": [("user_id", ASCENDING)], "unique": True, "sparse": True},
+        {"keys": [("userId", ASCENDING)], "unique": True, "sparse": True},
+        # One account per email; signup relies on this to settle concurrent requests
+        {"keys": [("email", ASCENDING)], "unique": True, "sparse": True},
+        {"keys": [("role", ASCENDING), ("_id", ASCENDING)]},
+    ],
+    "responses": [
+        {"keys": [("user_id", ASCENDING), ("form_id", ASCENDING)], "unique": True},
+    ],
+    "recommendations": [
+        {"keys": [("user_id", ASCENDING), ("updated_at", DESCENDING)]},
+        {"keys": [("user_id", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING)]},
+    ],
+    "profileGenerations": [
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING)]},
+        {"keys": [("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]},
+    ],
+    "conversations": [
+        {"keys": [("userId", ASCENDING), ("_id", ASCENDING)]},
+        {"keys": [("numericId", ASCENDING)]},
+    ],
+    "messages": [
+        {"keys": [("conversationId", ASCENDING), ("createdAt", ASCENDING)]},
+        {"keys": [("conversationId", ASCENDING), ("_id", ASCENDING)]},
+    ],
+    "questionResponses": [
+        {"keys": [("userId", ASCENDING), ("sectionId", ASCENDING)]},
+    ],
+    "studentProfiles": [
+        {"keys": [("userId", ASCENDING)]},
+    ],
+    "conversationSummaries": [
+        {"keys": [("conversationId", ASCENDING)], "unique": True},
+    ],
+    "studentContextVersions": [
+        {"keys": [("user_id", ASCENDING)], "unique": True},
+    ],
+}
+
+# Query shapes issued by routes and repositories, checked by verify_query_plans
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "users", "filter": {"user_id": "x"}},
+    {"collection": "users", "filter": {"userId": "x"}},
+    {"collection": "users", "filter": {"email": "x"}},
+    {"collection": "users", "filter": {"role": "student"}, "sort": [("_id", ASCENDING)]},
+    {"collection": "responses", "filter": {"user_id": "x"}},
+    {"collection": "responses", "filter": {"user_id": "x", "form_id": "x"}},
+    {"collection": "recommendations", "filter": {"user_id": "x"}, "sort": [("updated_at", DESCENDING)]},
+    {"collection": "recommendations", "filter": {"user_id": "x", "status": "completed"}, "sort": [("updated_at", DESCENDING)]},
+    {"collection": "profileGenerations", "filter": {"user_id": "x"}, "sort": [("created_at", DESCENDING)]},
+    {"collection": "profileGenerations", "filter": {"user_id": "x", "status": "completed"}, "sort": [("created_at", DESCENDING)]},
+    {"collection": "conversations", "filter": {"userId": "x"}, "sort": [("_id", ASCENDING)]},
+    {"collection": "messages", "filter": {"conversationId": "x"}, "sort": [("createdAt", ASCENDING)]},
+    {"collection": "messages", "filter": {"conversationId": "x"}, "sort": [("_id", ASCENDING)]},
+    {"collection": "conversations", "filter": {"numericId": 1}},
+    {"collection": "questionResponses", "filter": {"userId": "x", "sectionId": "x"}},
+    {"collection": "studentProfiles", "filter": {"userId": "x"}},
+    {"collection": "studentContextVersions", "filter": {"user_id": "x"}},
+    {"collection": "conversationSummaries", "filter": {"conversationId": "x"}},
+    {"collection": "jobs", "filter": {"active_key": "x"}},
+]
+
+
+async def ensure_indexes() -> List[str]:
+    """Create every registered index. Returns the names of indexes that failed."""
+    failed = []
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        collection = db_manager.get_collection(collection_name)
+        for index in indexes:
+            options = {k: v for k, v in index.items() if k != "keys"}
+            try:
+                await collection.create_index(index["keys"], **options)
+            except Exception as e:
+                # e.g. existing duplicates block a unique index; keep serving and report it
+                name = f"{collection_name}.{'_'.join(field for field, _ in index['keys'])}"
+                logger.error(f"Failed to create index {name}: {e}")
+                failed.append(name)
+    return failed
+
+
+def find_collection_scans(plan: Dict[str, Any]) -> List[str]:
+    """Walk an explain() plan tree and return the stages that scan a collection."""
+    stages = []
+    if plan.get("stage") == "COLLSCAN":
+        stages.append("COLLSCAN")
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages.extend(find_collection_scans(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(find_collection_scans(child))
+    return stages
+
+
+async def verify_query_plans() -> List[Dict[str, Any]]:
+    """Explain every registered query shape and report whether it uses an index."""
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = db_manager.get_collection(shape["collection"]).find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explanation = await cursor.explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        report.append({
+            "collection": shape["collection"],
+            "filter": list(shape["filter"]),
+            "sort": [field for field, _ in shape.get("sort", [])],
+            "collection_scan": bool(find_collection_scans(winning_plan))
+        })
+    return report
+
+
+async def _main() -> int:
+    await db_manager.connect()
+    try:
+        failed = await ensure_indexes()
+        report = await verify_query_plans()
+    finally:
+        await db_manager.disconnect()
+
+    for entry in report:
+        marker = "COLLSCAN" if entry["collection_scan"] else "IXSCAN  "
+        print(f"{marker} {entry['collection']} filter={entry['filter']} sort={entry['sort']}")
+    for name in failed:
+        print(f"FAILED   index {name}")
+    return 1 if failed or any(entry["collection_scan"] for entry in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,318 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from core.config import settings
+from core.database import BaseRepository, serialize_doc
+from core.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[Dict[str, Any], str], Awaitable[None]]
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Recorded on jobs whose final attempt never reported back (e.g. it crashed its worker)
+LEASE_EXPIRED_ERROR = "Lease expired on the final attempt"
+
+
+class JobQueue(BaseRepository):
+    """Durable Mongo-backed job queue with leases, retries and de-duplication.
+
+    A job is claimed atomically by one worker and holds a lease that the
+    worker extends with heartbeats. Jobs whose lease expires (worker crash or
+    restart) become claimable again while attempts remain, and are failed
+    once they are exhausted. Jobs sharing a ``dedupe_key`` cannot be active
+    at the same time.
+    """
+
+    def __init__(self, collection_name: str = "jobs"):
+        super().__init__(collection_name)
+
+    async def ensure_indexes(self):
+        """Create the claim, de-duplication and cleanup indexes."""
+        try:
+            await self.collection.create_index([("status", ASCENDING), ("type", ASCENDING), ("run_at", ASCENDING)])
+            await self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+            await self.collection.create_index([("active_key", ASCENDING)], unique=True, sparse=True)
+            await self.collection.create_index(
+                [("finished_at", ASCENDING)],
+                expireAfterSeconds=settings.job_retention_seconds
+            )
+        except Exception as e:
+            raise DatabaseError(f"ensure_indexes in {self.collection_name}", e)
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+        max_attempts: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Enqueue a job, or return the active job already holding ``dedupe_key``."""
+        now = datetime.utcnow()
+        job = {
+            "type": job_type,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.job_max_attempts,
+            "run_at": now,
+            "created_at": now,
+            "updated_at": now
+        }
+        if dedupe_key:
+            job["active_key"] = dedupe_key
+        try:
+            result = await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            existing = await self.find_active(dedupe_key)
+            if existing is None:
+                # The active job finished between the insert and the lookup
+                return await self.enqueue(job_type, payload, dedupe_key, max_attempts)
+            existing["deduplicated"] = True
+            return existing
+        except Exception as e:
+            raise DatabaseError(f"enqueue in {self.collection_name}", e)
+        job["_id"] = str(result.inserted_id)
+        return job
+
+    async def find_active(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        """Find the queued or running job holding ``dedupe_key``."""
+        return await self.find_one({"active_key": dedupe_key})
+
+    async def claim(self, worker_id: str, job_types: List[str]) -> Optional[Dict[str, Any]]:
+        """Atomically claim the next runnable job, including jobs with expired leases."""
+        now = datetime.utcnow()
+        try:
+            job = await self.collection.find_one_and_update(
+                {
+                    "type": {"$in": job_types},
+                    "$or": [
+                        {"status": "queued", "run_at": {"$lte": now}},
+                        {
+                            "status": "running",
+                            "lease_expires_at": {"$lt": now},
+                            "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+                        }
+                    ]
+                },
+                {
+                    "$set": {
+                        "status": "running",
+                        "worker_id": worker_id,
+                        "lease_expires_at": now + timedelta(seconds=settings.job_lease_seconds),
+                        "started_at": now,
+                        "updated_at": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("run_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            return serialize_doc(job)
+        except Exception as e:
+            raise DatabaseError(f"claim in {self.collection_name}", e)
+
+    async def dead_letter_expired(self, job_types: List[str]) -> Optional[Dict[str, Any]]:
+        """Fail one job whose lease expired after its final attempt and return it, or None."""
+        now = datetime.utcnow()
+        try:
+            job = await self.collection.find_one_and_update(
+                {
+                    "type": {"$in": job_types},
+                    "status": "running",
+                    "lease_expires_at": {"$lt": now},
+                    "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+                },
+                {
+                    "$set": {"status": "failed", "last_error": LEASE_EXPIRED_ERROR, "finished_at": now, "updated_at": now},
+                    "$unset": {"active_key": "", "lease_expires_at": ""}
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            return serialize_doc(job)
+        except Exception as e:
+            raise DatabaseError(f"dead_letter_expired in {self.collection_name}", e)
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease of a running job; False if the lease was lost."""
+        now = datetime.utcnow()
+        return await self.update_one(
+            {"_id": ObjectId(job_id), "worker_id": worker_id, "status": "running"},
+            {"lease_expires_at": now + timedelta(seconds=settings.job_lease_seconds), "updated_at": now}
+        )
+
+    async def complete(self, job_id: str, worker_id: str) -> bool:
+        """Mark a job completed and release its de-duplication key."""
+        now = datetime.utcnow()
+        try:
+            result = await self.collection.update_one(
+                {"_id": ObjectId(job_id), "worker_id": worker_id},
+                {
+                    "$set": {"status": "completed", "finished_at": now, "updated_at": now},
+                    "$unset": {"active_key": "", "lease_expires_at": ""}
+                }
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            raise DatabaseError(f"complete in {self.collection_name}", e)
+
+    async def fail(self, job: Dict[str, Any], worker_id: str, error: str) -> bool:
+        """Schedule a retry with exponential backoff; returns True if the job failed permanently.
+
+        Returns False without changing anything if this worker no longer holds
+        the job, so only the current owner runs the failure hook.
+        """
+        now = datetime.utcnow()
+        if job["attempts"] < job["max_attempts"]:
+            delay = settings.job_retry_base_seconds * (2 ** (job["attempts"] - 1))
+            update = {
+                "$set": {
+                    "status": "queued",
+                    "run_at": now + timedelta(seconds=delay),
+                    "last_error": error,
+                    "updated_at": now
+                },
+                "$unset": {"lease_expires_at": ""}
+            }
+            permanent = False
+        else:
+            update = {
+                "$set": {"status": "failed", "last_error": error, "finished_at": now, "updated_at": now},
+                "$unset": {"active_key": "", "lease_expires_at": ""}
+            }
+            permanent = True
+        try:
+            result = await self.collection.update_one({"_id": ObjectId(job["_id"]), "worker_id": worker_id}, update)
+        except Exception as e:
+            raise DatabaseError(f"fail in {self.collection_name}", e)
+        if result.matched_count == 0:
+            logger.warning(f"Job {job['_id']} is no longer held by {worker_id}; leaving it to its current owner")
+            return False
+        return permanent
+
+    async def queue_depth(self) -> Dict[str, int]:
+        """Count active jobs per status."""
+        try:
+            depth = {status: 0 for status in ACTIVE_STATUSES}
+            cursor = self.collection.aggregate([
+                {"$match": {"status": {"$in": list(ACTIVE_STATUSES)}}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ])
+            async for row in cursor:
+                depth[row["_id"]] = row["count"]
+            return depth
+        except Exception as e:
+            raise DatabaseError(f"queue_depth in {self.collection_name}", e)
+
+
+class JobWorker:
+    """Polls the job queue and runs registered handlers under a concurrency limit."""
+
+    def __init__(self, queue: JobQueue, concurrency: Optional[int] = None):
+        self.queue = queue
+        self.concurrency = concurrency or settings.job_worker_concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self.failure_handlers: Dict[str, FailureHandler] = {}
+        self._stopping = asyncio.Event()
+        self._running: set = set()
+
+    def register(self, job_type: str, handler: JobHandler, on_failure: Optional[FailureHandler] = None):
+        """Register the handler for a job type and an optional permanent-failure hook."""
+        self.handlers[job_type] = handler
+        if on_failure:
+            self.failure_handlers[job_type] = on_failure
+
+    async def run(self):
+        """Claim and run jobs until stop() is called."""
+        logger.info(f"Job worker {self.worker_id} started with concurrency {self.concurrency}")
+        slots = asyncio.Semaphore(self.concurrency)
+        while not self._stopping.is_set():
+            await slots.acquire()
+            await self._dead_letter_expired()
+            try:
+                job = await self.queue.claim(self.worker_id, list(self.handlers))
+            except Exception as e:
+                logger.error(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=settings.job_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(lambda t: (self._running.discard(t), slots.release()))
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    async def stop(self):
+        """Stop claiming new jobs; run() returns once in-flight jobs finish."""
+        self._stopping.set()
+
+    async def _dead_letter_expired(self):
+        """Fail jobs that used up their attempts without reporting back, running their failure hooks."""
+        try:
+            while job := await self.queue.dead_letter_expired(list(self.handlers)):
+                logger.error(f"Job {job['_id']} ({job['type']}) failed permanently: {LEASE_EXPIRED_ERROR}")
+                on_failure = self.failure_handlers.get(job["type"])
+                if on_failure:
+                    await on_failure(job["payload"], LEASE_EXPIRED_ERROR)
+        except Exception as e:
+            logger.error(f"Dead-lettering expired jobs failed: {e}")
+
+    async def _heartbeat(self, job_id: str):
+        interval = settings.job_lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await self.queue.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                # A transient error must not stop renewal, or the lease expires and the job runs twice
+                logger.error(f"Heartbeat for job {job_id} failed: {e}")
+                continue
+            if not renewed:
+                logger.warning(f"Lost lease on job {job_id}")
+                return
+
+    async def _execute(self, job: Dict[str, Any]):
+        job_id = job["_id"]
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self.handlers[job["type"]](job["payload"])
+        except Exception as e:
+            heartbeat.cancel()
+            logger.error(f"Job {job_id} ({job['type']}) attempt {job['attempts']} failed: {e}")
+            try:
+                permanent = await self.queue.fail(job, self.worker_id, str(e))
+                on_failure = self.failure_handlers.get(job["type"])
+                if permanent and on_failure:
+                    await on_failure(job["payload"], str(e))
+            except Exception as fail_error:
+                logger.error(f"Failure handling for job {job_id} failed: {fail_error}")
+        else:
+            heartbeat.cancel()
+            try:
+                await self.queue.complete(job_id, self.worker_id)
+            except Exception as complete_error:
+                # The lease will expire and the job will be retried
+                logger.error(f"Completing job {job_id} failed: {complete_error}")
+
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -0,0 +1,62 @@
+from typing import Any, List, Optional
+import json
+import re
+
+
+class JSONArrayStreamParser:
+    """Extract complete objects from a JSON array while the document is still streaming.
+
+    Feed text chunks of a JSON object with ``feed``. Every object that closes
+    directly inside the array under ``key`` is parsed and returned as soon as
+    its closing brace arrives, long before the whole document is complete.
+    """
+
+    def __init__(self, key: str):
+        self._key_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self.text = ""
+        self._pos: Optional[int] = None  # scan position once the array has been found
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Append ``chunk`` and return the array items completed by it."""
+        self.text += chunk
+        if self.done:
+            return []
+        if self._pos is None:
+            match = self._key_pattern.search(self.text)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        items = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._item_start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # End of the array itself
+                    self.done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    items.append(json.loads(text[self._item_start:i + 1]))
+                    self._item_start = None
+        self._pos = len(text)
+        return items
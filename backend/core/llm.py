@@ -0,0 +1,243 @@
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+
+import httpx
+import openai
+
+from core.config import settings
+from core.exceptions import BaseAPIException
+from core.telemetry import count_attempt, llm_telemetry
+
+logger = logging.getLogger(__name__)
+
+# Scheduling pools: interactive chat is always served before batch generation
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class LLMCapacityError(BaseAPIException):
+    """No model-call slot became available within the pool's wait budget."""
+
+    def __init__(self, pool: str, waited_seconds: float):
+        super().__init__(
+            detail=f"LLM capacity exhausted: no {pool} slot available after {waited_seconds:.0f}s",
+            status_code=503
+        )
+
+
+class LLMScheduler:
+    """Process-wide admission control for outbound model calls.
+
+    ``capacity`` calls may be in flight at once. Batch calls may never take
+    the last ``interactive_reserved`` slots, and whenever a slot frees up,
+    waiting interactive calls are admitted before waiting batch calls. Each
+    pool has a bounded wait after which the call is rejected with a 503
+    instead of piling up behind the provider's rate limit.
+    """
+
+    def __init__(self, capacity: int, interactive_reserved: int, max_wait_seconds: Dict[str, float]):
+        self.capacity = capacity
+        self.interactive_reserved = min(interactive_reserved, capacity - 1)
+        self.max_wait_seconds = max_wait_seconds
+        self._active = {INTERACTIVE: 0, BATCH: 0}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {INTERACTIVE: deque(), BATCH: deque()}
+        self._rejected = {INTERACTIVE: 0, BATCH: 0}
+
+    def _in_flight(self) -> int:
+        return self._active[INTERACTIVE] + self._active[BATCH]
+
+    def _can_admit(self, pool: str) -> bool:
+        if pool == INTERACTIVE:
+            return self._in_flight() < self.capacity
+        return (
+            not self._waiters[INTERACTIVE]
+            and self._in_flight() < self.capacity - self.interactive_reserved
+        )
+
+    def _wake_waiters(self):
+        for pool in (INTERACTIVE, BATCH):
+            waiters = self._waiters[pool]
+            while waiters and self._can_admit(pool):
+                self._active[pool] += 1
+                waiters.popleft().set_result(True)
+
+    async def acquire(self, pool: str):
+        """Wait for a slot in ``pool`` or raise LLMCapacityError after the pool's max wait."""
+        if not self._waiters[pool] and self._can_admit(pool):
+            self._active[pool] += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[pool].append(waiter)
+        timeout = self.max_wait_seconds[pool]
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Admitted just as the timeout fired; keep the slot
+                return
+            self._waiters[pool].remove(waiter)
+            self._rejected[pool] += 1
+            self._wake_waiters()
+            raise LLMCapacityError(pool, timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release(pool)
+            else:
+                self._waiters[pool].remove(waiter)
+                self._wake_waiters()
+            raise
+
+    def release(self, pool: str):
+        """Release a slot and admit the next waiters in priority order."""
+        self._active[pool] -= 1
+        self._wake_waiters()
+
+    @asynccontextmanager
+    async def slot(self, pool: str):
+        """Hold one model-call slot for the duration of the block."""
+        await self.acquire(pool)
+        try:
+            yield
+        finally:
+            self.release(pool)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current in-flight calls, queue depth and rejections per pool."""
+        return {
+            "capacity": self.capacity,
+            "interactive_reserved": self.interactive_reserved,
+            "pools": {
+                pool: {
+                    "in_flight": self._active[pool],
+                    "queued": len(self._waiters[pool]),
+                    "rejected": self._rejected[pool],
+                    "max_wait_seconds": self.max_wait_seconds[pool]
+                }
+                for pool in (INTERACTIVE, BATCH)
+            }
+        }
+
+
+def usage_tokens(usage: Any) -> Tuple[int, int]:
+    """(prompt, completion) tokens from a Chat Completions or Responses API usage object."""
+    if usage is None:
+        return 0, 0
+    prompt = getattr(usage, "prompt_tokens", None)
+    completion = getattr(usage, "completion_tokens", None)
+    if not isinstance(prompt, int):
+        prompt = getattr(usage, "input_tokens", None)
+        completion = getattr(usage, "output_tokens", None)
+    return (
+        prompt if isinstance(prompt, int) else 0,
+        completion if isinstance(completion, int) else 0
+    )
+
+
+class LLMClient:
+    """Shared async OpenAI client used by every service that calls a model.
+
+    One ``AsyncOpenAI`` instance (and therefore one HTTP connection pool) is
+    created lazily per process, so model calls never block the event loop and
+    timeouts/retries are configured in a single place. Every call goes through
+    the LLMScheduler in the caller's pool (interactive by default), and the
+    prompt/completion tokens the provider reports are recorded per model.
+    Each call is also measured by ``llm_telemetry`` under its ``call_site``
+    name: duration (from slot admission), time to first token for streams,
+    tokens, SDK retries and outcome.
+    """
+
+    def __init__(self):
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self.scheduler = LLMScheduler(
+            capacity=settings.llm_max_concurrency,
+            interactive_reserved=settings.llm_interactive_reserved,
+            max_wait_seconds={
+                INTERACTIVE: settings.llm_interactive_max_wait_seconds,
+                BATCH: settings.llm_batch_max_wait_seconds
+            }
+        )
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """Get the underlying async OpenAI client, creating it on first use."""
+        if self._client is None:
+            if not settings.openai_api_key:
+                logger.warning("OpenAI API key not configured")
+            self._client = openai.AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                timeout=httpx.Timeout(
+                    settings.openai_timeout_seconds,
+                    connect=settings.openai_connect_timeout_seconds
+                ),
+                max_retries=settings.openai_max_retries,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.openai_max_connections,
+                        max_keepalive_connections=settings.openai_max_keepalive_connections
+                    ),
+                    # Every attempt, including SDK retries, is counted against the call in flight
+                    event_hooks={"request": [count_attempt]}
+                )
+            )
+        return self._client
+
+    def record_usage(self, model: str, prompt_tokens: int, completion_tokens: int):
+        """Add one call's token counts to the per-model totals."""
+        totals = self.token_usage.setdefault(model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        totals["calls"] += 1
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        logger.debug(f"LLM call {model}: {prompt_tokens} prompt + {completion_tokens} completion tokens")
+
+    async def chat_completion(self, model: str, messages: List[Dict[str, Any]], pool: str = INTERACTIVE, call_site: str = "unspecified", **kwargs) -> Any:
+        """Create a chat completion and return the raw response."""
+        async with self.scheduler.slot(pool):
+            with llm_telemetry.track(model, call_site) as call:
+                response = await self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+                call.usage(*usage_tokens(getattr(response, "usage", None)))
+        self.record_usage(model, call.prompt_tokens, call.completion_tokens)
+        return response
+
+    async def chat_text(self, model: str, messages: List[Dict[str, Any]], pool: str = INTERACTIVE, call_site: str = "unspecified", **kwargs) -> str:
+        """Create a chat completion and return the first choice's content."""
+        response = await self.chat_completion(model, messages, pool=pool, call_site=call_site, **kwargs)
+        return response.choices[0].message.content
+
+    async def stream_chat_text(self, model: str, messages: List[Dict[str, Any]], pool: str = INTERACTIVE, call_site: str = "unspecified", **kwargs) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive."""
+        # The slot is held until the stream is fully consumed
+        kwargs.setdefault("stream_options", {"include_usage": True})
+        async with self.scheduler.slot(pool):
+            with llm_telemetry.track(model, call_site) as call:
+                stream = await self.client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        call.first_token()
+                        yield chunk.choices[0].delta.content
+                    # The final chunk carries usage for the whole stream
+                    if getattr(chunk, "usage", None) is not None:
+                        call.usage(*usage_tokens(chunk.usage))
+        self.record_usage(model, call.prompt_tokens, call.completion_tokens)
+
+    async def create_response(self, model: str, input: List[Dict[str, Any]], pool: str = INTERACTIVE, call_site: str = "unspecified", **kwargs) -> Any:
+        """Call the Responses API (used for tool calls such as web search)."""
+        async with self.scheduler.slot(pool):
+            with llm_telemetry.track(model, call_site) as call:
+                response = await self.client.responses.create(model=model, input=input, **kwargs)
+                call.usage(*usage_tokens(getattr(response, "usage", None)))
+        self.record_usage(model, call.prompt_tokens, call.completion_tokens)
+        return response
+
+    async def close(self):
+        """Close the underlying HTTP connection pool."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# Global LLM client instance
+llm_client = LLMClient()
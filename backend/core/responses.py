@@ -0,0 +1,27 @@
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import orjson
+
+
+def _default(obj: Any) -> Any:
+    """Serialize the types orjson does not handle natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson for large read payloads.
+
+    Datetimes are serialized natively (ISO 8601, as jsonable_encoder does)
+    and ObjectIds anywhere in the document become strings. Return an
+    instance directly from the route so FastAPI skips ``jsonable_encoder``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,66 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+import json
+import time
+
+from fastapi.responses import StreamingResponse
+
+from core.config import settings
+from core.events import event_bus, wait_for_event
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx/Railway)
+}
+
+
+def format_sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Format a payload as a Server-Sent Events frame."""
+    frame = ""
+    if event:
+        frame += f"event: {event}\n"
+    frame += f"data: {json.dumps(data, default=str)}\n\n"
+    return frame
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an async iterator of SSE frames in a streaming response."""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+TERMINAL_STATUSES = ("completed", "failed", "not_found")
+
+
+def status_recheck_seconds() -> float:
+    """How long a status stream waits for an event before re-reading the database.
+
+    The event bus is per process, so without change streams the job usually
+    publishes in a different worker and the re-check is the delivery path.
+    """
+    if settings.status_change_streams:
+        return settings.status_stream_recheck_seconds
+    return min(settings.status_stream_poll_seconds, settings.status_stream_recheck_seconds)
+
+
+async def status_events(topic: str, fetch_status: Callable[[], Awaitable[Dict[str, Any]]]) -> AsyncIterator[str]:
+    """Push a "status" event on every change until a terminal status is reached.
+
+    The status is re-read when ``topic`` is published on the event bus, and
+    otherwise every ``status_recheck_seconds()`` for writes the bus did not
+    see (e.g. made by a job running in another worker process).
+    """
+    async with event_bus.subscribe(topic) as queue:
+        started = time.monotonic()
+        last_status = None
+        while True:
+            status = await fetch_status()
+            if status != last_status:
+                last_status = status
+                yield format_sse_event(status, event="status")
+            if status.get("status") in TERMINAL_STATUSES:
+                return
+            if time.monotonic() - started > settings.status_stream_max_seconds:
+                yield format_sse_event(status, event="timeout")
+                return
+            if not await wait_for_event(queue, status_recheck_seconds()):
+                yield ": keepalive\n\n"
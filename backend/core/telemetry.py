@@ -0,0 +1,255 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds in seconds; model calls range from sub-second to minutes
+DURATION_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0, 120.0, 300.0)
+TTFT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0)
+
+# USD per million (prompt, completion) tokens; models missing here are reported without a cost
+MODEL_PRICES_PER_MILLION: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+
+# Call in flight in the current task, so the HTTP hook can count its attempts
+_current_call: ContextVar[Optional["LLMCall"]] = ContextVar("llm_current_call", default=None)
+# Per-generation breakdown being collected by ``track_generation``
+_generation_usage: ContextVar[Optional[Dict[str, Dict[str, Any]]]] = ContextVar("llm_generation_usage", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """USD cost of one call from the price table, or None for an unpriced model."""
+    prices = MODEL_PRICES_PER_MILLION.get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count in the Prometheus histogram layout."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (None if empty or beyond the last bucket)."""
+        if not self.count:
+            return None
+        rank = math.ceil(q * self.count)
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+        return None
+
+
+class LLMCall:
+    """Measurements for one model call, filled in by LLMClient while the call runs."""
+
+    def __init__(self, model: str, call_site: str):
+        self.model = model
+        self.call_site = call_site
+        self.started_at = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.attempts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def first_token(self):
+        """Mark the arrival of the first streamed token (later calls are ignored)."""
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def usage(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    @property
+    def retries(self) -> int:
+        """HTTP attempts beyond the first, as made by the SDK's retry loop."""
+        return max(self.attempts - 1, 0)
+
+
+async def count_attempt(request: Any):
+    """httpx request hook: count each HTTP attempt against the call in flight."""
+    call = _current_call.get()
+    if call is not None:
+        call.attempts += 1
+
+
+class LLMTelemetry:
+    """Process-wide latency, token, cost, retry and error metrics per (model, call site).
+
+    ``render_prometheus`` exposes everything in the Prometheus text format so
+    a scraper can aggregate across workers; ``summary`` gives the same data
+    as JSON with approximate percentiles for quick inspection.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.tokens: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.cost: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.retries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.duration: Dict[Tuple[str, str], Histogram] = {}
+        self.ttft: Dict[Tuple[str, str], Histogram] = {}
+
+    @contextmanager
+    def track(self, model: str, call_site: str) -> Iterator[LLMCall]:
+        """Measure one model call for the duration of the block.
+
+        The outcome is ``ok``, ``error`` (the block raised) or ``cancelled``
+        (the caller went away, e.g. a closed stream).
+        """
+        call = LLMCall(model, call_site)
+        token = _current_call.set(call)
+        outcome = "cancelled"
+        try:
+            yield call
+            outcome = "ok"
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            try:
+                _current_call.reset(token)
+            except ValueError:
+                # An abandoned stream may be finalized from another context
+                pass
+            self.record(call, outcome)
+
+    def record(self, call: LLMCall, outcome: str):
+        """Add a finished call to the process metrics and the current generation, if any."""
+        key = (call.model, call.call_site)
+        duration = time.monotonic() - call.started_at
+        cost = estimate_cost(call.model, call.prompt_tokens, call.completion_tokens)
+
+        self.calls[key + (outcome,)] += 1
+        self.tokens[key + ("prompt",)] += call.prompt_tokens
+        self.tokens[key + ("completion",)] += call.completion_tokens
+        self.retries[key] += call.retries
+        if cost is not None:
+            self.cost[key] += cost
+        self.duration.setdefault(key, Histogram(DURATION_BUCKETS)).observe(duration)
+        if call.first_token_at is not None:
+            self.ttft.setdefault(key, Histogram(TTFT_BUCKETS)).observe(call.first_token_at - call.started_at)
+
+        logger.debug(
+            f"LLM call {call.model} [{call.call_site}] {outcome} in {duration:.2f}s: "
+            f"{call.prompt_tokens} prompt + {call.completion_tokens} completion tokens, {call.retries} retries"
+        )
+
+        usage = _generation_usage.get()
+        if usage is not None:
+            site = usage.setdefault(call.call_site, {
+                "model": call.model, "calls": 0, "errors": 0, "retries": 0, "duration_seconds": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0
+            })
+            site["calls"] += 1
+            site["errors"] += outcome == "error"
+            site["retries"] += call.retries
+            site["duration_seconds"] = round(site["duration_seconds"] + duration, 3)
+            site["prompt_tokens"] += call.prompt_tokens
+            site["completion_tokens"] += call.completion_tokens
+            site["cost_usd"] = round(site["cost_usd"] + (cost or 0.0), 6)
+            if call.first_token_at is not None and "ttft_seconds" not in site:
+                site["ttft_seconds"] = round(call.first_token_at - call.started_at, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        """Per (model, call site) totals with p50/p95 latency bucket bounds."""
+        sites: Dict[str, Dict[str, Any]] = {}
+        for (model, call_site), histogram in self.duration.items():
+            ttft = self.ttft.get((model, call_site))
+            sites[f"{model}:{call_site}"] = {
+                "model": model,
+                "call_site": call_site,
+                "calls": {outcome: n for (m, s, outcome), n in self.calls.items() if (m, s) == (model, call_site)},
+                "retries": self.retries[(model, call_site)],
+                "prompt_tokens": self.tokens[(model, call_site, "prompt")],
+                "completion_tokens": self.tokens[(model, call_site, "completion")],
+                "cost_usd": round(self.cost.get((model, call_site), 0.0), 6),
+                "duration_p50_seconds": histogram.quantile(0.5),
+                "duration_p95_seconds": histogram.quantile(0.95),
+                "ttft_p50_seconds": ttft.quantile(0.5) if ttft else None,
+            }
+        return sites
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def labels(**values: str) -> str:
+            escaped = (f'{name}="{_escape(value)}"' for name, value in values.items())
+            return "{" + ",".join(escaped) + "}"
+
+        def counter(name: str, help_text: str, samples: Dict[Tuple, float], label_names: Tuple[str, ...]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(samples.items()):
+                lines.append(f"{name}{labels(**dict(zip(label_names, key)))} {_number(value)}")
+
+        def histogram(name: str, help_text: str, histograms: Dict[Tuple[str, str], Histogram]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (model, call_site), hist in sorted(histograms.items()):
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f"{name}_bucket{labels(model=model, call_site=call_site, le=_number(bound))} {count}")
+                lines.append(f"{name}_bucket{labels(model=model, call_site=call_site, le='+Inf')} {hist.count}")
+                lines.append(f"{name}_sum{labels(model=model, call_site=call_site)} {_number(hist.sum)}")
+                lines.append(f"{name}_count{labels(model=model, call_site=call_site)} {hist.count}")
+
+        site_labels = ("model", "call_site")
+        counter("llm_calls_total", "Model calls by outcome (ok, error, cancelled).",
+                self.calls, site_labels + ("outcome",))
+        counter("llm_retries_total", "HTTP retries made by the OpenAI client.", self.retries, site_labels)
+        counter("llm_tokens_total", "Provider-reported tokens by kind (prompt, completion).",
+                self.tokens, site_labels + ("kind",))
+        counter("llm_cost_usd_total", "Estimated spend from the model price table.", self.cost, site_labels)
+        histogram("llm_call_duration_seconds", "Wall time of a model call, excluding scheduler queueing.", self.duration)
+        histogram("llm_time_to_first_token_seconds", "Time to the first streamed token.", self.ttft)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@contextmanager
+def track_generation() -> Iterator[Dict[str, Dict[str, Any]]]:
+    """Collect a per-call-site breakdown of every model call made inside the block.
+
+    Tasks created inside the block inherit the collector, so concurrent
+    section or link calls are included. The yielded dict is filled in place
+    and is suitable for storing under ``generation_metadata``.
+    """
+    usage: Dict[str, Dict[str, Any]] = {}
+    token = _generation_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _generation_usage.reset(token)
+
+
+# Global telemetry instance
+llm_telemetry = LLMTelemetry()
@@ -0,0 +1,113 @@
+"""
+Token counting and prompt budgeting.
+
+Counts use tiktoken when it is installed and its encoding can be loaded,
+and fall back to a conservative characters-per-token estimate otherwise, so
+budgets hold in either case.
+"""
+from typing import Any, Dict, List, Optional
+from functools import lru_cache
+import logging
+import math
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Fallback estimate; English prose averages ~4 characters per token, 3.5 errs on the safe side
+CHARS_PER_TOKEN = 3.5
+# Per-message framing tokens added by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+ELLIPSIS = "…"
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: Optional[str]):
+    # Cached, including failures, so an unreachable download is attempted once per model
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+        except (KeyError, ValueError):
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; network or disk errors must not break prompt building
+        logger.warning(f"tiktoken encoding unavailable for {model or 'default'}, estimating tokens: {e}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens ``text`` encodes to for ``model``."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    """Prompt tokens for a list of chat messages, including per-message framing."""
+    return sum(
+        count_tokens(str(message.get("content") or ""), model) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, marking the cut with an ellipsis."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _encoding(model)
+    if encoding is None:
+        cut = text[:int((max_tokens - 1) * CHARS_PER_TOKEN)]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens - 1])
+    # Prefer a word boundary when one is close
+    boundary = cut.rfind(" ")
+    if boundary > len(cut) * 0.8:
+        cut = cut[:boundary]
+    return cut.rstrip() + ELLIPSIS
+
+
+def allocate_token_caps(sizes: List[int], budget: int) -> List[int]:
+    """Water-filling allocation: the largest per-item cap whose capped sizes fit ``budget``.
+
+    Items smaller than the cap keep their full size, so short, factual
+    answers survive intact and only the longest ones are trimmed.
+    """
+    if sum(sizes) <= budget:
+        return list(sizes)
+    remaining, cap = budget, 0
+    ordered = sorted(sizes)
+    for i, size in enumerate(ordered):
+        share = remaining // (len(ordered) - i)
+        if size > share:
+            cap = share
+            break
+        remaining -= size
+    else:
+        cap = ordered[-1]
+    return [min(size, cap) for size in sizes]
+
+
+def fit_history(
+    history: List[Dict[str, str]],
+    budget: int,
+    model: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """Drop the oldest messages until the rest fit ``budget`` tokens (the newest is always kept)."""
+    kept, used = [], 0
+    for message in reversed(history):
+        tokens = count_tokens(message.get("content", ""), model) + MESSAGE_OVERHEAD_TOKENS
+        if kept and used + tokens > budget:
+            break
+        kept.append(message)
+        used += tokens
+    return list(reversed(kept))
@@ -1,42 +1,19 @@
 """
 Legacy database module for backward compatibility.
 This module will be deprecated once all imports are updated to use core.database.
-"""
-
-from core.database import db_manager, serialize_doc, serialize_docs
-from core.config import settings
-
-# Legacy compatibility exports
-client = None  # Will be set after connection
-db = None      # Will be set after connection
-
-
-async def initialize_legacy_db():
-    """Initialize legacy database references."""
-    global client, db
-    if db_manager.database is None:
-        await db_manager.connect()
-    client = db_manager.client
-    db = db_manager.database
 
+The connection is opened once by the application startup hook. ``client`` and
+``db`` are resolved on attribute access so importers never capture a stale
+reference; routes should depend on ``get_database`` instead.
+"""
 
-# Ensure database is connected when this module is imported
-import asyncio
-try:
-    loop = asyncio.get_event_loop()
-    if loop.is_running():
-        # If we're in an async context, schedule the initialization
-        asyncio.create_task(initialize_legacy_db())
-    else:
-        # If we're not in an async context, run it
-        loop.run_until_complete(initialize_legacy_db())
-except RuntimeError:
-    # No event loop, will be initialized later
-    pass
+from core.database import db_manager, get_database, serialize_doc, serialize_docs
 
 
-async def get_database():
-    """Legacy function for backward compatibility."""
-    if db_manager.database is None:
-        await db_manager.connect()
-    return db_manager.database
\ No newline at end of file
+def __getattr__(name):
+    """Resolve the legacy ``client`` and ``db`` references lazily."""
+    if name == "client":
+        return db_manager.client
+    if name == "db":
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,29 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from services.ai_service import ai_service
+from services.conversation_memory_service import conversation_memory_service
+from services.recommendation_service import recommendation_service, recommendation_job_key
+from services.profile_service import profile_job_key
 from models import ChatRequest, ConversationCreate, MessageCreate, QuestionResponseCreate
-from database import db, serialize_doc
-from core.database import db_manager
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from core.database import db_manager, get_database, serialize_doc, BaseRepository, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from core.llm import llm_client
+from core.sse import format_sse_event, sse_response
+from core.config import settings
+from core.indexes import ensure_indexes
+from core.jobs import job_queue
+from core.events import event_bus, relay_change_stream
+from worker import build_worker
 from routes.users import router as users_router
 from routes.responses import router as responses_router
 from routes.profiles import router as profiles_router
 from routes.auth import router as auth_router
 from routes.recommendations import router as recommendations_router
+from routes.metrics import router as metrics_router
 from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+import asyncio
 import time
 import os
 from dotenv import load_dotenv
@@ -19,16 +33,48 @@ load_dotenv()
 
 app = FastAPI(title="College Counseling API", version="1.0.0")
 
+conversations_repository = BaseRepository("conversations")
+
+# In-process job worker (disable with JOB_WORKER_INLINE=false when running worker.py separately)
+inline_worker = None
+inline_worker_task = None
+# Change stream relays feeding the event bus (enable with STATUS_CHANGE_STREAMS=true)
+change_stream_tasks = []
+
 # Database initialization
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection on startup."""
+    global inline_worker, inline_worker_task, change_stream_tasks
     await db_manager.connect()
+    await db_manager.prewarm(settings.mongodb_prewarm_connections)
+    await ensure_indexes()
+    await recommendation_service.recommendation_cache.ensure_indexes()
+    await recommendation_service.url_cache.ensure_indexes()
+    await job_queue.ensure_indexes()
+    if settings.job_worker_inline:
+        inline_worker = build_worker()
+        inline_worker_task = asyncio.create_task(inline_worker.run())
+    if settings.status_change_streams:
+        change_stream_tasks = [
+            asyncio.create_task(relay_change_stream(event_bus, "profileGenerations", profile_job_key)),
+            asyncio.create_task(relay_change_stream(event_bus, "recommendations", recommendation_job_key)),
+        ]
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connection on shutdown."""
+    """Close database connection and LLM connection pool on shutdown."""
+    for task in change_stream_tasks:
+        task.cancel()
+    if inline_worker is not None:
+        await inline_worker.stop()
+        try:
+            # Jobs still running after the grace period are cancelled and recovered via their lease
+            await asyncio.wait_for(inline_worker_task, timeout=settings.job_shutdown_grace_seconds)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Job worker still busy after {settings.job_shutdown_grace_seconds}s; leaving in-flight jobs to lease recovery")
     await db_manager.disconnect()
+    await llm_client.close()
 
 # CORS middleware
 app.add_middleware(
@@ -37,6 +83,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
 
 # Include routers
@@ -45,10 +92,11 @@ app.include_router(users_router)
 app.include_router(responses_router)
 app.include_router(profiles_router)
 app.include_router(recommendations_router)
+app.include_router(metrics_router)
 
 # Conversation routes
 @app.post("/conversations")
-async def create_conversation(conversation: ConversationCreate):
+async def create_conversation(conversation: ConversationCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
     try:
         # Generate a numeric ID for consistency with frontend expectations
         numeric_id = int(time.time() * 1000)  # Use timestamp as numeric ID
@@ -73,11 +121,19 @@ async def create_conversation(conversation: ConversationCreate):
         raise HTTPException(status_code=500, detail=f"Failed to create conversation: {str(e)}")
 
 @app.get("/conversations/{user_id}")
-async def get_user_conversations(user_id: str):
+async def get_user_conversations(
+    user_id: str,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
     try:
+        page = await conversations_repository.find_page({"userId": user_id}, limit=limit, after=cursor)
+        if page["next_cursor"]:
+            response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+
         conversations = []
-        async for conversation in db.conversations.find({"userId": user_id}):
-            conversation_data = serialize_doc(conversation)
+        for conversation_data in page["items"]:
             # Use numeric ID if available, otherwise use a generated one
             if "numericId" in conversation_data:
                 conversation_data["id"] = conversation_data["numericId"]
@@ -88,7 +144,7 @@ async def get_user_conversations(user_id: str):
             conversations.append(conversation_data)
         
         # If no conversations exist, return some default ones
-        if not conversations:
+        if not conversations and not cursor:
             conversations = [
                 {
                     "id": 1,
@@ -107,11 +163,13 @@ async def get_user_conversations(user_id: str):
             ]
         
         return conversations
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get conversations: {str(e)}")
 
 @app.post("/messages")
-async def create_message(message: MessageCreate):
+async def create_message(message: MessageCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
     try:
         # Convert conversationId to string for consistent storage
         conversation_id_str = str(message.conversationId)
@@ -124,13 +182,17 @@ async def create_message(message: MessageCreate):
             "timestamp": datetime.now().isoformat()
         }
         
+        # Context for the reply: earlier turns and the conversation owner's profile summary
+        memory = await conversation_memory_service.load(conversation_id_str)
+        student_context = await load_conversation_student_context(db, conversation_id_str)
+        
         user_result = await db.messages.insert_one(user_message_data)
         user_message_data["id"] = str(user_result.inserted_id)
         if "_id" in user_message_data:
             del user_message_data["_id"]
         
         # Generate AI response
-        ai_response_content = await generate_ai_response(message.content)
+        ai_response_content = await generate_ai_response(message.content, memory["recent"], student_context, memory["summary"])
         
         # Create AI message
         ai_message_data = {
@@ -144,6 +206,7 @@ async def create_message(message: MessageCreate):
         ai_message_data["id"] = str(ai_result.inserted_id)
         if "_id" in ai_message_data:
             del ai_message_data["_id"]
+        conversation_memory_service.schedule_summarization(conversation_id_str)
         
         return {
             "userMessage": user_message_data,
@@ -152,8 +215,58 @@ async def create_message(message: MessageCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create message: {str(e)}")
 
+@app.post("/messages/stream")
+async def create_message_stream(message: MessageCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Stream the AI reply as Server-Sent Events, persisting both messages when it completes."""
+    conversation_id_str = str(message.conversationId)
+    try:
+        memory = await conversation_memory_service.load(conversation_id_str)
+        student_context = await load_conversation_student_context(db, conversation_id_str)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create message: {str(e)}")
+
+    async def event_stream():
+        chunks = []
+        try:
+            async for token in stream_ai_response(message.content, memory["recent"], student_context, memory["summary"]):
+                chunks.append(token)
+                yield format_sse_event({"token": token})
+        except Exception as e:
+            yield format_sse_event({"error": str(e)}, event="error")
+            return
+
+        user_message_data = {
+            "conversationId": conversation_id_str,
+            "role": message.role,
+            "content": message.content,
+            "timestamp": datetime.now().isoformat()
+        }
+        ai_message_data = {
+            "conversationId": conversation_id_str,
+            "role": "assistant",
+            "content": "".join(chunks),
+            "timestamp": datetime.now().isoformat()
+        }
+        try:
+            result = await db.messages.insert_many([user_message_data, ai_message_data])
+        except Exception as e:
+            print(f"❌ Failed to save streamed messages for conversation {conversation_id_str}: {e}")
+            yield format_sse_event({"error": f"Failed to save messages: {str(e)}"}, event="error")
+            return
+        for message_data, inserted_id in zip((user_message_data, ai_message_data), result.inserted_ids):
+            message_data.pop("_id", None)
+            message_data["id"] = str(inserted_id)
+        conversation_memory_service.schedule_summarization(conversation_id_str)
+
+        yield format_sse_event({
+            "userMessage": user_message_data,
+            "aiMessage": ai_message_data
+        }, event="done")
+
+    return sse_response(event_stream())
+
 @app.get("/messages/{conversation_id}")
-async def get_conversation_messages(conversation_id: str):
+async def get_conversation_messages(conversation_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     try:
         messages = []
         # Use string comparison instead of converting to int
@@ -178,35 +291,81 @@ async def get_conversation_messages(conversation_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get messages: {str(e)}")
 
-async def generate_ai_response(content: str) -> str:
+async def load_conversation_student_context(db: AsyncIOMotorDatabase, conversation_id: str) -> Optional[str]:
+    """Student context for the user who owns a conversation (addressed by its numeric or ObjectId id)."""
+    if conversation_id.isdigit():
+        query = {"numericId": int(conversation_id)}
+    elif ObjectId.is_valid(conversation_id):
+        query = {"_id": ObjectId(conversation_id)}
+    else:
+        return None
+    conversation = await db.conversations.find_one(query, projection={"userId": 1})
+    if not conversation:
+        return None
+    return await ai_service.get_student_context(conversation["userId"])
+
+async def generate_ai_response(
+    content: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    student_context: Optional[str] = None,
+    conversation_summary: Optional[str] = None
+) -> str:
     """Generate AI response using OpenAI for all cases"""
     try:
         # Check if this is a profile completion context
         if "CONTEXT: You are a helpful college counselor" in content:
             # This is profile completion mode - send the full context to OpenAI
-            response = ai_service.client.chat.completions.create(
+            return await llm_client.chat_text(
                 model="gpt-4o",
+                call_site="profile_completion_chat",
                 messages=[
                     {"role": "system", "content": content},  # Send the full context as system message
                 ],
                 max_tokens=500,
                 temperature=0.7
             )
-            return response.choices[0].message.content
         
         else:
             # For regular chat, use the existing AI service method
             return await ai_service.generate_mentor_response(
                 user_message=content,
-                conversation_history=[],
-                student_profile=None
+                conversation_history=conversation_history or [],
+                student_context=student_context,
+                conversation_summary=conversation_summary
             )
     except Exception as e:
         print(f"AI response generation error: {e}")
         return "I'm here to help you with your college journey! What would you like to know?"
 
+async def stream_ai_response(
+    content: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    student_context: Optional[str] = None,
+    conversation_summary: Optional[str] = None
+):
+    """Streaming counterpart of generate_ai_response."""
+    if "CONTEXT: You are a helpful college counselor" in content:
+        async for token in llm_client.stream_chat_text(
+            model="gpt-4o",
+            call_site="profile_completion_chat",
+            messages=[
+                {"role": "system", "content": content},
+            ],
+            max_tokens=500,
+            temperature=0.7
+        ):
+            yield token
+    else:
+        async for token in ai_service.stream_mentor_response(
+            user_message=content,
+            conversation_history=conversation_history or [],
+            student_context=student_context,
+            conversation_summary=conversation_summary
+        ):
+            yield token
+
 @app.post("/question-responses/")
-async def create_question_response(response: QuestionResponseCreate):
+async def create_question_response(response: QuestionResponseCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
     try:
         response_data = {
             "userId": response.userId,
@@ -224,7 +383,7 @@ async def create_question_response(response: QuestionResponseCreate):
         raise HTTPException(status_code=500, detail=f"Failed to create question response: {str(e)}")
 
 @app.get("/question-responses/{user_id}")
-async def get_user_question_responses(user_id: str, section: str = None):
+async def get_user_question_responses(user_id: str, section: str = None, db: AsyncIOMotorDatabase = Depends(get_database)):
     try:
         query = {"userId": user_id}
         if section:
@@ -239,23 +398,18 @@ async def get_user_question_responses(user_id: str, section: str = None):
 
 # AI-powered routes
 @app.post("/chat")
-async def chat_with_mentor(request: ChatRequest):
+async def chat_with_mentor(request: ChatRequest, db: AsyncIOMotorDatabase = Depends(get_database)):
     try:
-        # Get student profile and conversation history
-        profile = await db.studentProfiles.find_one({"userId": request.userId})
-        
-        conversation_history = []
-        async for message in db.messages.find({"conversationId": request.conversationId}).sort("createdAt", 1):
-            conversation_history.append({
-                "role": message["role"],
-                "content": message["content"]
-            })
+        # Get student context and conversation history
+        student_context = await ai_service.get_student_context(request.userId)
+        memory = await conversation_memory_service.load(request.conversationId)
         
         # Generate AI response
         ai_response = await ai_service.generate_mentor_response(
             user_message=request.message,
-            conversation_history=conversation_history,
-            student_profile=profile
+            conversation_history=memory["recent"],
+            student_context=student_context,
+            conversation_summary=memory["summary"]
         )
         
         # Save user message
@@ -273,11 +427,62 @@ async def chat_with_mentor(request: ChatRequest):
             "content": ai_response,
             "createdAt": datetime.now()
         })
+        conversation_memory_service.schedule_summarization(request.conversationId)
         
         return {"response": ai_response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process chat: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_with_mentor_stream(request: ChatRequest, db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Stream the mentor reply as Server-Sent Events, persisting both messages when it completes."""
+    try:
+        student_context = await ai_service.get_student_context(request.userId)
+        memory = await conversation_memory_service.load(request.conversationId)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process chat: {str(e)}")
+
+    async def event_stream():
+        chunks = []
+        try:
+            async for token in ai_service.stream_mentor_response(
+                user_message=request.message,
+                conversation_history=memory["recent"],
+                student_context=student_context,
+                conversation_summary=memory["summary"]
+            ):
+                chunks.append(token)
+                yield format_sse_event({"token": token})
+        except Exception as e:
+            yield format_sse_event({"error": str(e)}, event="error")
+            return
+
+        ai_response = "".join(chunks)
+        try:
+            await db.messages.insert_many([
+                {
+                    "conversationId": request.conversationId,
+                    "role": "user",
+                    "content": request.message,
+                    "createdAt": datetime.now()
+                },
+                {
+                    "conversationId": request.conversationId,
+                    "role": "assistant",
+                    "content": ai_response,
+                    "createdAt": datetime.now()
+                }
+            ])
+        except Exception as e:
+            print(f"❌ Failed to save streamed chat for conversation {request.conversationId}: {e}")
+            yield format_sse_event({"error": f"Failed to save messages: {str(e)}"}, event="error")
+            return
+        conversation_memory_service.schedule_summarization(request.conversationId)
+
+        yield format_sse_event({"response": ai_response}, event="done")
+
+    return sse_response(event_stream())
+
 @app.get("/")
 async def root():
     return {"message": "College Counseling API is running"}
@@ -79,6 +79,10 @@ class ResponseCreate(BaseModel):
 class ResponseUpdate(BaseModel):
     responses: List[Answer]
 
+class ResponsePatch(BaseModel):
+    responses: List[Answer] = []  # Only the answers that changed
+    removed_question_ids: List[str] = []  # Answers the user cleared
+
 # Conversation models
 class ConversationCreate(BaseModel):
     userId: str
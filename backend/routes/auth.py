@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 from models import UserCreate, UserResponse, LoginRequest
 from core.database import db_manager
 
@@ -32,7 +33,11 @@ async def signup(user: UserCreate):
             "lastLogin": None
         }
         
-        result = await users_collection.insert_one(user_data)
+        try:
+            result = await users_collection.insert_one(user_data)
+        except DuplicateKeyError:
+            # A concurrent signup with the same email won the race
+            raise HTTPException(status_code=400, detail="User with this email already exists")
         
         return UserResponse(
             user_id=user.user_id,
@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from core.database import db_manager
+from core.jobs import job_queue
+from core.llm import llm_client
+from core.telemetry import llm_telemetry
+from services.recommendation_service import recommendation_service
+from services.student_context_service import student_context_service
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/llm")
+async def get_llm_metrics():
+    """In-flight and queued model calls per scheduling pool, and token totals per model, for this process."""
+    return {**llm_client.scheduler.stats(), "tokens": llm_client.token_usage}
+
+@router.get("/llm/calls")
+async def get_llm_call_metrics():
+    """Call counts, tokens, cost, retries and latency percentiles per model and call site."""
+    return llm_telemetry.summary()
+
+@router.get("/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Model-call metrics for this worker process in the Prometheus text format."""
+    return PlainTextResponse(llm_telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """Cache hit/miss counts for this process."""
+    return {
+        "recommendations": recommendation_service.recommendation_cache.stats(),
+        "url_resolution": recommendation_service.url_cache.stats(),
+        "student_context": student_context_service.stats()
+    }
+
+@router.get("/jobs")
+async def get_job_metrics():
+    """Queued and running background jobs across all workers."""
+    return await job_queue.queue_depth()
+
+@router.get("/db")
+async def get_db_metrics():
+    """MongoDB connection pool usage and checkout wait times for this worker process."""
+    return db_manager.pool_metrics()
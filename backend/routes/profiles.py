@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from services.profile_service import profile_service
+from fastapi import APIRouter, HTTPException, Request
+from core.http_cache import cache_headers, document_version, is_not_modified, not_modified
+from core.responses import FastJSONResponse
+from core.sse import sse_response, status_events
+from services.profile_service import profile_service, profile_job_key
 
 router = APIRouter(prefix="/profile", tags=["profiles"])
 
@@ -10,13 +13,23 @@ async def create_profile(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create profile: {str(e)}")
 
-@router.get("/{user_id}")
-async def get_profile(user_id: str):
+@router.get("/{user_id}", response_class=FastJSONResponse)
+async def get_profile(user_id: str, request: Request):
     try:
+        # Revalidation only needs the version fields
+        version = await profile_service.get_latest_profile_version(user_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="No completed profile found")
+        etag, last_modified = document_version(version)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
         profile = await profile_service.get_latest_profile(user_id)
         if not profile:
             raise HTTPException(status_code=404, detail="No completed profile found")
-        return profile
+        return FastJSONResponse(profile, headers=cache_headers(*document_version(profile)))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get profile: {str(e)}")
 
@@ -28,4 +41,12 @@ async def get_profile_status(user_id: str):
             raise HTTPException(status_code=404, detail="No profile generation found")
         return status
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get profile status: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to get profile status: {str(e)}")
+
+@router.get("/{user_id}/status/stream")
+async def stream_profile_status(user_id: str):
+    """Push generation status changes as Server-Sent Events until generation completes or fails"""
+    async def fetch_status():
+        return await profile_service.get_generation_status(user_id) or {"status": "not_found"}
+
+    return sse_response(status_events(profile_job_key(user_id), fetch_status))
@@ -1,34 +1,47 @@
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from pymongo import DESCENDING
 from core.database import BaseRepository
-from services.recommendation_service import recommendation_service
-from datetime import datetime, timedelta
-from typing import Optional
-import asyncio
+from core.jobs import job_queue
+from core.config import settings
+from core.events import event_bus, wait_for_event
+from core.http_cache import VERSION_PROJECTION, cache_headers, document_version, is_not_modified, not_modified
+from core.responses import FastJSONResponse
+from core.sse import format_sse_event, sse_response, status_events, status_recheck_seconds
+from services.recommendation_service import RECOMMENDATION_JOB, recommendation_job_key
+from datetime import datetime
+from typing import AsyncIterator, Dict
+import time
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 recommendations_repository = BaseRepository("recommendations")
 
 GENERATION_DEADLOCK_SECONDS = 180
-GENERATION_GRACE_PERIOD_SECONDS = 30
+
+# Status polling never needs the recommendation payload itself, only its size
+STATUS_PROJECTION = {
+    "status": 1,
+    "updated_at": 1,
+    "error": 1,
+    "generation_metadata": 1,
+    "recommendation_count": {"$size": {"$ifNull": ["$recommendations", []]}}
+}
+
+# The generation job persists each college as it is parsed and publishes on the event bus;
+# the stream endpoint re-reads the document on each event
 
 @router.post("/generate/{user_id}")
 async def create_recommendations(user_id: str):
-    """Start async generation of college recommendations for a user"""
+    """Queue generation of college recommendations for a user"""
     try:
-        # Check if a recent generation is already in progress
-        recent_generating = await recommendations_repository.find_one({
-            "user_id": user_id,
-            "status": "generating",
-            "updated_at": {"$gt": datetime.now() - timedelta(seconds=GENERATION_GRACE_PERIOD_SECONDS)}
-        })
-
-        if recent_generating:
+        # Only one generation job per user may be active at a time
+        active_job = await job_queue.find_active(recommendation_job_key(user_id))
+        if active_job:
             return {
                 "status": "generating",
                 "message": "Recommendation generation already in progress",
-                "recommendation_id": str(recent_generating["_id"]),
-                "updated_at": recent_generating["updated_at"].isoformat()
+                "recommendation_id": active_job["payload"]["recommendation_id"],
+                "updated_at": active_job["updated_at"].isoformat()
             }
 
         now = datetime.now()
@@ -48,12 +61,27 @@ async def create_recommendations(user_id: str):
         created_doc = await recommendations_repository.create(initial_data)
         recommendation_id = created_doc["_id"]
 
-        asyncio.create_task(generate_recommendations_background(user_id, recommendation_id))
+        job = await job_queue.enqueue(
+            RECOMMENDATION_JOB,
+            {"user_id": user_id, "recommendation_id": str(recommendation_id)},
+            dedupe_key=recommendation_job_key(user_id)
+        )
+        if job.get("deduplicated"):
+            # Lost a race with a concurrent request; keep the job that won
+            await recommendations_repository.delete_one({"_id": ObjectId(recommendation_id)})
+            return {
+                "status": "generating",
+                "message": "Recommendation generation already in progress",
+                "recommendation_id": job["payload"]["recommendation_id"],
+                "updated_at": job["updated_at"].isoformat()
+            }
 
+        event_bus.publish(recommendation_job_key(user_id), {"status": "generating"})
         return {
             "status": "generating",
             "message": "Recommendation generation started",
             "recommendation_id": str(recommendation_id),
+            "job_id": job["_id"],
             "started_at": now.isoformat()
         }
 
@@ -62,70 +90,30 @@ async def create_recommendations(user_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to start generation: {str(e)}")
 
 
-async def generate_recommendations_background(user_id: str, recommendation_id: str):
-    try:
-        print(f"🔄 Starting background generation for user: {user_id}")
-
-        await recommendations_repository.update_one(
-            {"_id": ObjectId(recommendation_id)},
-            {"updated_at": datetime.now()}
-        )
-
-        print("📞 Calling generate_full_recommendations")
-        recommendations = await recommendation_service.generate_full_recommendations(user_id)
-        print("✅ Recommendation service returned")
-
-        if not recommendations or not hasattr(recommendations, 'recommendations'):
-            raise ValueError("Invalid or missing recommendation data")
-
-        print(f"📦 Received {len(recommendations.recommendations)} recs")
-        print(recommendation_id)
-        result = await recommendations_repository.update_one(
-            {"_id": ObjectId(recommendation_id)},
-            {
-                "recommendations": [rec.dict() for rec in recommendations.recommendations],
-                "status": "completed",
-                "updated_at": datetime.now(),
-                "generation_metadata": recommendations.generation_metadata
-            }
-        )
-
-        print(f"🧪 Update result: {result}")
-
-        print(f"✅ Background generation completed for user: {user_id}")
-
-    except Exception as e:
-        print(f"❌ Background generation failed: {e}")
-        import traceback
-        print(traceback.format_exc())
-        await recommendations_repository.update_one(
-            {"_id": ObjectId(recommendation_id)},
-            {
-                "status": "failed",
-                "updated_at": datetime.now(),
-                "error": str(e)
-            }
-        )
-
-
-
 @router.get("/{user_id}/status")
 async def get_generation_status(user_id: str):
     """Get the latest generation status"""
     try:
-        docs = await recommendations_repository.find_many({"user_id": user_id})
+        doc = await recommendations_repository.find_one(
+            {"user_id": user_id},
+            projection=STATUS_PROJECTION,
+            sort=[("updated_at", DESCENDING)]
+        )
 
-        if not docs:
+        if not doc:
             return {"status": "not_found", "message": "No recommendations found"}
 
-        doc = max(docs, key=lambda x: x.get("updated_at", datetime.min))
-
         # Deadlock check
         now = datetime.now()
         updated_at = doc.get("updated_at", datetime.min)
         time_diff = now - updated_at
 
-        if doc["status"] == "generating" and time_diff.total_seconds() > GENERATION_DEADLOCK_SECONDS:
+        # Queued or running jobs are recovered by the job queue; only sweep orphaned documents
+        if (
+            doc["status"] == "generating"
+            and time_diff.total_seconds() > GENERATION_DEADLOCK_SECONDS
+            and not await job_queue.find_active(recommendation_job_key(user_id))
+        ):
             await recommendations_repository.update_one(
                 {"_id": ObjectId(doc["_id"])},
                 {
@@ -134,6 +122,7 @@ async def get_generation_status(user_id: str):
                     "error": f"Timed out after {int(time_diff.total_seconds())}s"
                 }
             )
+            event_bus.publish(recommendation_job_key(user_id), {"status": "failed"})
             return {
                 "status": "failed",
                 "error": f"Generation timed out after {int(time_diff.total_seconds())} seconds",
@@ -152,7 +141,7 @@ async def get_generation_status(user_id: str):
 
         if doc["status"] == "completed":
             response["generation_metadata"] = doc.get("generation_metadata", {})
-            response["recommendation_count"] = len(doc.get("recommendations", []))
+            response["recommendation_count"] = doc.get("recommendation_count", 0)
 
         return response
 
@@ -160,28 +149,109 @@ async def get_generation_status(user_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching status: {str(e)}")
 
 
-@router.get("/{user_id}")
-async def get_user_recommendations(user_id: str):
-    """Fetch the latest completed recommendations for a user"""
+async def recommendation_events(user_id: str, recommendation_id: str) -> AsyncIterator[str]:
+    """Yield a "recommendation" event per new or updated college, then "done" once generation ends."""
+    sent: Dict[int, Dict] = {}
+    last_updated = None
+    started = time.monotonic()
+
+    async with event_bus.subscribe(recommendation_job_key(user_id)) as queue:
+        while True:
+            # Only re-read the document once the job has written to it
+            filter_dict = {"_id": ObjectId(recommendation_id)}
+            if last_updated is not None:
+                filter_dict["updated_at"] = {"$gt": last_updated}
+            doc = await recommendations_repository.find_one(
+                filter_dict,
+                projection={"status": 1, "recommendations": 1, "error": 1, "updated_at": 1}
+            )
+
+            if doc is None and last_updated is None:
+                yield format_sse_event({"status": "not_found"}, event="done")
+                return
+
+            if doc is not None:
+                last_updated = doc["updated_at"]
+                for index, item in enumerate(doc.get("recommendations") or []):
+                    if item and sent.get(index) != item:
+                        sent[index] = item
+                        yield format_sse_event({"index": index, "recommendation": item}, event="recommendation")
+
+                if doc["status"] in ("completed", "failed"):
+                    yield format_sse_event(
+                        {"status": doc["status"], "error": doc.get("error"), "recommendation_count": len(sent)},
+                        event="done"
+                    )
+                    return
+
+            if time.monotonic() - started > settings.status_stream_max_seconds:
+                yield format_sse_event({"status": "generating"}, event="timeout")
+                return
+            if not await wait_for_event(queue, status_recheck_seconds()):
+                yield ": keepalive\n\n"
+
+
+@router.get("/{user_id}/stream")
+async def stream_user_recommendations(user_id: str):
+    """Stream the latest generation as Server-Sent Events, one event per college as it lands"""
     try:
-        # Fetch all completed recommendations for the user
-        docs = await recommendations_repository.find_many({
-            "user_id": user_id,
-            "status": "completed"
-        })
+        latest = await recommendations_repository.find_one(
+            {"user_id": user_id},
+            projection={"_id": 1},
+            sort=[("updated_at", DESCENDING)]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching recommendations: {str(e)}")
+
+    if not latest:
+        raise HTTPException(status_code=404, detail="No recommendations found")
+
+    return sse_response(recommendation_events(user_id, latest["_id"]))
 
-        if not docs:
+
+@router.get("/{user_id}/status/stream")
+async def stream_generation_status(user_id: str):
+    """Push generation status changes as Server-Sent Events until generation completes or fails"""
+    return sse_response(status_events(recommendation_job_key(user_id), lambda: get_generation_status(user_id)))
+
+
+@router.get("/{user_id}", response_class=FastJSONResponse)
+async def get_user_recommendations(user_id: str, request: Request):
+    """Fetch the latest completed recommendations for a user (supports If-None-Match / If-Modified-Since)"""
+    try:
+        completed_filter = {"user_id": user_id, "status": "completed"}
+
+        # Revalidation only needs the version fields
+        version = await recommendations_repository.find_one(
+            completed_filter,
+            projection=VERSION_PROJECTION,
+            sort=[("updated_at", DESCENDING)]
+        )
+        if not version:
             raise HTTPException(status_code=404, detail="No completed recommendations found")
+        etag, last_modified = document_version(version)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        # Fetch only the most recently updated completed recommendations
+        latest = await recommendations_repository.find_one(
+            completed_filter,
+            projection={"recommendations": 1, "generation_metadata": 1, "updated_at": 1},
+            sort=[("updated_at", DESCENDING)]
+        )
 
-        # Return the one with the most recent updated_at
-        latest = max(docs, key=lambda x: x.get("updated_at", datetime.min))
+        if not latest:
+            raise HTTPException(status_code=404, detail="No completed recommendations found")
 
-        return {
-            "status": "completed",
-            "recommendations": latest.get("recommendations", []),
-            "generation_metadata": latest.get("generation_metadata", {}),
-            "updated_at": latest["updated_at"].isoformat()
-        }
+        return FastJSONResponse(
+            {
+                "status": "completed",
+                "recommendations": latest.get("recommendations", []),
+                "generation_metadata": latest.get("generation_metadata", {}),
+                "updated_at": latest["updated_at"].isoformat()
+            },
+            headers=cache_headers(*document_version(latest))
+        )
 
     except HTTPException:
         raise
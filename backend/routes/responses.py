@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Query, Request
+from typing import Optional
 
-from models import ResponseCreate, ResponseUpdate
+from models import ResponseCreate, ResponseUpdate, ResponsePatch
 from services.response_service import response_service
+from core.database import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from core.exceptions import NotFoundError
+from core.http_cache import cache_headers, document_version, is_not_modified, not_modified
+from core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/responses", tags=["responses"])
 
@@ -12,16 +16,30 @@ async def create_response(response: ResponseCreate):
     response_data = response.dict()
     return await response_service.create_response(response_data)
 
-@router.get("/user/{user_id}")
-async def get_user_responses(user_id: str):
-    """Get all responses for a user"""
-    return await response_service.get_user_responses(user_id)
+@router.get("/user/{user_id}", response_class=FastJSONResponse)
+async def get_user_responses(
+    user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get a page of responses for a user (next page token in the X-Next-Cursor header)"""
+    page = await response_service.get_user_responses_page(user_id, limit=limit, cursor=cursor)
+    headers = {NEXT_CURSOR_HEADER: page["next_cursor"]} if page["next_cursor"] else None
+    return FastJSONResponse(page["items"], headers=headers)
 
-@router.get("/{user_id}/{form_id}")
-async def get_response(user_id: str, form_id: str):
-    """Get response by user ID and form ID"""
+@router.get("/{user_id}/{form_id}", response_class=FastJSONResponse)
+async def get_response(user_id: str, form_id: str, request: Request):
+    """Get response by user ID and form ID (supports If-None-Match / If-Modified-Since)"""
     try:
-        return await response_service.get_response(user_id, form_id)
+        # Revalidation only needs the version fields
+        version = await response_service.get_response_version(user_id, form_id)
+        if version:
+            etag, last_modified = document_version(version)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+        doc = await response_service.get_response(user_id, form_id)
+        return FastJSONResponse(doc, headers=cache_headers(*document_version(doc)))
     except NotFoundError:
         # Return empty response structure if not found (for frontend compatibility)
         return {
@@ -38,6 +56,16 @@ async def update_response(user_id: str, form_id: str, response_update: ResponseU
     update_data = response_update.dict()
     return await response_service.update_response(user_id, form_id, update_data)
 
+@router.patch("/{user_id}/{form_id}")
+async def patch_response(user_id: str, form_id: str, response_patch: ResponsePatch):
+    """Apply only the changed answers to a response (delta autosave)"""
+    return await response_service.submit_patch(
+        user_id,
+        form_id,
+        [answer.dict() for answer in response_patch.responses],
+        response_patch.removed_question_ids
+    )
+
 @router.delete("/{user_id}/{form_id}")
 async def delete_response(user_id: str, form_id: str):
     """Delete response by user ID and form ID"""
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from datetime import datetime
+from typing import Optional
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import User, UserCreate, UserUpdate, UserResponse
-from database import db, serialize_doc
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from core.database import get_database, serialize_doc, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from services.user_service import user_service
+from services.student_context_service import student_context_service
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("", response_model=UserResponse)
-async def create_user(user: UserCreate):
+async def create_user(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create a new user (called after Firebase auth)"""
     try:
         # Check if user already exists
@@ -29,7 +34,11 @@ async def create_user(user: UserCreate):
             "last_login": None
         }
         
-        result = await db.users.insert_one(user_data)
+        try:
+            result = await db.users.insert_one(user_data)
+        except DuplicateKeyError:
+            # Same user_id or email created concurrently or under another account
+            raise HTTPException(status_code=400, detail="User already exists")
         user_data["_id"] = str(result.inserted_id)
         
         return serialize_doc(user_data)
@@ -39,7 +48,7 @@ async def create_user(user: UserCreate):
         raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: str):
+async def get_user(user_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get user by Firebase UID"""
     try:
         user = await db.users.find_one({"user_id": user_id})
@@ -53,7 +62,7 @@ async def get_user(user_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to get user: {str(e)}")
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: str, user_update: UserUpdate):
+async def update_user(user_id: str, user_update: UserUpdate, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update user by Firebase UID"""
     try:
         # Only include fields that are not None
@@ -75,7 +84,7 @@ async def update_user(user_id: str, user_update: UserUpdate):
         raise HTTPException(status_code=500, detail=f"Failed to update user: {str(e)}")
 
 @router.post("/{user_id}/login")
-async def update_last_login(user_id: str):
+async def update_last_login(user_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update user's last login timestamp"""
     try:
         result = await db.users.update_one(
@@ -91,11 +100,12 @@ async def update_last_login(user_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to update last login: {str(e)}")
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: str):
+async def delete_user(user_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete user by Firebase UID"""
     try:
         # Also delete associated responses
         await db.responses.delete_many({"user_id": user_id})
+        await student_context_service.invalidate(user_id)
         
         result = await db.users.delete_one({"user_id": user_id})
         
@@ -109,10 +119,19 @@ async def delete_user(user_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to delete user: {str(e)}")
 
 @router.get("/role/{role}")
-async def get_users_by_role(role: str):
-    """Get all users by role (student/counselor/parent)"""
+async def get_users_by_role(
+    role: str,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get a page of users by role (student/counselor/parent); next page token in the X-Next-Cursor header"""
     try:
-        users = await db.users.find({"role": role}).to_list(length=None)
-        return [serialize_doc(user) for user in users]
+        page = await user_service.get_users_page_by_role(role, limit=limit, cursor=cursor)
+        if page["next_cursor"]:
+            response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+        return page["items"]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get users by role: {str(e)}")
\ No newline at end of file
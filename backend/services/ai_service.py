@@ -1,55 +1,121 @@
-import openai
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-import json
+from typing import List, Dict, Optional, AsyncIterator
 import logging
 
 from core.config import settings
-from core.exceptions import ExternalServiceError, handle_external_service_error
+from core.exceptions import ExternalServiceError
+from core.llm import llm_client
+from core.tokens import fit_history, truncate_to_tokens
+from services.profile_service import profile_service
+from services.student_context_service import student_context_service
 
 logger = logging.getLogger(__name__)
 
+MENTOR_MODEL = "gpt-4o"
+MENTOR_FALLBACK_RESPONSE = "I'm here to help you with your college journey! What would you like to know?"
+MENTOR_SYSTEM_PROMPT = "You are a helpful college counselor and mentor. Provide personalized advice to help students with their college planning and applications."
+
 
 class AIService:
     """AI service for OpenAI interactions."""
-    
+
     def __init__(self):
-        if not settings.openai_api_key:
-            logger.warning("OpenAI API key not configured")
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
-    
+        self.llm = llm_client
+
+    async def get_student_context(self, user_id: str) -> Optional[str]:
+        """Compact, token-budgeted description of the student for the mentor prompt.
+
+        Uses the cached summary of the latest generated profile, falling back
+        to the student's truncated form answers before a profile exists. A
+        failure only costs personalization, never the chat turn.
+        """
+        try:
+            summary = await profile_service.get_chat_summary(user_id)
+            if summary:
+                return summary
+            context = await student_context_service.get(user_id)
+            if not context["responses"]:
+                return None
+            return truncate_to_tokens(context["text"], settings.chat_profile_max_tokens, MENTOR_MODEL)
+        except Exception as e:
+            logger.warning(f"Student context unavailable for chat: {e}")
+            return None
+
+    def build_mentor_messages(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        student_context: Optional[str] = None,
+        conversation_summary: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages sent to the model for a mentor turn.
+
+        The system prompt and student context come first and are identical
+        across turns, so the provider can reuse its cached prompt prefix. The
+        running summary of older turns follows, then the recent messages.
+        """
+        system_prompt = MENTOR_SYSTEM_PROMPT
+        if student_context:
+            system_prompt += f"\n\nAbout this student (use it to personalize your advice):\n{student_context}"
+        # Build context from conversation history
+        messages = [
+            {"role": "system", "content": system_prompt}
+        ]
+        if conversation_summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{conversation_summary}"})
+
+        # Add the unsummarized messages verbatim, newest first into the token budget
+        recent = fit_history(conversation_history, settings.chat_history_max_tokens, MENTOR_MODEL)
+        for msg in recent:
+            messages.append({"role": msg["role"], "content": msg["content"]})
+
+        # Add current user message
+        messages.append({"role": "user", "content": user_message})
+        return messages
+
     async def generate_mentor_response(
-        self, 
-        user_message: str, 
-        conversation_history: List[Dict[str, str]], 
-        student_profile: Optional[Dict[str, Any]] = None
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        student_context: Optional[str] = None,
+        conversation_summary: Optional[str] = None
     ) -> str:
         """Generate a mentor response using OpenAI."""
         try:
-            # Build context from conversation history
-            messages = [
-                {"role": "system", "content": "You are a helpful college counselor and mentor. Provide personalized advice to help students with their college planning and applications."}
-            ]
-            
-            # Add conversation history
-            for msg in conversation_history[-10:]:  # Keep last 10 messages for context
-                messages.append({"role": msg["role"], "content": msg["content"]})
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            messages = self.build_mentor_messages(user_message, conversation_history, student_context, conversation_summary)
+
+            return await self.llm.chat_text(
+                model=MENTOR_MODEL,
+                call_site="mentor_chat",
                 messages=messages,
                 max_tokens=500,
                 temperature=0.7
             )
-            
-            return response.choices[0].message.content
-            
+
         except Exception as e:
             logger.error(f"AI mentor response generation error: {e}")
-            return "I'm here to help you with your college journey! What would you like to know?"
-    
+            return MENTOR_FALLBACK_RESPONSE
+
+    async def stream_mentor_response(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        student_context: Optional[str] = None,
+        conversation_summary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream a mentor response from OpenAI token by token."""
+        messages = self.build_mentor_messages(user_message, conversation_history, student_context, conversation_summary)
+        try:
+            async for token in self.llm.stream_chat_text(
+                model=MENTOR_MODEL,
+                call_site="mentor_chat",
+                messages=messages,
+                max_tokens=500,
+                temperature=0.7
+            ):
+                yield token
+        except Exception as e:
+            logger.error(f"AI mentor response streaming error: {e}")
+            raise ExternalServiceError("OpenAI", e)
+
 # Global service instance
-ai_service = AIService() 
\ No newline at end of file
+ai_service = AIService()
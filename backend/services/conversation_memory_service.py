@@ -0,0 +1,144 @@
+from typing import Dict, Any, Set
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import logging
+
+from core.config import settings
+from core.database import BaseRepository
+from core.llm import llm_client, BATCH
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain the running memory of a conversation between a student and their college counseling mentor. "
+    "Merge the new messages into the existing summary. Keep the student's goals, facts about them, decisions, "
+    "advice already given and open questions; drop greetings and repetition. Write at most {max_words} words "
+    "of plain prose in the third person."
+)
+
+
+class ConversationMemoryService:
+    """Bounded per-turn chat memory: a stored running summary plus every message after it.
+
+    Each turn reads one summary document and one limited, indexed query for
+    the messages past the summary boundary, however long the conversation
+    grows. Messages that fall out of the recent window are folded into the
+    summary in the background, ``chat_summary_batch_messages`` at a time;
+    until then they are still sent verbatim, so no message is ever in
+    neither the summary nor the prompt.
+    """
+
+    def __init__(self):
+        self.llm = llm_client
+        self.messages_repository = BaseRepository("messages")
+        self.summaries_repository = BaseRepository("conversationSummaries")
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, conversation_id: str) -> Dict[str, Any]:
+        """Return {"summary": str or None, "recent": [{"role", "content"}]} for the next turn.
+
+        ``recent`` holds every message not yet summarized, capped at one window
+        plus one batch (the most a caught-up summarizer leaves behind).
+        """
+        summary_doc = await self.summaries_repository.find_one(
+            {"conversationId": conversation_id},
+            projection={"summary": 1, "summarized_through": 1}
+        )
+        filter_dict = {"conversationId": conversation_id}
+        through = summary_doc.get("summarized_through") if summary_doc else None
+        if through is not None:
+            filter_dict["_id"] = {"$gt": through}
+        recent = await self.messages_repository.find_many(
+            filter_dict,
+            limit=settings.chat_history_messages + settings.chat_summary_batch_messages,
+            sort=[("_id", DESCENDING)],
+            projection={"role": 1, "content": 1}
+        )
+        return {
+            "summary": summary_doc.get("summary") if summary_doc else None,
+            "recent": [{"role": message["role"], "content": message["content"]} for message in reversed(recent)]
+        }
+
+    def schedule_summarization(self, conversation_id: str):
+        """Fold older messages into the summary in the background; at most one run per conversation."""
+        if conversation_id in self._pending:
+            return
+        self._pending.add(conversation_id)
+        task = asyncio.create_task(self._summarize_in_background(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize_in_background(self, conversation_id: str):
+        try:
+            # Catch up in batches when a long conversation has no summary yet
+            while await self.summarize(conversation_id):
+                pass
+        except Exception as e:
+            logger.warning(f"Conversation summarization failed for {conversation_id}: {e}")
+        finally:
+            self._pending.discard(conversation_id)
+
+    async def summarize(self, conversation_id: str) -> bool:
+        """Fold messages older than the recent window into the running summary.
+
+        Reads at most one window plus one batch of messages past the current
+        summary boundary. Returns True when the summary was advanced.
+        """
+        window, batch = settings.chat_history_messages, settings.chat_summary_batch_messages
+        summary_doc = await self.summaries_repository.find_one(
+            {"conversationId": conversation_id},
+            projection={"summary": 1, "summarized_through": 1}
+        )
+        through = summary_doc.get("summarized_through") if summary_doc else None
+        filter_dict = {"conversationId": conversation_id}
+        if through is not None:
+            filter_dict["_id"] = {"$gt": through}
+        pending = await self.messages_repository.find_many(
+            filter_dict,
+            limit=window + batch,
+            sort=[("_id", ASCENDING)],
+            projection={"role": 1, "content": 1}
+        )
+        if len(pending) < window + batch:
+            return False
+
+        to_fold = pending[:len(pending) - window]
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in to_fold)
+        previous_summary = summary_doc.get("summary") if summary_doc else None
+        summary = await self.llm.chat_text(
+            model=SUMMARY_MODEL,
+            pool=BATCH,
+            call_site="conversation_summary",
+            messages=[
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT.format(max_words=settings.chat_summary_max_tokens * 3 // 4)},
+                {"role": "user", "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"}
+            ],
+            max_tokens=settings.chat_summary_max_tokens,
+            temperature=0.2
+        )
+
+        update = {
+            "summary": summary.strip(),
+            "summarized_through": ObjectId(to_fold[-1]["_id"]),
+            "updated_at": datetime.now()
+        }
+        # Only advance from the boundary we read; a concurrent run that got there first wins
+        try:
+            if summary_doc is None:
+                await self.summaries_repository.collection.insert_one({"conversationId": conversation_id, **update})
+                return True
+            return await self.summaries_repository.update_one(
+                {"conversationId": conversation_id, "summarized_through": through},
+                update
+            )
+        except DuplicateKeyError:
+            return False
+
+
+# Global conversation memory service instance
+conversation_memory_service = ConversationMemoryService()
@@ -3,18 +3,168 @@
 import os
 import json
 import asyncio
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
 from bson import ObjectId
-from openai import OpenAI
+from pymongo import DESCENDING
+from core.cache import hash_key
+from core.config import settings
 from core.database import BaseRepository
+from core.events import event_bus
+from core.http_cache import VERSION_PROJECTION, document_version
+from core.jobs import job_queue
+from core.llm import llm_client, BATCH
+from core.telemetry import track_generation
+from core.tokens import count_tokens, truncate_to_tokens
+from services.student_context_service import student_context_service
+
+PROFILE_JOB = "profile.generate"
+PROFILE_GENERATION_TIMEOUT_SECONDS = 180
+# Bump when profile_generation_prompt.txt changes so the next generation rewrites every section
+PROFILE_PROMPT_VERSION = "v1"
+
+# Profile sections in display order (see profile_generation_prompt.txt)
+PROFILE_SECTION_ORDER = [
+    "core_snapshot", "academic_profile", "intellectual_identity", "growth", "extracurriculars",
+    "initiative_and_contribution", "voice_and_expression", "hidden_strengths", "contrasts_and_tensions",
+    "core_values_and_drives", "blind_spots_for_growth", "college_fit", "future_aspiration",
+    "final_insight", "advising_notes", "counselor_letter_themes"
+]
+# Sections that synthesize every form; rewritten whenever any answer changes
+HOLISTIC_SECTIONS = ["core_snapshot", "final_insight"]
+# Sections that draw on the answers of each intake form (form_id -> section_ids)
+FORM_SECTIONS = {
+    "introduction": ["voice_and_expression", "core_values_and_drives", "hidden_strengths"],
+    "academic_information": ["academic_profile", "intellectual_identity", "blind_spots_for_growth", "college_fit", "advising_notes"],
+    "extracurriculars_and_interests": [
+        "extracurriculars", "initiative_and_contribution", "voice_and_expression", "hidden_strengths", "counselor_letter_themes"
+    ],
+    "personal_reflections": [
+        "growth", "hidden_strengths", "contrasts_and_tensions", "core_values_and_drives", "blind_spots_for_growth",
+        "counselor_letter_themes"
+    ],
+    "college_preferences": ["college_fit", "future_aspiration", "advising_notes"]
+}
+# Output budget per rewritten section, capped at the full-profile budget
+SECTION_MAX_TOKENS = 1200
+PROFILE_MAX_TOKENS = 10000
+
+# Independent section groups written concurrently in sectional mode; together they cover PROFILE_SECTION_ORDER
+SECTION_GROUPS = [
+    ["core_snapshot", "future_aspiration", "final_insight"],
+    ["academic_profile", "intellectual_identity", "college_fit"],
+    ["growth", "contrasts_and_tensions", "blind_spots_for_growth"],
+    ["extracurriculars", "initiative_and_contribution", "voice_and_expression"],
+    ["hidden_strengths", "core_values_and_drives"],
+    ["advising_notes", "counselor_letter_themes"]
+]
+
+# Chat summary: placeholder sections are skipped; each section gets an equal share of the token budget
+CHAT_SUMMARY_EXCLUDED_SECTIONS = {"error", "no_data"}
+CHAT_SUMMARY_MIN_SECTION_TOKENS = 50
+
+SECTION_ONLY_INSTRUCTIONS = """
+
+🧩 Sections to write
+Write ONLY these sections: {section_ids}. Other sections are written separately.
+Return a JSON object whose student_profile array contains just those sections, using exactly these section_id values. Omit a section only if the responses do not support it."""
+
+SECTION_UPDATE_INSTRUCTIONS = SECTION_ONLY_INSTRUCTIONS + """
+You are updating an existing profile after the student changed some answers. The previous version of each section is provided; keep the same voice and keep insights that the responses still support."""
+
+
+def profile_job_key(user_id: str) -> str:
+    """De-duplication key allowing one active profile job per user."""
+    return f"profile:{user_id}"
+
+
+def answer_fingerprints(response_docs: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Hash every answer as {form_id: {question_id: hash}} to detect changes between generations."""
+    fingerprints = {}
+    for doc in response_docs:
+        form = fingerprints.setdefault(doc.get("form_id", ""), {})
+        for answer in doc.get("responses", []):
+            form[str(answer.get("question_id", ""))] = hash_key(answer.get("question_text", ""), answer.get("answer", ""))[:16]
+    return fingerprints
+
+
+def changed_answers(
+    previous: Dict[str, Dict[str, str]],
+    current: Dict[str, Dict[str, str]]
+) -> Set[Tuple[str, str]]:
+    """(form_id, question_id) pairs added, edited or removed since the previous fingerprints."""
+    changed = set()
+    for form_id in previous.keys() | current.keys():
+        before, after = previous.get(form_id, {}), current.get(form_id, {})
+        for question_id in before.keys() | after.keys():
+            if before.get(question_id) != after.get(question_id):
+                changed.add((form_id, question_id))
+    return changed
+
+
+def affected_sections(changed: Set[Tuple[str, str]]) -> Optional[List[str]]:
+    """Section ids to rewrite for the changed answers, in display order.
+
+    Returns None when a change touches a form with no section mapping, in
+    which case the whole profile has to be regenerated.
+    """
+    if not changed:
+        return []
+    section_ids = set(HOLISTIC_SECTIONS)
+    for form_id, _ in changed:
+        if form_id not in FORM_SECTIONS:
+            return None
+        section_ids.update(FORM_SECTIONS[form_id])
+    return [section_id for section_id in PROFILE_SECTION_ORDER if section_id in section_ids]
+
+
+def merge_profile_sections(previous: List[Dict[str, Any]], updated: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace sections of the previous profile by section_id, inserting new ones in display order."""
+    replacements = {section.get("section_id"): section for section in updated}
+    previous_ids = {section.get("section_id") for section in previous}
+    merged = [replacements.get(section.get("section_id"), section) for section in previous]
+    merged += [section for section in updated if section.get("section_id") not in previous_ids]
+    order = {section_id: i for i, section_id in enumerate(PROFILE_SECTION_ORDER)}
+    # Stable sort: sections outside the known order keep their relative position at the end
+    return sorted(merged, key=lambda section: order.get(section.get("section_id"), len(order)))
+
+
+def flatten_section_content(content: Any) -> str:
+    """Render paragraph, bullet or table section content as one line of text."""
+    if isinstance(content, list):
+        return "; ".join(flatten_section_content(item) for item in content)
+    if isinstance(content, dict):
+        return "; ".join(f"{key}: {flatten_section_content(value)}" for key, value in content.items())
+    return " ".join(str(content).split())
+
+
+def build_profile_summary(profile_doc: Dict[str, Any], max_tokens: int) -> Optional[str]:
+    """Compact one-line-per-section summary of a generated profile within a token budget."""
+    sections = [
+        section for section in (profile_doc.get("student_profile") or {}).get("student_profile", [])
+        if section.get("section_id") not in CHAT_SUMMARY_EXCLUDED_SECTIONS
+    ]
+    section_tokens = max(CHAT_SUMMARY_MIN_SECTION_TOKENS, max_tokens // max(1, len(sections)))
+    lines, used = [], 0
+    for section in sections:
+        title = section.get("title") or section.get("section_id", "")
+        line = f"- {title}: {truncate_to_tokens(flatten_section_content(section.get('content', '')), section_tokens)}"
+        line_tokens = count_tokens(line) + 1
+        if used + line_tokens > max_tokens:
+            break
+        lines.append(line)
+        used += line_tokens
+    return "\n".join(lines) or None
+
 
 class ProfileService:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.responses_repository = BaseRepository("responses")
+        self.llm = llm_client
         self.profile_generations_repository = BaseRepository("profileGenerations")
         self.profile_prompt = self.load_profile_generation_prompt()
+        # user_id -> (profile ETag, summary), reused until a newer profile completes
+        self._chat_summaries: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
 
     def load_profile_generation_prompt(self) -> str:
         try:
@@ -25,106 +175,197 @@ class ProfileService:
             print(f"❌ Failed to load profile generation prompt: {str(e)}")
             return """You are an expert college counselor creating comprehensive student profiles. Generate a detailed analysis in JSON format with a student_profile array of section objects. Each section should have: section_id, title, type, and content."""
 
-    async def fetch_user_responses_context(self, user_id: str) -> str:
-        try:
-            responses = await self.responses_repository.find_many({"user_id": user_id})
-            if not responses:
-                return "No student profile information available."
-
-            context_parts = ["Student Profile Information:"]
-            for response_doc in responses:
-                form_name = response_doc.get("form_id", "Unknown Form").replace("_", " ").title()
-                context_parts.append(f"\n{form_name}:")
-                for answer in response_doc.get("responses", []):
-                    q, a = answer.get("question_text", ""), answer.get("answer", "")
-                    if q and a:
-                        context_parts.append(f"- {q}: {a}")
-            return "\n".join(context_parts)
+    async def generate_profile(self, context: str) -> Dict[str, Any]:
+        """Write the whole profile. Errors propagate so the job queue can retry and mark the job failed."""
+        if settings.profile_sectional_generation:
+            return {"student_profile": await self.generate_profile_by_sections(context)}
+        raw_content = await self.llm.chat_text(
+            model="gpt-4o",
+            pool=BATCH,
+            call_site="profile",
+            messages=[
+                {"role": "system", "content": self.profile_prompt},
+                {"role": "user", "content": context}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=10000,
+            temperature=0.7
+        )
+        result = json.loads(raw_content)
+        return result if "student_profile" in result else {"student_profile": []}
 
-        except Exception as e:
-            print(f"❌ Error fetching responses: {e}")
-            return "Error retrieving student profile information."
+    async def generate_sections(
+        self,
+        context: str,
+        section_ids: List[str],
+        previous_sections: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Write only ``section_ids``, rewriting their previous versions when given. Errors propagate."""
+        if previous_sections is None:
+            system_prompt = self.profile_prompt + SECTION_ONLY_INSTRUCTIONS.format(section_ids=", ".join(section_ids))
+            user_content = context
+        else:
+            system_prompt = self.profile_prompt + SECTION_UPDATE_INSTRUCTIONS.format(section_ids=", ".join(section_ids))
+            user_content = f"{context}\n\nPrevious versions of these sections:\n{json.dumps(previous_sections, default=str)}"
+        raw_content = await self.llm.chat_text(
+            model="gpt-4o",
+            pool=BATCH,
+            call_site="profile_sections",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=min(PROFILE_MAX_TOKENS, SECTION_MAX_TOKENS * len(section_ids)),
+            temperature=0.7
+        )
+        wanted = set(section_ids)
+        return [
+            section for section in json.loads(raw_content).get("student_profile", [])
+            if isinstance(section, dict) and section.get("section_id") in wanted
+        ]
 
-    async def generate_profile(self, context: str) -> Dict[str, Any]:
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": self.profile_prompt},
-                    {"role": "user", "content": context}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=10000,
-                temperature=0.7
-            )
-            raw_content = response.choices[0].message.content
-            result = json.loads(raw_content)
-            return result if "student_profile" in result else {"student_profile": []}
+    async def generate_profile_by_sections(self, context: str) -> List[Dict[str, Any]]:
+        """Write each section group concurrently and assemble the sections in display order.
 
-        except Exception as e:
-            print(f"❌ Failed to generate profile: {e}")
-            return {
-                "student_profile": [
-                    {
-                        "section_id": "error",
-                        "title": "Profile Generation Error",
-                        "type": "paragraph",
-                        "content": f"Unable to generate profile: {str(e)}"
-                    }
-                ]
-            }
+        Latency approaches that of the slowest group instead of one call
+        emitting every section. Any group failing cancels the rest and raises.
+        """
+        semaphore = asyncio.Semaphore(settings.profile_section_concurrency)
+
+        async def write_group(section_ids: List[str]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.generate_sections(context, section_ids)
 
-    async def _background_profile_generation(self, profile_generation_id: ObjectId, user_id: str):
+        tasks = [asyncio.create_task(write_group(group)) for group in SECTION_GROUPS]
         try:
-            await self.profile_generations_repository.update_one(
-                {"_id": ObjectId(profile_generation_id)},
-                {
-                    "status": "generating",
-                    "updated_at": datetime.utcnow()
-                }
-            )
+            groups = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        print(f"🧩 Generated {sum(len(group) for group in groups)} profile sections in {len(SECTION_GROUPS)} parallel calls")
+        return merge_profile_sections([], [section for group in groups for section in group])
 
-            context = await self.fetch_user_responses_context(user_id)
+    async def get_incremental_base(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Latest completed profile usable as the base for a partial rewrite, if any."""
+        previous = await self.profile_generations_repository.find_one(
+            {"user_id": user_id, "status": "completed", "answer_fingerprints": {"$exists": True}},
+            projection={"student_profile": 1, "answer_fingerprints": 1, "generation_metadata": 1},
+            sort=[("created_at", DESCENDING)]
+        )
+        if not previous or previous.get("generation_metadata", {}).get("prompt_version") != PROFILE_PROMPT_VERSION:
+            return None
+        return previous
 
-            if context.startswith("No"):
-                await self.profile_generations_repository.update_one(
-                    {"_id": ObjectId(profile_generation_id)},
-                    {
-                        "status": "completed",
-                        "student_profile": {
-                            "student_profile": [
-                                {
-                                    "section_id": "no_data",
-                                    "title": "Complete Your Profile",
-                                    "type": "paragraph",
-                                    "content": "No profile data available."
-                                }
-                            ]
-                        },
-                        "updated_at": datetime.utcnow()
+    async def build_profile(self, user_id: str, response_docs: List[Dict[str, Any]], context: str) -> Dict[str, Any]:
+        """Generate the profile, rewriting only the sections affected by changed answers when possible.
+
+        Returns the generation document fields to store: student_profile,
+        answer_fingerprints and metadata. A failed full generation raises.
+        """
+        fingerprints = answer_fingerprints(response_docs)
+        previous = await self.get_incremental_base(user_id)
+        if previous:
+            section_ids = affected_sections(changed_answers(previous["answer_fingerprints"], fingerprints))
+            previous_sections = previous["student_profile"].get("student_profile", [])
+            if section_ids == []:
+                print(f"♻️ No answers changed for {user_id}; reusing the previous profile")
+                return {
+                    "student_profile": previous["student_profile"],
+                    "answer_fingerprints": fingerprints,
+                    "generation_metadata.mode": "unchanged",
+                    "generation_metadata.regenerated_sections": []
+                }
+            if section_ids:
+                try:
+                    updated = await self.generate_sections(
+                        context,
+                        section_ids,
+                        [section for section in previous_sections if section.get("section_id") in section_ids]
+                    )
+                    print(f"🧩 Regenerated {len(updated)}/{len(section_ids)} profile sections for {user_id}")
+                    return {
+                        "student_profile": {"student_profile": merge_profile_sections(previous_sections, updated)},
+                        "answer_fingerprints": fingerprints,
+                        "generation_metadata.mode": "incremental",
+                        "generation_metadata.regenerated_sections": section_ids
                     }
-                )
-                return
+                except Exception as e:
+                    print(f"⚠️ Incremental profile update failed, regenerating in full: {e}")
+
+        profile_data = await self.generate_profile(context)
+        return {
+            "student_profile": profile_data,
+            "answer_fingerprints": fingerprints,
+            "generation_metadata.mode": "sectional" if settings.profile_sectional_generation else "full",
+            "generation_metadata.regenerated_sections": [
+                section.get("section_id") for section in profile_data.get("student_profile", [])
+            ]
+        }
+
+    async def run_generation_job(self, payload: Dict[str, Any]):
+        """Job handler: generate the profile. Errors propagate so the job queue can retry."""
+        profile_generation_id = payload["profile_generation_id"]
+        user_id = payload["user_id"]
 
-            profile_data = await self.generate_profile(context)
+        await self.profile_generations_repository.update_one(
+            {"_id": ObjectId(profile_generation_id)},
+            {
+                "status": "generating",
+                "updated_at": datetime.utcnow()
+            }
+        )
+        event_bus.publish(profile_job_key(user_id), {"status": "generating"})
+
+        student_context = await student_context_service.get(user_id)
+        response_docs, context = student_context["responses"], student_context["text"]
+
+        if not response_docs:
             await self.profile_generations_repository.update_one(
                 {"_id": ObjectId(profile_generation_id)},
                 {
                     "status": "completed",
-                    "student_profile": profile_data,
+                    "student_profile": {
+                        "student_profile": [
+                            {
+                                "section_id": "no_data",
+                                "title": "Complete Your Profile",
+                                "type": "paragraph",
+                                "content": "No profile data available."
+                            }
+                        ]
+                    },
                     "updated_at": datetime.utcnow()
                 }
             )
+            event_bus.publish(profile_job_key(user_id), {"status": "completed"})
+            return
 
-        except Exception as e:
-            await self.profile_generations_repository.update_one(
-                {"_id": ObjectId(profile_generation_id)},
-                {
-                    "status": "failed",
-                    "error": str(e),
-                    "updated_at": datetime.utcnow()
-                }
-            )
+        with track_generation() as llm_usage:
+            profile_fields = await self.build_profile(user_id, response_docs, context)
+        await self.profile_generations_repository.update_one(
+            {"_id": ObjectId(profile_generation_id)},
+            {
+                "status": "completed",
+                **profile_fields,
+                "generation_metadata.llm_usage": llm_usage,
+                "updated_at": datetime.utcnow()
+            }
+        )
+        event_bus.publish(profile_job_key(user_id), {"status": "completed"})
+
+    async def mark_generation_failed(self, payload: Dict[str, Any], error: str):
+        """Job failure hook: record the final error once all retries are exhausted."""
+        await self.profile_generations_repository.update_one(
+            {"_id": ObjectId(payload["profile_generation_id"])},
+            {
+                "status": "failed",
+                "error": error,
+                "updated_at": datetime.utcnow()
+            }
+        )
+        event_bus.publish(profile_job_key(payload["user_id"]), {"status": "failed"})
 
     async def create_profile_generation(self, user_id: str) -> Dict[str, Any]:
         try:
@@ -138,12 +379,28 @@ class ProfileService:
                 "generation_metadata": {
                     "context_source": "user_responses",
                     "model": "gpt-4o",
-                    "prompt_version": "v1",
+                    "prompt_version": PROFILE_PROMPT_VERSION,
                     "generated_at": now.isoformat()
                 }
             }
+            active_job = await job_queue.find_active(profile_job_key(user_id))
+            if active_job:
+                existing = await self.profile_generations_repository.find_by_id(active_job["payload"]["profile_generation_id"])
+                if existing:
+                    return existing
+
             created = await self.profile_generations_repository.create(record)
-            asyncio.create_task(self._background_profile_generation(created["_id"], user_id))
+            job = await job_queue.enqueue(
+                PROFILE_JOB,
+                {"user_id": user_id, "profile_generation_id": created["_id"]},
+                dedupe_key=profile_job_key(user_id)
+            )
+            if job.get("deduplicated"):
+                # Lost a race with a concurrent request; keep the job that won
+                await self.profile_generations_repository.delete_one({"_id": ObjectId(created["_id"])})
+                existing = await self.profile_generations_repository.find_by_id(job["payload"]["profile_generation_id"])
+                return existing or created
+            event_bus.publish(profile_job_key(user_id), {"status": "generating"})
             return created
 
         except Exception as e:
@@ -151,12 +408,20 @@ class ProfileService:
 
     async def get_generation_status(self, user_id: str) -> Optional[Dict[str, Any]]:
         try:
-            generations = await self.profile_generations_repository.find_many({"user_id": user_id})
-            if not generations:
+            latest = await self.profile_generations_repository.find_one(
+                {"user_id": user_id},
+                projection={"status": 1, "created_at": 1, "updated_at": 1, "error": 1},
+                sort=[("created_at", DESCENDING)]
+            )
+            if not latest:
                 return None
 
-            latest = max(generations, key=lambda x: x.get("created_at", datetime.min))
-            if latest["status"] == "generating" and (datetime.utcnow() - latest["created_at"]).total_seconds() > 180:
+            # Queued or running jobs are recovered by the job queue; only sweep orphaned documents
+            if (
+                latest["status"] == "generating"
+                and (datetime.utcnow() - latest["created_at"]).total_seconds() > PROFILE_GENERATION_TIMEOUT_SECONDS
+                and not await job_queue.find_active(profile_job_key(user_id))
+            ):
                 await self.profile_generations_repository.update_one(
                     {"_id": ObjectId(latest["_id"])},
                     {
@@ -166,6 +431,7 @@ class ProfileService:
                     }
                 )
                 latest["status"] = "failed"
+                event_bus.publish(profile_job_key(user_id), {"status": "failed"})
             return {
                 "status": latest["status"],
                 "created_at": latest.get("created_at"),
@@ -179,18 +445,58 @@ class ProfileService:
 
     async def get_latest_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         try:
-            completed = await self.profile_generations_repository.find_many({"user_id": user_id, "status": "completed"})
-            if not completed:
-                return None
-            return max(completed, key=lambda x: x.get("created_at", datetime.min))
+            return await self.profile_generations_repository.find_one(
+                {"user_id": user_id, "status": "completed"},
+                sort=[("created_at", DESCENDING)]
+            )
         except Exception as e:
             raise Exception(f"Failed to get latest profile: {str(e)}")
 
+    async def get_latest_profile_version(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Same lookup as get_latest_profile, returning only _id and updated_at for conditional GETs."""
+        try:
+            return await self.profile_generations_repository.find_one(
+                {"user_id": user_id, "status": "completed"},
+                projection=VERSION_PROJECTION,
+                sort=[("created_at", DESCENDING)]
+            )
+        except Exception as e:
+            raise Exception(f"Failed to get latest profile: {str(e)}")
+
+    async def get_chat_summary(self, user_id: str) -> Optional[str]:
+        """Compact summary of the latest completed profile for the mentor chat prompt.
+
+        Cached per user and keyed by the profile version, so every turn sends
+        the same text (a stable, provider-cacheable prompt prefix) until a new
+        profile completes.
+        """
+        version = await self.get_latest_profile_version(user_id)
+        if not version:
+            return None
+        etag, _ = document_version(version)
+        cached = self._chat_summaries.get(user_id)
+        if cached and cached[0] == etag:
+            self._chat_summaries.move_to_end(user_id)
+            return cached[1]
+
+        profile = await self.profile_generations_repository.find_one(
+            {"_id": ObjectId(version["_id"])},
+            projection={"student_profile": 1}
+        )
+        summary = build_profile_summary(profile or {}, settings.chat_profile_max_tokens)
+        self._chat_summaries[user_id] = (etag, summary)
+        while len(self._chat_summaries) > settings.student_context_cache_size:
+            self._chat_summaries.popitem(last=False)
+        return summary
+
     async def get_profile_history(self, user_id: str, skip: int = 0, limit: int = 10) -> list:
         try:
-            history = await self.profile_generations_repository.find_many({"user_id": user_id})
-            sorted_history = sorted(history, key=lambda x: x.get("created_at", datetime.min), reverse=True)
-            return sorted_history[skip:skip+limit]
+            return await self.profile_generations_repository.find_many(
+                {"user_id": user_id},
+                limit=limit,
+                sort=[("created_at", DESCENDING)],
+                skip=skip
+            )
         except Exception as e:
             raise Exception(f"Failed to get profile history: {str(e)}")
 
@@ -1,7 +1,8 @@
 import os
+import re
 import json
-import openai
-from typing import Dict, List, Optional
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from models import (
     CollegeRecommendations, 
     CollegeRecommendationItem, 
@@ -9,54 +10,76 @@ from models import (
     SchoolFit
 )
 from datetime import datetime
+from bson import ObjectId
 from core.database import BaseRepository
+from core.cache import CacheRepository, hash_key
+from core.config import settings
+from core.events import event_bus
+from core.llm import llm_client, BATCH
+from core.json_stream import JSONArrayStreamParser
+from core.telemetry import track_generation
+from core.tokens import count_tokens
+from services.student_context_service import student_context_service
+
+RECOMMENDATION_MODEL = "gpt-4o-mini"
+WEB_SEARCH_MODEL = "gpt-4.1"
+
+# Structured output for the web search step: {"links": [{"title", "url"}]}
+OPPORTUNITY_LINKS_SCHEMA = {
+    "type": "json_schema",
+    "name": "opportunity_links",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "links": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "url": {"type": "string"}
+                    },
+                    "required": ["title", "url"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["links"],
+        "additionalProperties": False
+    }
+}
+
+RECOMMENDATION_JOB = "recommendations.generate"
+
+# Called with (index, college object) as generation progresses
+CollegeCallback = Callable[[int, Dict], Awaitable[None]]
+
+
+def recommendation_job_key(user_id: str) -> str:
+    """De-duplication key allowing one active recommendation job per user."""
+    return f"recommendations:{user_id}"
+
+
+def normalize_search_query(query: str) -> str:
+    """URL cache key for a search query: lowercase words, ignoring punctuation and spacing."""
+    return " ".join(re.findall(r"[a-z0-9]+", query.lower()))
 
 class RecommendationService:
     def __init__(self):
-        
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.responses_repository = BaseRepository("responses")
-        
-    async def fetch_user_responses_context(self, user_id: str) -> str:
-        """
-        Fetch all user responses and format them into a context string for the LLM
-        """
-        try:
-            print(f"🔍 Fetching user responses for user_id: {user_id}")
-            # Fetch all responses for the user using BaseRepository
-            responses = await self.responses_repository.find_many({"user_id": user_id})
-            
-            print(f"📊 Found {len(responses)} response documents")
-            
-            if not responses:
-                print("⚠️  No responses found, returning default message")
-                return "No student profile information available."
-            
-            # Format responses into a readable context
-            context_parts = ["Student Profile Information:\n"]
-            
-            for response_doc in responses:
-                form_id = response_doc.get("form_id", "Unknown Form")
-                # Convert form_id back to readable format
-                form_name = form_id.replace("_", " ").title()
-                context_parts.append(f"\n{form_name}:")
-                
-                answers = response_doc.get("responses", [])
-                print(f"📝 Form '{form_name}' has {len(answers)} answers")
-                for answer in answers:
-                    question_text = answer.get("question_text", "")
-                    answer_text = answer.get("answer", "")
-                    if question_text and answer_text:
-                        context_parts.append(f"- {question_text}: {answer_text}")
-            
-            final_context = "\n".join(context_parts)
-            print(f"📄 Generated context length: {len(final_context)} characters")
-            print(f"📄 Context preview: {final_context[:200]}...")
-            return final_context
-            
-        except Exception as e:
-            print(f"❌ Error fetching user responses: {e}")
-            return "Error retrieving student profile information."
+        self.llm = llm_client
+        self.recommendations_repository = BaseRepository("recommendations")
+        self.recommendation_cache = CacheRepository(
+            "recommendationCache",
+            ttl_seconds=settings.recommendation_cache_ttl_seconds,
+            max_entries=settings.recommendation_cache_max_entries
+        )
+        # Normalized search_query -> {"url": ...}; shared by every student's generations
+        self.url_cache = CacheRepository(
+            "urlResolutionCache",
+            ttl_seconds=settings.url_cache_ttl_seconds,
+            max_entries=settings.url_cache_max_entries
+        )
         
     def load_college_recs_prompt(self) -> str:
         """Load the college recommendations prompt from file"""
@@ -122,17 +145,22 @@ class RecommendationService:
             Prioritize .edu domains and original school websites.
             """
 
-    async def generate_recommendations(self, context: str) -> Dict:
+    async def stream_recommendations(self, context: str) -> AsyncIterator[Dict]:
         """
-        Step 1: Generate college recommendations using the college_recs_prompt
-        Returns the JSON structure with search_query fields
+        Step 1: Generate college recommendations using the college_recs_prompt, streamed
+        Yields each college object (with search_query fields) as soon as the model finishes writing it
         """
         try:
             print("🤖 Loading college recommendations prompt...")
             college_prompt = self.load_college_recs_prompt()
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            print(f"📏 Prompt tokens: system={count_tokens(college_prompt, RECOMMENDATION_MODEL)}, context={count_tokens(context, RECOMMENDATION_MODEL)}")
+            parser = JSONArrayStreamParser("recommendations")
+            yielded = 0
+
+            async for token in self.llm.stream_chat_text(
+                model=RECOMMENDATION_MODEL,
+                pool=BATCH,
+                call_site="recommendations",
                 messages=[
                     {
                         "role": "system", 
@@ -146,188 +174,152 @@ class RecommendationService:
                 response_format={"type": "json_object"},
                 max_tokens=10000,
                 temperature=0.7
-            )
-            
-            print("✅ Received response from OpenAI")
-            raw_content = response.choices[0].message.content
-            print(f"📄 Raw OpenAI response length: {len(raw_content)} characters")
-            print(f"📄 Raw response preview: {raw_content[:500]}...")
-            
-            result = json.loads(raw_content)
-            print(f"🎯 Parsed JSON successfully, found {len(result.get('recommendations', []))} recommendations")
-            
-            return result
-            
+            ):
+                for rec_data in parser.feed(token):
+                    yielded += 1
+                    print(f"🎯 Streamed recommendation {yielded}: {rec_data.get('name', '')}")
+                    yield rec_data
+
+            print(f"✅ Stream finished: {len(parser.text)} characters")
+            if not yielded:
+                # The array was not where the parser expected it; fall back to the whole document
+                for rec_data in json.loads(parser.text).get("recommendations", []):
+                    yield rec_data
+
         except Exception as e:
             print(f"❌ Failed to generate recommendations: {str(e)}")
             raise Exception(f"Failed to generate recommendations: {str(e)}")
 
-    async def format_as_json_list(self, web_search_output: str) -> List[Dict]:
+    async def search_college_links(self, college_name: str, opportunities: List[Dict], web_search_prompt: str) -> List[Dict]:
         """
-        Format web search output as a JSON list of {title, url} pairs
+        Resolve one college's opportunities to URLs with a single web search call.
+        The response is constrained to OPPORTUNITY_LINKS_SCHEMA, so it parses directly as JSON.
         """
-        try:
-            print("🔧 Formatting web search output as JSON list...")
-            print(f"📄 Input web_search_output: {web_search_output}")
-            
-            # First, try to parse the output directly as JSON
-            try:
-                parsed_output = json.loads(web_search_output)
-                print(f"📄 Successfully parsed web search output as JSON: {type(parsed_output)}")
-                
-                # If it's already a dict with 'data' field, extract the data
-                if isinstance(parsed_output, dict) and 'data' in parsed_output:
-                    data_list = parsed_output['data']
-                    print(f"📄 Extracted data list with {len(data_list)} items")
-                    return data_list
-                # If it's already a list, return it directly
-                elif isinstance(parsed_output, list):
-                    print(f"📄 Output is already a list with {len(parsed_output)} items")
-                    return parsed_output
-            except json.JSONDecodeError:
-                print("📄 Web search output is not valid JSON, using GPT to format...")
-            
-            # If direct parsing fails, use GPT to format it
-            json_format_prompt = """
-            You are a JSON formatting assistant. Take the provided text and convert it to a valid JSON array.
-            Do not exclude any information or include any additional information.
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": json_format_prompt
-                    },
-                    {
-                        "role": "user", 
-                        "content": web_search_output
-                    }
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=3000,
-                temperature=0.1
-            )
-            
-            print("✅ Received JSON formatting response from OpenAI")
-            raw_content = response.choices[0].message.content
-            print(f"📄 JSON formatted response length: {len(raw_content)} characters")
-            
-            # Parse the JSON - it might be wrapped in an object
-            parsed = json.loads(raw_content)
-            print(f"📄 Parsed GPT response: {type(parsed)}")
-            
-            # If GPT wrapped it in an object, try to extract the array
-            if isinstance(parsed, dict):
-                # Look for common keys that might contain the array
-                for key in ['data', 'results', 'items', 'list']:
-                    if key in parsed and isinstance(parsed[key], list):
-                        print(f"📄 Found array in '{key}' field")
-                        return parsed[key]
-                # If no standard key found, return the first list value
-                for value in parsed.values():
-                    if isinstance(value, list):
-                        print(f"📄 Found first list value")
-                        return value
-            
-            # If it's already a list, return it
-            if isinstance(parsed, list):
-                return parsed
-            
-            # Fallback: return empty list
-            print("⚠️ Could not extract list from parsed response, returning empty list")
-            return []
-            
-        except Exception as e:
-            print(f"❌ Failed to format as JSON list: {str(e)}")
-            raise Exception(f"Failed to format as JSON list: {str(e)}")
+        opportunities_json_str = json.dumps({"college": college_name, "opportunities": opportunities}, indent=2)
+        print(f"📤 Web searching {len(opportunities)} opportunities for {college_name}")
 
-    async def fetch_links_with_web_search(self, recommendations_json: Dict) -> Dict:
+        response = await self.llm.create_response(
+            model=WEB_SEARCH_MODEL,
+            pool=BATCH,
+            call_site="college_links",
+            input=[
+                {
+                    "role": "system",
+                    "content": web_search_prompt
+                },
+                {
+                    "role": "user",
+                    "content": opportunities_json_str
+                }
+            ],
+            tools=[{
+                "type": "web_search_preview",
+                "search_context_size": "medium"
+            }],
+            tool_choice={"type": "web_search_preview"},
+            text={"format": OPPORTUNITY_LINKS_SCHEMA}
+        )
+
+        links = json.loads(response.output_text).get("links", [])
+        print(f"✅ Received {len(links)} links for {college_name}")
+        return links
+
+    async def fetch_links_with_web_search(self, recommendations_json: Dict, semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
         """
-        Step 2: Extract distinctive opportunities, use web search to get URLs, and replace in-place
-        
+        Step 2: Resolve distinctive opportunity search queries to URLs, one web search per college
+
         This method performs:
-        1. Extract all distinctive_opportunities with search_query fields
-        2. Send just the list of {title, search_query} to web search
-        3. Get back {title, url} pairs
-        4. Replace search_query fields in-place in the original JSON
+        1. Group distinctive_opportunities with search_query fields by college
+        2. Search every college concurrently (at most settings.web_search_concurrency at once)
+        3. Replace search_query fields in-place with each college's {title, url} results
+
+        A college whose search fails keeps its original URLs; the other colleges are unaffected.
+        Pass ``semaphore`` to share the concurrency cap across calls for the same generation.
         """
+        web_search_prompt = self.load_web_search_prompt()
+        # Keep original dict for modification
+        result_json = recommendations_json.copy()
+
+        # Step 1: Look every search query up in the URL cache
+        cached_urls = await self._get_cached_urls([
+            normalize_search_query(opp["search_query"])
+            for rec in result_json.get("recommendations", [])
+            for opp in rec.get("distinctive_opportunities", [])
+            if "search_query" in opp
+        ])
+
+        # Step 2: Group the cache misses by college
+        shards = []
+        for rec in result_json.get("recommendations", []):
+            opportunities = [
+                {"title": opp.get("title", ""), "search_query": opp.get("search_query", "")}
+                for opp in rec.get("distinctive_opportunities", [])
+                if "search_query" in opp and normalize_search_query(opp["search_query"]) not in cached_urls
+            ]
+            if opportunities:
+                shards.append((rec, opportunities))
+
+        print(f"🔍 {len(cached_urls)} search queries served from cache, {sum(len(opps) for _, opps in shards)} to search for across {len(shards)} colleges")
+
+        # Step 3: Fan out one search per college under the concurrency cap
+        semaphore = semaphore or asyncio.Semaphore(settings.web_search_concurrency)
+
+        async def search_shard(rec: Dict, opportunities: List[Dict]) -> Optional[List[Dict]]:
+            async with semaphore:
+                try:
+                    return await self.search_college_links(rec.get("name", ""), opportunities, web_search_prompt)
+                except Exception as e:
+                    print(f"⚠️ Web search failed for {rec.get('name', '')}: {e}")
+                    return None
+
+        shard_results = await asyncio.gather(*(search_shard(rec, opps) for rec, opps in shards))
+        results_by_college = {id(rec): url_results for (rec, _), url_results in zip(shards, shard_results)}
+
+        # Step 4: Replace search_query fields in-place, matching titles within each college
+        resolved_urls = {}
+        for rec in result_json.get("recommendations", []):
+            resolved_urls.update(self._replace_search_queries_with_urls(
+                {"recommendations": [rec]},
+                results_by_college.get(id(rec)),
+                cached_urls
+            ))
+
+        await self._set_cached_urls(resolved_urls)
+
+        print("✅ Successfully replaced search queries with URLs in-place")
+        return result_json
+
+    async def _get_cached_urls(self, queries: List[str]) -> Dict[str, Dict]:
+        """Look up resolved search queries; cache failures fall through to web search."""
         try:
-            web_search_prompt = self.load_web_search_prompt()
-            # Keep original dict for modification
-            result_json = recommendations_json.copy()
-            
-            # Step 1: Extract all distinctive opportunities with search_query
-            opportunities_to_search = []
-            for rec in result_json.get("recommendations", []):
-                for opp in rec.get("distinctive_opportunities", []):
-                    if "search_query" in opp:
-                        opportunities_to_search.append({
-                            "title": opp.get("title", ""),
-                            "search_query": opp.get("search_query", "")
-                        })
-            
-            print(f"🔍 Found {len(opportunities_to_search)} opportunities to search for")
-            
-            if not opportunities_to_search:
-                print("ℹ️ No opportunities with search_query found, returning original")
-                return result_json
-            
-            # Step 2: Send just the opportunities list to web search
-            opportunities_json_str = json.dumps(opportunities_to_search, indent=2)
-            print(f"📤 Sending opportunities to web search: {opportunities_json_str[:200]}...")
-            
-            response = self.client.responses.create(
-                model="gpt-4.1",
-                input=[
-                    {
-                        "role": "system",
-                        "content": web_search_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": opportunities_json_str
-                    }
-                ],
-                tools=[{
-                    "type": "web_search_preview",
-                    "search_context_size": "medium"
-                }],
-                tool_choice={"type": "web_search_preview"}
-            )
-            
-            print("✅ Received response from OpenAI with web search")
-            
-            # Step 3: Format the web search output as JSON list of {title, url}
-            output_text = response.output_text
-            print(output_text)
-            
-            try:
-                url_results = await self.format_as_json_list(output_text)
-                print(f"✅ Successfully formatted {len(url_results)} URL results")
-            except Exception as e:
-                print(f"⚠️ Failed to format web search output as JSON: {e}")
-      
-            
-            # Step 4: Replace search_query fields in-place with URLs
-            self._replace_search_queries_with_urls(result_json, url_results)
-            
-            print("✅ Successfully replaced search queries with URLs in-place")
-            return result_json
-            
+            return await self.url_cache.get_many(queries)
         except Exception as e:
-            print(f"❌ Failed to fetch links with web search: {str(e)}")
-            # If web search fails, return original with search_query fields removed but keeping original URLs
-            for rec in recommendations_json.get("recommendations", []):
-                for opp in rec.get("distinctive_opportunities", []):
-                    if "search_query" in opp:
-                        del opp["search_query"]  # Just remove search_query, keep original URL
-            return recommendations_json
+            print(f"⚠️ URL cache lookup failed: {e}")
+            return {}
 
+    async def _set_cached_urls(self, resolved_urls: Dict[str, Dict]):
+        """Cache web search outcomes; queries without a match are cached with a shorter TTL."""
+        try:
+            await self.url_cache.set_many({query: value for query, value in resolved_urls.items() if value["url"]})
+            await self.url_cache.set_many(
+                {query: value for query, value in resolved_urls.items() if not value["url"]},
+                ttl_seconds=settings.url_cache_negative_ttl_seconds
+            )
+        except Exception as e:
+            print(f"⚠️ URL cache write failed: {e}")
 
-    def _replace_search_queries_with_urls(self, recommendations_json: Dict, url_results: List[Dict]):
-        """Replace search_query fields with actual URLs from web search results, using original URL as fallback"""
+    def _replace_search_queries_with_urls(
+        self,
+        recommendations_json: Dict,
+        url_results: Optional[List[Dict]],
+        cached_urls: Optional[Dict[str, Dict]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Replace search_query fields with URLs from the URL cache or web search results, using original URL as fallback.
+        ``url_results`` is None when the web search failed. Returns ``{normalized query: {"url": url or None}}``
+        for every uncached query the web search answered, ready to be written to the URL cache.
+        """
+        cached_urls = cached_urls or {}
         print(f"🔍 Debug: url_results type: {type(url_results)}")
         print(f"🔍 Debug: url_results length: {len(url_results) if url_results else 0}")
         if url_results:
@@ -336,7 +328,7 @@ class RecommendationService:
         
         # Create a mapping from title to URL for quick lookup
         title_to_url = {}
-        for i, result in enumerate(url_results):
+        for i, result in enumerate(url_results or []):
             try:
                 # Handle case where result might be a string or other type
                 if isinstance(result, dict):
@@ -358,12 +350,25 @@ class RecommendationService:
         print(f"📋 Created URL mapping for {len(title_to_url)} titles")
         
         # Replace search_query fields with URLs, using original URL as fallback
+        resolved_urls = {}
         for rec in recommendations_json.get("recommendations", []):
             for opp in rec.get("distinctive_opportunities", []):
                 if "search_query" in opp:
                     title = opp.get("title", "").strip()
                     original_url = opp.get("url")  # Store original URL from first LLM
-                    
+                    query = normalize_search_query(opp["search_query"])
+
+                    if query in cached_urls:
+                        # Resolved by an earlier generation (a cached None means no match was found)
+                        if cached_urls[query].get("url"):
+                            opp["url"] = cached_urls[query]["url"]
+                            print(f"⚡ Cached '{title}' -> {opp['url']}")
+                        del opp["search_query"]
+                        continue
+
+                    if url_results is not None:
+                        resolved_urls[query] = {"url": title_to_url.get(title)}
+
                     if title in title_to_url:
                         # Use web search result if found
                         opp["url"] = title_to_url[title]
@@ -375,52 +380,55 @@ class RecommendationService:
 
                     del opp["search_query"]
 
+        return resolved_urls
+
+    def parse_recommendation_item(self, rec_data: Dict) -> CollegeRecommendationItem:
+        """Convert one college object from the model to a CollegeRecommendationItem"""
+        # Parse distinctive opportunities
+        opportunities = []
+        for opp_data in rec_data.get("distinctive_opportunities", []):
+            opportunities.append(DistinctiveOpportunity(
+                title=opp_data.get("title", ""),
+                description=opp_data.get("description", ""),
+                url=opp_data.get("url"),
+                search_query=opp_data.get("search_query")
+            ))
+        
+        # Parse school fit
+        fit_data = rec_data.get("fit", {})
+        school_fit = SchoolFit(
+            academic=fit_data.get("academic", "Good"),
+            social_cultural=fit_data.get("social_cultural", "Good"),
+            financial=fit_data.get("financial", "Good")
+        )
+        
+        return CollegeRecommendationItem(
+            type=rec_data.get("type", "Match"),
+            name=rec_data.get("name", ""),
+            location=rec_data.get("location", ""),
+            fit_score=rec_data.get("fit_score", "50"),
+            fit=school_fit,
+            overall_fit_rationale=rec_data.get("overall_fit_rationale", []),
+            distinctive_opportunities=opportunities,
+            potential_challenges=rec_data.get("potential_challenges", []),
+            why_school_essay_points=rec_data.get("why_school_essay_points", []),
+            how_to_stand_out=rec_data.get("how_to_stand_out", [])
+        )
+
     def parse_recommendations_to_model(self, recommendations_json: Dict, user_id: str) -> CollegeRecommendations:
         """Convert the JSON response to Pydantic models"""
         try:
-            recommendation_items = []
-            
-            for rec_data in recommendations_json.get("recommendations", []):
-                # Parse distinctive opportunities
-                opportunities = []
-                for opp_data in rec_data.get("distinctive_opportunities", []):
-                    opportunities.append(DistinctiveOpportunity(
-                        title=opp_data.get("title", ""),
-                        description=opp_data.get("description", ""),
-                        url=opp_data.get("url"),
-                        search_query=opp_data.get("search_query")
-                    ))
-                
-                # Parse school fit
-                fit_data = rec_data.get("fit", {})
-                school_fit = SchoolFit(
-                    academic=fit_data.get("academic", "Good"),
-                    social_cultural=fit_data.get("social_cultural", "Good"),
-                    financial=fit_data.get("financial", "Good")
-                )
-                
-                # Create recommendation item
-                rec_item = CollegeRecommendationItem(
-                    type=rec_data.get("type", "Match"),
-                    name=rec_data.get("name", ""),
-                    location=rec_data.get("location", ""),
-                    fit_score=rec_data.get("fit_score", "50"),
-                    fit=school_fit,
-                    overall_fit_rationale=rec_data.get("overall_fit_rationale", []),
-                    distinctive_opportunities=opportunities,
-                    potential_challenges=rec_data.get("potential_challenges", []),
-                    why_school_essay_points=rec_data.get("why_school_essay_points", []),
-                    how_to_stand_out=rec_data.get("how_to_stand_out", [])
-                )
-                
-                recommendation_items.append(rec_item)
+            recommendation_items = [
+                self.parse_recommendation_item(rec_data)
+                for rec_data in recommendations_json.get("recommendations", [])
+            ]
             
             return CollegeRecommendations(
                 user_id=user_id,
                 recommendations=recommendation_items,
                 status="completed",
                 generation_metadata={
-                    "model": "gpt-4o",
+                    "model": RECOMMENDATION_MODEL,
                     "prompt_version": "v1.0",
                     "generated_at": datetime.now().isoformat(),
                     "context_source": "user_responses"
@@ -430,36 +438,180 @@ class RecommendationService:
         except Exception as e:
             raise Exception(f"Failed to parse recommendations: {str(e)}")
 
-    async def generate_full_recommendations(self, user_id: str, context: Optional[str] = None) -> CollegeRecommendations:
+    async def generate_full_recommendations(
+        self,
+        user_id: str,
+        context: Optional[str] = None,
+        on_college: Optional[CollegeCallback] = None,
+        on_links: Optional[CollegeCallback] = None
+    ) -> CollegeRecommendations:
         """
         Complete workflow: Automatically fetch user context and generate recommendations
         If context is provided, it will be used instead of fetching from user responses (for testing)
+
+        Colleges are streamed: ``on_college(index, rec_data)`` is awaited as soon as each college is
+        parsed, its links are resolved concurrently with the rest of the stream, and
+        ``on_links(index, rec_data)`` is awaited once they are filled in. Cache hits skip both callbacks.
         """
         print(f"🚀 Starting full recommendations generation for user: {user_id}")
         
         # If no context provided, fetch from user responses
         if context is None:
             print("📥 No context provided, fetching from user responses...")
-            context = await self.fetch_user_responses_context(user_id)
+            context = await student_context_service.get_context(user_id)
         else:
             print("📥 Using provided context")
         
-        print("⏳ Step 1: Generating recommendations...")
-        # Step 1: Generate recommendations
-        raw_recommendations = await self.generate_recommendations(context)
+        # Identical context, prompts and models produce a cacheable result
+        cache_key = self.build_cache_key(context)
+        cached = await self._get_cached_recommendations(cache_key)
+        if cached is not None:
+            print("⚡ Cache hit, skipping OpenAI pipeline")
+            final_recommendations = self.parse_recommendations_to_model(cached, user_id)
+            final_recommendations.generation_metadata["cache_hit"] = True
+            return final_recommendations
 
-        print(f"📄 Raw recommendations: {raw_recommendations}")
-        
-        print("⏳ Step 2: Fetching links with web search...")
-        # Step 2: Extract opportunities, web search for URLs, replace in-place
-        recommendations_with_links = await self.fetch_links_with_web_search(raw_recommendations)
+        print("⏳ Steps 1+2: Streaming recommendations, fetching links per college as each arrives...")
+        raw_recommendations = []
+        link_tasks = []
+        semaphore = asyncio.Semaphore(settings.web_search_concurrency)
+        try:
+            async for rec_data in self.stream_recommendations(context):
+                index = len(raw_recommendations)
+                raw_recommendations.append(rec_data)
+                if on_college:
+                    await on_college(index, rec_data)
+                # Step 2 for this college overlaps with Step 1 for the next ones
+                link_tasks.append(asyncio.create_task(
+                    self._fetch_college_links(index, rec_data, semaphore, on_links)
+                ))
+            await asyncio.gather(*link_tasks)
+        except BaseException:
+            for task in link_tasks:
+                task.cancel()
+            raise
+
+        recommendations_with_links = {"recommendations": raw_recommendations}
         
         print("⏳ Step 3: Parsing to models...")
         # Step 3: Parse to models
         final_recommendations = self.parse_recommendations_to_model(recommendations_with_links, user_id)
+        final_recommendations.generation_metadata["cache_hit"] = False
+
+        if final_recommendations.recommendations:
+            await self._set_cached_recommendations(cache_key, recommendations_with_links)
         
         print(f"✅ Complete! Generated {len(final_recommendations.recommendations)} recommendations")
         return final_recommendations
 
+    async def _fetch_college_links(
+        self,
+        index: int,
+        rec_data: Dict,
+        semaphore: asyncio.Semaphore,
+        on_links: Optional[CollegeCallback]
+    ):
+        """Resolve one college's links in place; on failure keep its original URLs."""
+        try:
+            await self.fetch_links_with_web_search({"recommendations": [rec_data]}, semaphore)
+        except Exception as e:
+            print(f"❌ Failed to fetch links for {rec_data.get('name', '')}: {str(e)}")
+            for opp in rec_data.get("distinctive_opportunities", []):
+                opp.pop("search_query", None)  # Just remove search_query, keep original URL
+        if on_links:
+            await on_links(index, rec_data)
+
+    def build_cache_key(self, context: str) -> str:
+        """Hash every input that determines the pipeline output."""
+        return hash_key(
+            context,
+            self.load_college_recs_prompt(),
+            self.load_web_search_prompt(),
+            [RECOMMENDATION_MODEL, WEB_SEARCH_MODEL],
+            OPPORTUNITY_LINKS_SCHEMA
+        )
+
+    async def _get_cached_recommendations(self, cache_key: str) -> Optional[Dict]:
+        """Look up cached pipeline output; cache failures never block generation."""
+        try:
+            return await self.recommendation_cache.get(cache_key)
+        except Exception as e:
+            print(f"⚠️ Recommendation cache lookup failed: {e}")
+            return None
+
+    async def _set_cached_recommendations(self, cache_key: str, recommendations_json: Dict):
+        """Store pipeline output; cache failures never fail generation."""
+        try:
+            await self.recommendation_cache.set(cache_key, recommendations_json)
+        except Exception as e:
+            print(f"⚠️ Recommendation cache write failed: {e}")
+
+    async def run_generation_job(self, payload: Dict):
+        """
+        Job handler: generate recommendations and store them on the pending document.
+        Errors propagate so the job queue can retry with backoff.
+        """
+        user_id = payload["user_id"]
+        recommendation_id = payload["recommendation_id"]
+        print(f"🔄 Starting background generation for user: {user_id}")
+
+        # A retried job starts over with an empty list
+        await self.recommendations_repository.update_one(
+            {"_id": ObjectId(recommendation_id)},
+            {"status": "generating", "recommendations": [], "updated_at": datetime.now()}
+        )
+        event_bus.publish(recommendation_job_key(user_id), {"status": "generating"})
+
+        async def save_college(index: int, rec_data: Dict):
+            # Persist each college as soon as it is valid so the stream endpoint can push it
+            try:
+                item = self.parse_recommendation_item(rec_data)
+            except Exception as e:
+                print(f"⚠️ Skipping invalid streamed recommendation {index}: {e}")
+                return
+            await self.recommendations_repository.update_one(
+                {"_id": ObjectId(recommendation_id)},
+                {f"recommendations.{index}": item.model_dump(), "updated_at": datetime.now()}
+            )
+            event_bus.publish(recommendation_job_key(user_id), {"status": "generating", "index": index})
+
+        print("📞 Calling generate_full_recommendations")
+        with track_generation() as llm_usage:
+            recommendations = await self.generate_full_recommendations(
+                user_id,
+                on_college=save_college,
+                on_links=save_college
+            )
+        print("✅ Recommendation service returned")
+
+        if not recommendations or not hasattr(recommendations, 'recommendations'):
+            raise ValueError("Invalid or missing recommendation data")
+
+        print(f"📦 Received {len(recommendations.recommendations)} recs")
+        await self.recommendations_repository.update_one(
+            {"_id": ObjectId(recommendation_id)},
+            {
+                "recommendations": [rec.model_dump() for rec in recommendations.recommendations],
+                "status": "completed",
+                "updated_at": datetime.now(),
+                "generation_metadata": {**(recommendations.generation_metadata or {}), "llm_usage": llm_usage}
+            }
+        )
+        event_bus.publish(recommendation_job_key(user_id), {"status": "completed"})
+        print(f"✅ Background generation completed for user: {user_id}")
+
+    async def mark_generation_failed(self, payload: Dict, error: str):
+        """Job failure hook: record the final error once all retries are exhausted."""
+        print(f"❌ Background generation failed: {error}")
+        await self.recommendations_repository.update_one(
+            {"_id": ObjectId(payload["recommendation_id"])},
+            {
+                "status": "failed",
+                "updated_at": datetime.now(),
+                "error": error
+            }
+        )
+        event_bus.publish(recommendation_job_key(payload["user_id"]), {"status": "failed"})
+
 # Create a global instance
 recommendation_service = RecommendationService() 
\ No newline at end of file
@@ -1,9 +1,14 @@
 from typing import Dict, Any, List, Optional
+from datetime import datetime
 import uuid
 
-from core.database import BaseRepository
+from core.coalesce import WriteCoalescer
+from core.config import settings
+from core.database import BaseRepository, DEFAULT_PAGE_SIZE
 from core.exceptions import NotFoundError, ConflictError
+from core.http_cache import VERSION_PROJECTION
 from services.base_service import BaseService
+from services.student_context_service import student_context_service
 
 
 class ResponseService(BaseService):
@@ -12,6 +17,13 @@ class ResponseService(BaseService):
     def __init__(self):
         repository = BaseRepository("responses")
         super().__init__(repository, "Response")
+        self.patch_coalescer = None
+        if settings.autosave_coalesce_window_ms > 0:
+            self.patch_coalescer = WriteCoalescer(
+                settings.autosave_coalesce_window_ms / 1000,
+                merge=merge_answer_patches,
+                flush=self._flush_coalesced_patch
+            )
     
     async def create_response(self, response_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new form response."""
@@ -24,11 +36,22 @@ class ResponseService(BaseService):
         # Generate unique response ID
         response_data["response_id"] = str(uuid.uuid4())
         
-        return await self.create(response_data, check_existing)
+        created = await self.create(response_data, check_existing)
+        await student_context_service.invalidate(response_data["user_id"])
+        return created
     
     async def get_user_responses(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all responses for a user."""
         return await self.get_many({"user_id": user_id})
+
+    async def get_user_responses_page(
+        self,
+        user_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get one keyset page of responses for a user."""
+        return await self.repository.find_page({"user_id": user_id}, limit=limit, after=cursor)
     
     async def get_response(self, user_id: str, form_id: str) -> Dict[str, Any]:
         """Get response by user ID and form ID."""
@@ -39,20 +62,28 @@ class ResponseService(BaseService):
         if not response:
             raise NotFoundError("Response", f"user_id={user_id}, form_id={form_id}")
         return response
+
+    async def get_response_version(self, user_id: str, form_id: str) -> Optional[Dict[str, Any]]:
+        """Return only _id and updated_at of a response, for conditional GETs."""
+        return await self.repository.find_one(
+            {"user_id": user_id, "form_id": form_id},
+            projection=VERSION_PROJECTION
+        )
     
     async def update_response(self, user_id: str, form_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update response by user ID and form ID."""
         # Check if response exists
         await self.get_response(user_id, form_id)
         
-        # Perform update
+        # Perform update (bumping updated_at invalidates cached copies via the ETag)
         success = await self.repository.update_one(
             {"user_id": user_id, "form_id": form_id},
-            update_data
+            {**update_data, "updated_at": datetime.now()}
         )
         
         if not success:
             raise NotFoundError("Response", f"user_id={user_id}, form_id={form_id}")
+        await student_context_service.invalidate(user_id)
         
         # Return updated response
         return await self.get_response(user_id, form_id)
@@ -66,23 +97,119 @@ class ResponseService(BaseService):
         
         if not success:
             raise NotFoundError("Response", f"user_id={user_id}, form_id={form_id}")
+        await student_context_service.invalidate(user_id)
         
         return True
     
     async def upsert_response(self, response_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create or update a response (for autosave functionality)."""
-        user_id = response_data["user_id"]
-        form_id = response_data["form_id"]
-        
-        # Check if response already exists
-        try:
-            existing_response = await self.get_response(user_id, form_id)
-            # Update existing response
-            return await self.update_response(user_id, form_id, response_data)
-        except NotFoundError:
-            # Create new response
-            response_data["response_id"] = str(uuid.uuid4())
-            return await self.repository.create(response_data)
+        now = datetime.now()
+        # Single find_one_and_update(upsert=True) backed by the unique (user_id, form_id) index
+        response = await self.repository.upsert_one(
+            {"user_id": response_data["user_id"], "form_id": response_data["form_id"]},
+            {"responses": response_data["responses"], "updated_at": now},
+            set_on_insert={"response_id": str(uuid.uuid4()), "created_at": now}
+        )
+        await student_context_service.invalidate(response_data["user_id"])
+        return response
+
+    async def patch_response(
+        self,
+        user_id: str,
+        form_id: str,
+        answers: List[Dict[str, Any]],
+        removed_question_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Apply per-question changes to a response in one atomic round trip.
+
+        Changed answers replace the stored answer with the same question_id in
+        place; new question_ids are appended and removed ones are dropped. The
+        document is created if it does not exist yet.
+        """
+        now = datetime.now()
+        response = await self.repository.find_one_and_update(
+            {"user_id": user_id, "form_id": form_id},
+            build_answers_patch_pipeline(answers, removed_question_ids or [], now),
+            upsert=True
+        )
+        await student_context_service.invalidate(user_id)
+        return response
+
+    async def submit_patch(
+        self,
+        user_id: str,
+        form_id: str,
+        answers: List[Dict[str, Any]],
+        removed_question_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Patch a response, coalescing bursts per (user_id, form_id) when enabled."""
+        if self.patch_coalescer is None:
+            return await self.patch_response(user_id, form_id, answers, removed_question_ids)
+        return await self.patch_coalescer.submit(
+            (user_id, form_id),
+            {"answers": answers, "removed_question_ids": removed_question_ids or []}
+        )
+
+    async def _flush_coalesced_patch(self, key, patch: Dict[str, Any]) -> Dict[str, Any]:
+        user_id, form_id = key
+        return await self.patch_response(user_id, form_id, patch["answers"], patch["removed_question_ids"])
+
+
+def merge_answer_patches(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two pending patches; the later value for a question wins."""
+    answers = {answer["question_id"]: answer for answer in first["answers"]}
+    removed = [qid for qid in first["removed_question_ids"] if qid not in {a["question_id"] for a in second["answers"]}]
+    for qid in second["removed_question_ids"]:
+        answers.pop(qid, None)
+        if qid not in removed:
+            removed.append(qid)
+    for answer in second["answers"]:
+        answers[answer["question_id"]] = answer
+    return {"answers": list(answers.values()), "removed_question_ids": removed}
+
+
+def build_answers_patch_pipeline(
+    answers: List[Dict[str, Any]],
+    removed_question_ids: List[str],
+    now: datetime
+) -> List[Dict[str, Any]]:
+    """Build an update pipeline that merges answers into the stored responses array by question_id."""
+    # Last write wins if a question appears more than once in the same patch
+    answers = list({answer["question_id"]: answer for answer in answers}.values())
+    # $literal keeps user-entered text such as "$100" from being read as a field path
+    patch = {"$literal": answers}
+    patch_ids = [answer["question_id"] for answer in answers]
+    return [
+        {"$set": {
+            "responses": {"$let": {
+                "vars": {"existing": {"$filter": {
+                    "input": {"$ifNull": ["$responses", []]},
+                    "as": "r",
+                    "cond": {"$not": [{"$in": ["$$r.question_id", {"$literal": removed_question_ids}]}]}
+                }}},
+                "in": {"$concatArrays": [
+                    # Replace changed answers in place
+                    {"$map": {
+                        "input": "$$existing",
+                        "as": "r",
+                        "in": {"$let": {
+                            "vars": {"idx": {"$indexOfArray": [{"$literal": patch_ids}, "$$r.question_id"]}},
+                            "in": {"$cond": [{"$gte": ["$$idx", 0]}, {"$arrayElemAt": [patch, "$$idx"]}, "$$r"]}
+                        }}
+                    }},
+                    # Append answers to questions not answered before
+                    {"$filter": {
+                        "input": patch,
+                        "as": "p",
+                        "cond": {"$not": [{"$in": ["$$p.question_id", {"$ifNull": ["$$existing.question_id", []]}]}]}
+                    }}
+                ]}
+            }},
+            "response_id": {"$ifNull": ["$response_id", str(uuid.uuid4())]},
+            "created_at": {"$ifNull": ["$created_at", now]},
+            "updated_at": now
+        }}
+    ]
 
 
 # Global service instance
@@ -0,0 +1,131 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+
+from core.config import settings
+from core.database import BaseRepository
+from core.exceptions import DatabaseError
+from core.tokens import allocate_token_caps, count_tokens, truncate_to_tokens
+
+NO_RESPONSES_CONTEXT = "No student profile information available."
+
+
+def _render_context(forms: List[Tuple[str, List[Tuple[str, str]]]]) -> str:
+    context_parts = ["Student Profile Information:"]
+    for form_name, answers in forms:
+        context_parts.append(f"\n{form_name}:")
+        for question_text, answer_text in answers:
+            if question_text and answer_text:
+                context_parts.append(f"- {question_text}: {answer_text}")
+    return "\n".join(context_parts)
+
+
+def build_responses_context(response_docs: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> str:
+    """Render a student's form responses as the context text sent to the LLM.
+
+    When the text exceeds ``max_tokens``, answers are trimmed longest-first:
+    every answer keeps up to a common token cap chosen so the whole context
+    fits, so short factual answers stay intact and long essays are cut.
+    """
+    if not response_docs:
+        return NO_RESPONSES_CONTEXT
+    forms = [
+        (
+            response_doc.get("form_id", "Unknown Form").replace("_", " ").title(),
+            [(answer.get("question_text", ""), answer.get("answer", "")) for answer in response_doc.get("responses", [])]
+        )
+        for response_doc in response_docs
+    ]
+    text = _render_context(forms)
+    if max_tokens is None or count_tokens(text) <= max_tokens:
+        return text
+
+    answer_tokens = [count_tokens(answer) for _, answers in forms for _, answer in answers]
+    fixed_tokens = count_tokens(text) - sum(answer_tokens)
+    caps = allocate_token_caps(answer_tokens, max(0, max_tokens - fixed_tokens))
+    packed, i = [], 0
+    for form_name, answers in forms:
+        trimmed = []
+        for question, answer in answers:
+            if caps[i] < answer_tokens[i]:
+                answer = truncate_to_tokens(answer, caps[i])
+            trimmed.append((question, answer))
+            i += 1
+        packed.append((form_name, trimmed))
+    return _render_context(packed)
+
+
+class StudentContextService:
+    """Memoized student context shared by profile generation, recommendations and chat.
+
+    Rendered contexts are kept per process and keyed by a per-user version
+    counter stored in MongoDB. ResponseService bumps the counter on every
+    response write, so a cached context is reused until any process changes
+    that student's answers; checking it costs one indexed point read instead
+    of scanning every response document.
+    """
+
+    def __init__(self):
+        self.responses_repository = BaseRepository("responses")
+        self.versions_repository = BaseRepository("studentContextVersions")
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_version(self, user_id: str) -> int:
+        """Current response version for a user (0 before the first write)."""
+        doc = await self.versions_repository.find_one({"user_id": user_id}, projection={"version": 1})
+        return doc["version"] if doc else 0
+
+    async def invalidate(self, user_id: str):
+        """Bump the user's version after a response write so every process rebuilds its context."""
+        self._entries.pop(user_id, None)
+        try:
+            await self.versions_repository.collection.update_one(
+                {"user_id": user_id},
+                {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now()}},
+                upsert=True
+            )
+        except Exception as e:
+            raise DatabaseError(f"invalidate in {self.versions_repository.collection_name}", e)
+
+    async def get(self, user_id: str) -> Dict[str, Any]:
+        """Return {"version", "responses", "text"} for a user, rebuilding it only after a response write."""
+        version = await self.get_version(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None and entry["version"] == version:
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            return entry
+
+        self.misses += 1
+        responses = await self.responses_repository.find_many(
+            {"user_id": user_id},
+            projection={"form_id": 1, "responses": 1}
+        )
+        # Stored under the version read before the scan: a write racing with it only forces another rebuild
+        text = build_responses_context(responses, settings.prompt_context_max_tokens)
+        entry = {"version": version, "responses": responses, "text": text, "tokens": count_tokens(text)}
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > settings.student_context_cache_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def get_context(self, user_id: str) -> str:
+        """Rendered context text for a user."""
+        return (await self.get(user_id))["text"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts and cached users for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "entries": len(self._entries)
+        }
+
+
+# Global student context service instance
+student_context_service = StudentContextService()
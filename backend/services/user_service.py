@@ -1,7 +1,7 @@
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-from core.database import BaseRepository
+from core.database import BaseRepository, DEFAULT_PAGE_SIZE
 from core.exceptions import NotFoundError, ConflictError
 from services.base_service import BaseService
 
@@ -73,6 +73,15 @@ class UserService(BaseService):
         """Get all users by role."""
         return await self.get_many({"role": role})
 
+    async def get_users_page_by_role(
+        self,
+        role: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get one keyset page of users by role."""
+        return await self.repository.find_page({"role": role}, limit=limit, after=cursor)
+
 
 # Global service instance
 user_service = UserService() 
\ No newline at end of file
@@ -286,15 +286,21 @@ class TestRecommendationRoutes:
         assert response_json["progress"] == 100
 
     @pytest.mark.asyncio
-    async def test_get_recommendation_status_not_found(self, client, mock_recommendation_service):
+    async def test_get_recommendation_status_not_found(self, client):
         """Test recommendation status retrieval when no recommendations exist."""
         user_id = "user_with_no_recommendations"
-        mock_recommendation_service.get_recommendation_status.return_value = None
+        mock_repository = AsyncMock()
+        mock_repository.find_one.return_value = None
+        mock_job_queue = AsyncMock()
         
-        with patch('routes.recommendations.recommendation_service', mock_recommendation_service):
-            response = await client.get(f"/recommendations/status/{user_id}")
+        with patch('routes.recommendations.recommendations_repository', mock_repository), \
+             patch('routes.recommendations.job_queue', mock_job_queue):
+            response = await client.get(f"/recommendations/{user_id}/status")
         
-        assert response.status_code == 404
+        assert response.status_code == 200
+        assert response.json()["status"] == "not_found"
+        mock_repository.find_one.assert_awaited_once()
+        mock_job_queue.find_active.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_get_recommendations_by_type_success(self, client, mock_recommendation_service):
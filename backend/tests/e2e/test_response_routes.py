@@ -201,7 +201,10 @@ class TestResponseRoutes:
             }
         ]
         
-        mock_response_service.get_user_responses.return_value = user_responses
+        mock_response_service.get_user_responses_page.return_value = {
+            "items": user_responses,
+            "next_cursor": "507f1f77bcf86cd799439012"
+        }
         
         with patch('routes.responses.response_service', mock_response_service):
             response = await client.get(f"/responses/user/{user_id}")
@@ -210,6 +213,33 @@ class TestResponseRoutes:
         response_json = response.json()
         assert len(response_json) == 2
         assert all(r["user_id"] == user_id for r in response_json)
+        assert response.headers["X-Next-Cursor"] == "507f1f77bcf86cd799439012"
+
+    @pytest.mark.asyncio
+    async def test_get_user_responses_second_page(self, client, mock_response_service):
+        """Test the cursor is passed through and the last page has no next cursor."""
+        user_id = "user_123"
+        cursor = "507f1f77bcf86cd799439012"
+        mock_response_service.get_user_responses_page.return_value = {
+            "items": [
+                {
+                    "id": "507f1f77bcf86cd799439013",
+                    "response_id": "resp_3",
+                    "user_id": user_id,
+                    "form_id": "college_preferences",
+                    "submitted_at": datetime.now().isoformat()
+                }
+            ],
+            "next_cursor": None
+        }
+        
+        with patch('routes.responses.response_service', mock_response_service):
+            response = await client.get(f"/responses/user/{user_id}?limit=2&cursor={cursor}")
+        
+        assert response.status_code == 200
+        assert [r["response_id"] for r in response.json()] == ["resp_3"]
+        assert "X-Next-Cursor" not in response.headers
+        mock_response_service.get_user_responses_page.assert_awaited_once_with(user_id, limit=2, cursor=cursor)
 
     @pytest.mark.asyncio
     async def test_get_user_responses_with_form_filter(self, client, mock_response_service):
@@ -226,7 +256,10 @@ class TestResponseRoutes:
             }
         ]
         
-        mock_response_service.get_user_responses.return_value = filtered_responses
+        mock_response_service.get_user_responses_page.return_value = {
+            "items": filtered_responses,
+            "next_cursor": None
+        }
         
         with patch('routes.responses.response_service', mock_response_service):
             response = await client.get(f"/responses/user/{user_id}?form_id={form_id}")
@@ -235,12 +268,13 @@ class TestResponseRoutes:
         response_json = response.json()
         assert len(response_json) == 1
         assert response_json[0]["form_id"] == form_id
+        assert "X-Next-Cursor" not in response.headers
 
     @pytest.mark.asyncio
     async def test_get_user_responses_empty(self, client, mock_response_service):
         """Test user responses retrieval when user has no responses."""
         user_id = "user_with_no_responses"
-        mock_response_service.get_user_responses.return_value = []
+        mock_response_service.get_user_responses_page.return_value = {"items": [], "next_cursor": None}
         
         with patch('routes.responses.response_service', mock_response_service):
             response = await client.get(f"/responses/user/{user_id}")
@@ -248,6 +282,7 @@ class TestResponseRoutes:
         assert response.status_code == 200
         response_json = response.json()
         assert response_json == []
+        assert "X-Next-Cursor" not in response.headers
 
     @pytest.mark.asyncio
     async def test_submit_question_response_success(self, client, mock_response_service):
@@ -0,0 +1,124 @@
+"""
+Unit tests for core.cache module.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch, PropertyMock
+
+from core.cache import CacheRepository, hash_key
+from core.exceptions import DatabaseError
+
+
+class TestHashKey:
+    """Test cases for hash_key function."""
+
+    def test_same_inputs_same_key(self):
+        """Test identical inputs produce identical keys."""
+        assert hash_key("context", {"b": 1, "a": 2}) == hash_key("context", {"a": 2, "b": 1})
+
+    def test_different_inputs_different_key(self):
+        """Test any changed input changes the key."""
+        assert hash_key("context", "prompt") != hash_key("context", "prompt v2")
+
+    def test_part_boundaries_matter(self):
+        """Test parts are delimited rather than concatenated."""
+        assert hash_key("ab", "c") != hash_key("a", "bc")
+
+
+class TestCacheRepository:
+    """Test cases for CacheRepository class."""
+
+    @pytest.fixture
+    def mock_collection(self):
+        """Mock collection for testing."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def cache(self, mock_collection):
+        """Create CacheRepository instance with mock collection."""
+        repo = CacheRepository("test_cache", ttl_seconds=60, max_entries=10)
+        with patch.object(type(repo), 'collection', new_callable=PropertyMock) as mock_prop:
+            mock_prop.return_value = mock_collection
+            yield repo
+
+    @pytest.mark.asyncio
+    async def test_get_hit(self, cache, mock_collection):
+        """Test a live entry returns its value."""
+        mock_collection.find_one_and_update.return_value = {"value": {"recommendations": []}}
+
+        result = await cache.get("abc")
+
+        assert result == {"recommendations": []}
+        filter_dict = mock_collection.find_one_and_update.call_args[0][0]
+        assert filter_dict["key"] == "abc"
+        assert "$gt" in filter_dict["expires_at"]
+
+    @pytest.mark.asyncio
+    async def test_get_miss(self, cache, mock_collection):
+        """Test a missing entry returns None."""
+        mock_collection.find_one_and_update.return_value = None
+
+        assert await cache.get("abc") is None
+
+    @pytest.mark.asyncio
+    async def test_get_failure(self, cache, mock_collection):
+        """Test database failures are wrapped."""
+        mock_collection.find_one_and_update.side_effect = Exception("down")
+
+        with pytest.raises(DatabaseError):
+            await cache.get("abc")
+
+    @pytest.mark.asyncio
+    async def test_set_upserts_and_skips_eviction_under_limit(self, cache, mock_collection):
+        """Test set upserts the entry and does not evict below max_entries."""
+        mock_collection.estimated_document_count.return_value = 5
+
+        await cache.set("abc", {"x": 1})
+
+        args, kwargs = mock_collection.update_one.call_args
+        assert args[0] == {"key": "abc"}
+        assert args[1]["$set"]["value"] == {"x": 1}
+        assert kwargs["upsert"] is True
+        mock_collection.delete_many.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_counts_hits_and_misses(self, cache, mock_collection):
+        """Test lookups update the process hit/miss counters."""
+        mock_collection.find_one_and_update.side_effect = [{"value": 1}, None]
+
+        await cache.get("a")
+        await cache.get("b")
+
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    @pytest.mark.asyncio
+    async def test_get_many(self, cache, mock_collection):
+        """Test get_many returns live entries and touches only those."""
+        cursor = MagicMock()
+        cursor.__aiter__.return_value = [{"key": "a", "value": {"url": "https://a.edu"}}]
+        mock_collection.find = MagicMock(return_value=cursor)
+
+        result = await cache.get_many(["a", "b", "a"])
+
+        assert result == {"a": {"url": "https://a.edu"}}
+        assert mock_collection.find.call_args[0][0]["key"] == {"$in": ["a", "b"]}
+        assert mock_collection.update_many.call_args[0][0] == {"key": {"$in": ["a"]}}
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_set_many_uses_one_bulk_write(self, cache, mock_collection):
+        """Test set_many upserts every entry in a single bulk write."""
+        mock_collection.estimated_document_count.return_value = 5
+
+        await cache.set_many({"a": 1, "b": 2}, ttl_seconds=30)
+
+        operations = mock_collection.bulk_write.call_args[0][0]
+        assert len(operations) == 2
+        assert operations[0]._filter == {"key": "a"}
+
+    @pytest.mark.asyncio
+    async def test_set_many_empty_is_noop(self, cache, mock_collection):
+        """Test nothing is written for an empty batch."""
+        await cache.set_many({})
+
+        mock_collection.bulk_write.assert_not_called()
@@ -0,0 +1,46 @@
+"""
+Unit tests for core.coalesce module.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from core.coalesce import WriteCoalescer
+
+
+class TestWriteCoalescer:
+    """Test cases for WriteCoalescer class."""
+
+    @pytest.mark.asyncio
+    async def test_burst_flushes_once(self):
+        """Test writes within the window share one flush and its result."""
+        flush = AsyncMock(return_value="saved")
+        coalescer = WriteCoalescer(0.01, merge=lambda a, b: a + b, flush=flush)
+
+        results = await asyncio.gather(
+            coalescer.submit("k", [1]),
+            coalescer.submit("k", [2]),
+            coalescer.submit("k", [3])
+        )
+
+        flush.assert_awaited_once_with("k", [1, 2, 3])
+        assert results == ["saved", "saved", "saved"]
+
+    @pytest.mark.asyncio
+    async def test_keys_flush_independently(self):
+        """Test different keys are not merged."""
+        flush = AsyncMock(side_effect=lambda key, value: value)
+        coalescer = WriteCoalescer(0.01, merge=lambda a, b: a + b, flush=flush)
+
+        results = await asyncio.gather(coalescer.submit("a", [1]), coalescer.submit("b", [2]))
+
+        assert results == [[1], [2]]
+        assert flush.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_error_propagates(self):
+        """Test every waiter sees a failed flush."""
+        coalescer = WriteCoalescer(0.01, merge=lambda a, b: b, flush=AsyncMock(side_effect=Exception("down")))
+
+        with pytest.raises(Exception, match="down"):
+            await coalescer.submit("k", 1)
@@ -7,8 +7,11 @@ from unittest.mock import AsyncMock, MagicMock, patch, PropertyMock
 from bson import ObjectId
 from datetime import datetime
 
-from core.database import DatabaseManager, BaseRepository, serialize_doc, serialize_docs
-from core.exceptions import DatabaseError
+from core.database import (
+    DatabaseManager, BaseRepository, serialize_doc, serialize_docs,
+    encode_cursor, decode_cursor, keyset_filter, get_database, PoolStats, client_options
+)
+from core.exceptions import DatabaseError, ValidationError
 
 
 class TestDatabaseManager:
@@ -80,6 +83,101 @@ class TestDatabaseManager:
 
         assert "Database not connected" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_connect_is_idempotent(self, db_manager, mock_motor_client):
+        """Test repeated connects reuse the existing client and pool."""
+        mock_client, _ = mock_motor_client
+
+        with patch('core.database.AsyncIOMotorClient', return_value=mock_client) as client_class:
+            await db_manager.connect()
+            await db_manager.connect()
+
+        client_class.assert_called_once()
+
+    def test_get_database_not_connected(self):
+        """Test the request dependency fails loudly before startup has connected."""
+        with patch('core.database.db_manager', DatabaseManager()):
+            with pytest.raises(DatabaseError):
+                get_database()
+
+    def test_get_database_resolves_current_database(self):
+        """Test the request dependency returns the database connected at startup."""
+        manager = DatabaseManager()
+        manager.database = MagicMock()
+
+        with patch('core.database.db_manager', manager):
+            assert get_database() is manager.database
+
+
+    @pytest.mark.asyncio
+    async def test_connect_passes_pool_options(self, db_manager, mock_motor_client):
+        """Test the client is built with the configured pool options and the stats listener."""
+        mock_client, _ = mock_motor_client
+
+        with patch('core.database.AsyncIOMotorClient', return_value=mock_client) as client_class:
+            await db_manager.connect()
+
+        kwargs = client_class.call_args.kwargs
+        assert kwargs["maxPoolSize"] == client_options()["maxPoolSize"]
+        assert kwargs["event_listeners"] == [db_manager.pool_stats]
+
+    @pytest.mark.asyncio
+    async def test_prewarm_pings_concurrently(self, db_manager, mock_motor_client):
+        """Test pre-warming issues one ping per requested connection."""
+        mock_client, _ = mock_motor_client
+        db_manager.client = mock_client
+
+        await db_manager.prewarm(3)
+
+        assert mock_client.admin.command.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_prewarm_failure_is_not_raised(self, db_manager, mock_motor_client):
+        """Test a failed pre-warm leaves startup to continue."""
+        mock_client, _ = mock_motor_client
+        mock_client.admin.command.side_effect = Exception("timeout")
+        db_manager.client = mock_client
+
+        await db_manager.prewarm(2)
+
+
+class TestPoolStats:
+    """Test cases for PoolStats listener."""
+
+    def test_checkout_wait_is_recorded(self):
+        """Test the wait between checkout start and checkout is measured."""
+        stats = PoolStats()
+        event = MagicMock()
+
+        with patch('core.database.time.monotonic', side_effect=[10.0, 10.25]):
+            stats.connection_check_out_started(event)
+            stats.connection_checked_out(event)
+
+        result = stats.stats()
+        assert result["checkouts"] == 1
+        assert result["checked_out"] == 1
+        assert result["avg_checkout_wait_ms"] == 250.0
+        assert result["max_checkout_wait_ms"] == 250.0
+
+    def test_connection_accounting(self):
+        """Test open and checked-out connection counts follow pool events."""
+        stats = PoolStats()
+        event = MagicMock()
+
+        stats.connection_created(event)
+        stats.connection_created(event)
+        stats.connection_check_out_started(event)
+        stats.connection_checked_out(event)
+        stats.connection_checked_in(event)
+        stats.connection_closed(event)
+        stats.connection_check_out_started(event)
+        stats.connection_check_out_failed(event)
+
+        result = stats.stats()
+        assert result["open_connections"] == 1
+        assert result["checked_out"] == 0
+        assert result["checkout_failures"] == 1
+
 
 class TestSerializationFunctions:
     """Test cases for document serialization functions."""
@@ -145,6 +243,42 @@ class TestSerializationFunctions:
         assert result is None
 
 
+class TestKeysetCursor:
+    """Test cases for keyset pagination cursor helpers."""
+
+    def test_roundtrip_id_cursor(self):
+        """Test an _id cursor decodes back to the ObjectId."""
+        doc = {"_id": "507f1f77bcf86cd799439011"}
+
+        position = decode_cursor(encode_cursor(doc))
+
+        assert position["id"] == ObjectId("507f1f77bcf86cd799439011")
+
+    def test_roundtrip_datetime_cursor(self):
+        """Test a sort value survives encoding with its type."""
+        doc = {"_id": "507f1f77bcf86cd799439011", "created_at": datetime(2024, 1, 1, 12, 0, 0)}
+
+        position = decode_cursor(encode_cursor(doc, "created_at"))
+
+        assert position["v"].replace(tzinfo=None) == datetime(2024, 1, 1, 12, 0, 0)
+
+    def test_invalid_cursor(self):
+        """Test a malformed token raises a validation error."""
+        with pytest.raises(ValidationError):
+            decode_cursor("not-a-cursor")
+
+    def test_keyset_filter_descending(self):
+        """Test a descending sort selects documents before the cursor with _id tiebreak."""
+        token = encode_cursor({"_id": "507f1f77bcf86cd799439011", "score": 5}, "score")
+
+        result = keyset_filter("score", -1, token)
+
+        assert result == {"$or": [
+            {"score": {"$lt": 5}},
+            {"score": 5, "_id": {"$lt": ObjectId("507f1f77bcf86cd799439011")}}
+        ]}
+
+
 class TestBaseRepository:
     """Test cases for BaseRepository class."""
 
@@ -237,6 +371,68 @@ class TestBaseRepository:
         mock_collection.find_one.assert_called_once_with(filter_dict)
         assert result["email"] == "test@example.com"
 
+    @pytest.mark.asyncio
+    async def test_find_one_sorted_with_projection(self, base_repo, mock_collection):
+        """Test finding the latest document with a projection."""
+        filter_dict = {"user_id": "u1"}
+        mock_collection.find_one.return_value = {"_id": ObjectId(), "status": "completed"}
+
+        result = await base_repo.find_one(filter_dict, projection={"status": 1}, sort=[("updated_at", -1)])
+
+        mock_collection.find_one.assert_called_once_with(
+            filter_dict, projection={"status": 1}, sort=[("updated_at", -1)]
+        )
+        assert result["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_find_many_sort_skip_limit(self, base_repo, mock_collection):
+        """Test find_many applies sort, skip, limit and projection on the cursor."""
+        mock_cursor = MagicMock()
+        mock_cursor.sort.return_value = mock_cursor
+        mock_cursor.skip.return_value = mock_cursor
+        mock_cursor.limit.return_value = mock_cursor
+        mock_cursor.to_list = AsyncMock(return_value=[{"_id": ObjectId(), "name": "A"}])
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+
+        result = await base_repo.find_many(
+            {"user_id": "u1"}, limit=10, sort=[("created_at", -1)], skip=20, projection={"name": 1}
+        )
+
+        mock_collection.find.assert_called_once_with({"user_id": "u1"}, {"name": 1})
+        mock_cursor.sort.assert_called_once_with([("created_at", -1)])
+        mock_cursor.skip.assert_called_once_with(20)
+        mock_cursor.limit.assert_called_once_with(10)
+        assert result[0]["name"] == "A"
+
+    @pytest.mark.asyncio
+    async def test_find_page_next_cursor(self, base_repo, mock_collection):
+        """Test find_page fetches one extra document to detect the next page."""
+        docs = [{"_id": ObjectId(), "n": i} for i in range(3)]
+        mock_cursor = MagicMock()
+        mock_cursor.sort.return_value = mock_cursor
+        mock_cursor.limit.return_value = mock_cursor
+        mock_cursor.to_list = AsyncMock(return_value=docs)
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+
+        page = await base_repo.find_page({"user_id": "u1"}, limit=2)
+
+        mock_cursor.limit.assert_called_once_with(3)
+        assert len(page["items"]) == 2
+        assert decode_cursor(page["next_cursor"])["id"] == ObjectId(page["items"][-1]["_id"])
+
+    @pytest.mark.asyncio
+    async def test_find_page_last_page(self, base_repo, mock_collection):
+        """Test find_page returns no cursor on the last page."""
+        mock_cursor = MagicMock()
+        mock_cursor.sort.return_value = mock_cursor
+        mock_cursor.limit.return_value = mock_cursor
+        mock_cursor.to_list = AsyncMock(return_value=[{"_id": ObjectId()}])
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+
+        page = await base_repo.find_page({"user_id": "u1"}, limit=2)
+
+        assert page["next_cursor"] is None
+
     @pytest.mark.asyncio
     async def test_update_one_success(self, base_repo, mock_collection):
         """Test successful document update."""
@@ -266,6 +462,29 @@ class TestBaseRepository:
 
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_upsert_one(self, base_repo, mock_collection):
+        """Test upsert_one issues a single find_one_and_update with upsert."""
+        mock_collection.find_one_and_update.return_value = {"_id": ObjectId("507f1f77bcf86cd799439011"), "a": 1}
+
+        result = await base_repo.upsert_one({"k": "v"}, {"a": 1}, set_on_insert={"created": True})
+
+        args, kwargs = mock_collection.find_one_and_update.call_args
+        assert args == ({"k": "v"}, {"$set": {"a": 1}, "$setOnInsert": {"created": True}})
+        assert kwargs["upsert"] is True
+        assert result["_id"] == "507f1f77bcf86cd799439011"
+
+    @pytest.mark.asyncio
+    async def test_upsert_one_retries_duplicate_key(self, base_repo, mock_collection):
+        """Test a lost insert race is retried once as an update."""
+        from pymongo.errors import DuplicateKeyError
+        mock_collection.find_one_and_update.side_effect = [DuplicateKeyError("dup"), {"_id": "x", "a": 1}]
+
+        result = await base_repo.upsert_one({"k": "v"}, {"a": 1})
+
+        assert mock_collection.find_one_and_update.call_count == 2
+        assert result["a"] == 1
+
     @pytest.mark.asyncio
     async def test_delete_one_success(self, base_repo, mock_collection):
         """Test successful document deletion."""
@@ -0,0 +1,48 @@
+"""
+Unit tests for core.events module.
+"""
+import asyncio
+import pytest
+
+from core.events import EventBus, wait_for_event
+
+
+class TestEventBus:
+    """Test cases for EventBus class."""
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_topic_subscribers_only(self):
+        """Test events are delivered to subscribers of the published topic."""
+        bus = EventBus()
+
+        async with bus.subscribe("a") as queue_a, bus.subscribe("b") as queue_b:
+            bus.publish("a", {"status": "completed"})
+
+            assert queue_a.get_nowait() == {"status": "completed"}
+            assert queue_b.empty()
+
+    @pytest.mark.asyncio
+    async def test_subscription_removed_on_exit(self):
+        """Test leaving the block unsubscribes."""
+        bus = EventBus()
+
+        async with bus.subscribe("a"):
+            assert bus.subscriber_count() == 1
+
+        assert bus.subscriber_count() == 0
+        bus.publish("a")
+
+    @pytest.mark.asyncio
+    async def test_wait_for_event_drains_backlog(self):
+        """Test one wake-up consumes every queued event."""
+        queue = asyncio.Queue()
+        queue.put_nowait({})
+        queue.put_nowait({})
+
+        assert await wait_for_event(queue, timeout=1) is True
+        assert queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_wait_for_event_timeout(self):
+        """Test False is returned when nothing is published."""
+        assert await wait_for_event(asyncio.Queue(), timeout=0.01) is False
@@ -0,0 +1,75 @@
+"""
+Unit tests for core.http_cache module.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from core.http_cache import cache_headers, document_version, is_not_modified, not_modified
+
+
+def make_request(headers):
+    """Request stub exposing only headers."""
+    request = MagicMock()
+    request.headers = headers
+    return request
+
+
+class TestDocumentVersion:
+    """Test cases for document_version function."""
+
+    def test_etag_changes_with_updated_at(self):
+        """Test every write (new updated_at) produces a new strong ETag."""
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        etag, last_modified = document_version({"_id": "abc", "updated_at": now})
+        next_etag, _ = document_version({"_id": "abc", "updated_at": now + timedelta(seconds=1)})
+
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag != next_etag
+        assert last_modified.tzinfo is not None
+
+    def test_missing_updated_at(self):
+        """Test documents without updated_at still get an ETag but no Last-Modified."""
+        etag, last_modified = document_version({"_id": "abc"})
+
+        assert etag
+        assert last_modified is None
+
+
+class TestConditionalRequests:
+    """Test cases for is_not_modified and response helpers."""
+
+    def setup_method(self):
+        self.etag, self.last_modified = document_version({"_id": "abc", "updated_at": datetime(2024, 1, 1, 12, 0, 0, 500000)})
+
+    def test_if_none_match(self):
+        """Test a matching (or weak-prefixed) tag is not modified and a stale tag is."""
+        assert is_not_modified(make_request({"if-none-match": self.etag}), self.etag, self.last_modified)
+        assert is_not_modified(make_request({"if-none-match": f'"other", W/{self.etag}'}), self.etag, self.last_modified)
+        assert not is_not_modified(make_request({"if-none-match": '"other"'}), self.etag, self.last_modified)
+
+    def test_if_none_match_takes_precedence(self):
+        """Test If-Modified-Since is ignored when If-None-Match is present."""
+        headers = {"if-none-match": '"other"', "if-modified-since": "Mon, 01 Jan 2024 12:00:00 GMT"}
+
+        assert not is_not_modified(make_request(headers), self.etag, self.last_modified)
+
+    def test_if_modified_since(self):
+        """Test second-resolution dates compare against Last-Modified."""
+        assert is_not_modified(make_request({"if-modified-since": "Mon, 01 Jan 2024 12:00:00 GMT"}), self.etag, self.last_modified)
+        assert not is_not_modified(make_request({"if-modified-since": "Mon, 01 Jan 2024 11:59:59 GMT"}), self.etag, self.last_modified)
+        assert not is_not_modified(make_request({"if-modified-since": "garbage"}), self.etag, self.last_modified)
+
+    def test_no_validators(self):
+        """Test unconditional requests are always served."""
+        assert not is_not_modified(make_request({}), self.etag, self.last_modified)
+
+    def test_headers_and_304(self):
+        """Test validators and Cache-Control are emitted, including on 304."""
+        headers = cache_headers(self.etag, self.last_modified)
+        response = not_modified(self.etag, self.last_modified)
+
+        assert headers["Last-Modified"] == "Mon, 01 Jan 2024 12:00:00 GMT"
+        assert headers["Cache-Control"] == "private, no-cache"
+        assert response.status_code == 304
+        assert response.headers["etag"] == self.etag
+        assert response.body == b""
@@ -0,0 +1,64 @@
+"""
+Unit tests for core.indexes module.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from core.indexes import INDEX_REGISTRY, QUERY_SHAPES, ensure_indexes, find_collection_scans
+
+
+class TestFindCollectionScans:
+    """Test cases for find_collection_scans function."""
+
+    def test_index_scan(self):
+        """Test an indexed plan reports no collection scan."""
+        plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "user_id_1"}}
+
+        assert find_collection_scans(plan) == []
+
+    def test_collection_scan(self):
+        """Test a nested COLLSCAN is found."""
+        plan = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+
+        assert find_collection_scans(plan) == ["COLLSCAN"]
+
+    def test_collection_scan_in_or_branch(self):
+        """Test COLLSCAN inside multi-input stages is found."""
+        plan = {"stage": "OR", "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}
+
+        assert find_collection_scans(plan) == ["COLLSCAN"]
+
+
+class TestIndexRegistry:
+    """Test cases for the index registry."""
+
+    def test_responses_unique_per_form(self):
+        """Test responses are unique per user and form."""
+        index = INDEX_REGISTRY["responses"][0]
+
+        assert index["keys"] == [("user_id", 1), ("form_id", 1)]
+        assert index["unique"] is True
+
+    def test_users_unique_per_email(self):
+        """Test one user per email is enforced by the database."""
+        index = next(i for i in INDEX_REGISTRY["users"] if i["keys"] == [("email", 1)])
+
+        assert index["unique"] is True
+
+    def test_every_shape_has_registered_collection(self):
+        """Test every verified query shape targets an indexed collection."""
+        for shape in QUERY_SHAPES:
+            assert shape["collection"] in INDEX_REGISTRY or shape["collection"] == "jobs"
+
+    @pytest.mark.asyncio
+    async def test_ensure_indexes_reports_failures(self):
+        """Test a failing index is reported without aborting the rest."""
+        collection = MagicMock()
+        collection.create_index = AsyncMock(side_effect=[Exception("duplicate key")] + [None] * 100)
+
+        with patch("core.indexes.db_manager") as mock_manager:
+            mock_manager.get_collection.return_value = collection
+            failed = await ensure_indexes()
+
+        assert failed == ["users.user_id"]
+        assert collection.create_index.await_count == sum(len(v) for v in INDEX_REGISTRY.values())
@@ -0,0 +1,188 @@
+"""
+Unit tests for core.jobs module.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch, PropertyMock
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from core.jobs import JobQueue, JobWorker
+
+
+class TestJobQueue:
+    """Test cases for JobQueue class."""
+
+    @pytest.fixture
+    def mock_collection(self):
+        """Mock collection for testing."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def queue(self, mock_collection):
+        """Create JobQueue instance with mock collection."""
+        repo = JobQueue("test_jobs")
+        with patch.object(type(repo), 'collection', new_callable=PropertyMock) as mock_prop:
+            mock_prop.return_value = mock_collection
+            yield repo
+
+    @pytest.mark.asyncio
+    async def test_enqueue(self, queue, mock_collection):
+        """Test enqueue inserts a queued job holding the dedupe key."""
+        mock_collection.insert_one.return_value = MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011"))
+
+        job = await queue.enqueue("test.job", {"user_id": "u1"}, dedupe_key="test:u1")
+
+        inserted = mock_collection.insert_one.call_args[0][0]
+        assert inserted["status"] == "queued"
+        assert inserted["active_key"] == "test:u1"
+        assert job["_id"] == "507f1f77bcf86cd799439011"
+
+    @pytest.mark.asyncio
+    async def test_enqueue_deduplicated(self, queue, mock_collection):
+        """Test enqueue returns the active job when the dedupe key is taken."""
+        mock_collection.insert_one.side_effect = DuplicateKeyError("dup")
+        mock_collection.find_one.return_value = {"_id": ObjectId(), "payload": {"user_id": "u1"}}
+
+        job = await queue.enqueue("test.job", {"user_id": "u1"}, dedupe_key="test:u1")
+
+        mock_collection.find_one.assert_called_once_with({"active_key": "test:u1"})
+        assert job["deduplicated"] is True
+
+    @pytest.mark.asyncio
+    async def test_fail_schedules_retry(self, queue, mock_collection):
+        """Test a failure below max_attempts requeues with backoff."""
+        job = {"_id": "507f1f77bcf86cd799439011", "attempts": 1, "max_attempts": 3}
+        mock_collection.update_one.return_value = MagicMock(matched_count=1)
+
+        permanent = await queue.fail(job, "worker-1", "boom")
+
+        update = mock_collection.update_one.call_args[0][1]
+        assert permanent is False
+        assert update["$set"]["status"] == "queued"
+        assert "active_key" not in update["$unset"]
+
+    @pytest.mark.asyncio
+    async def test_fail_permanently(self, queue, mock_collection):
+        """Test the final attempt marks the job failed and releases the dedupe key."""
+        job = {"_id": "507f1f77bcf86cd799439011", "attempts": 3, "max_attempts": 3}
+        mock_collection.update_one.return_value = MagicMock(matched_count=1)
+
+        permanent = await queue.fail(job, "worker-1", "boom")
+
+        update = mock_collection.update_one.call_args[0][1]
+        assert permanent is True
+        assert update["$set"]["status"] == "failed"
+        assert "active_key" in update["$unset"]
+
+    @pytest.mark.asyncio
+    async def test_fail_after_lost_lease(self, queue, mock_collection):
+        """Test a worker that lost the lease does not report a permanent failure."""
+        job = {"_id": "507f1f77bcf86cd799439011", "attempts": 3, "max_attempts": 3}
+        mock_collection.update_one.return_value = MagicMock(matched_count=0)
+
+        permanent = await queue.fail(job, "worker-1", "boom")
+
+        assert permanent is False
+
+
+    @pytest.mark.asyncio
+    async def test_claim_skips_expired_jobs_without_attempts_left(self, queue, mock_collection):
+        """Test an expired lease is only reclaimed while attempts remain."""
+        mock_collection.find_one_and_update.return_value = None
+
+        await queue.claim("worker-1", ["test.job"])
+
+        expired_branch = mock_collection.find_one_and_update.call_args[0][0]["$or"][1]
+        assert expired_branch["$expr"] == {"$lt": ["$attempts", "$max_attempts"]}
+
+    @pytest.mark.asyncio
+    async def test_dead_letter_expired(self, queue, mock_collection):
+        """Test an exhausted job with an expired lease is failed and its dedupe key released."""
+        mock_collection.find_one_and_update.return_value = {"_id": ObjectId(), "type": "test.job", "payload": {}}
+
+        job = await queue.dead_letter_expired(["test.job"])
+
+        query, update = mock_collection.find_one_and_update.call_args[0]
+        assert query["$expr"] == {"$gte": ["$attempts", "$max_attempts"]}
+        assert update["$set"]["status"] == "failed"
+        assert "active_key" in update["$unset"]
+        assert isinstance(job["_id"], str)
+
+
+class TestJobWorker:
+    """Test cases for JobWorker class."""
+
+    @pytest.fixture
+    def mock_queue(self):
+        """Mock job queue."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def job(self):
+        """Sample claimed job."""
+        return {"_id": "507f1f77bcf86cd799439011", "type": "test.job", "payload": {"user_id": "u1"}, "attempts": 1}
+
+    @pytest.mark.asyncio
+    async def test_execute_success(self, mock_queue, job):
+        """Test a successful handler completes the job."""
+        worker = JobWorker(mock_queue, concurrency=1)
+        handler = AsyncMock()
+        worker.register("test.job", handler)
+
+        await worker._execute(job)
+
+        handler.assert_awaited_once_with({"user_id": "u1"})
+        mock_queue.complete.assert_awaited_once_with(job["_id"], worker.worker_id)
+
+    @pytest.mark.asyncio
+    async def test_execute_permanent_failure_runs_hook(self, mock_queue, job):
+        """Test the failure hook runs only once retries are exhausted."""
+        worker = JobWorker(mock_queue, concurrency=1)
+        on_failure = AsyncMock()
+        worker.register("test.job", AsyncMock(side_effect=Exception("boom")), on_failure=on_failure)
+        mock_queue.fail.return_value = True
+
+        await worker._execute(job)
+
+        mock_queue.complete.assert_not_called()
+        on_failure.assert_awaited_once_with({"user_id": "u1"}, "boom")
+
+    @pytest.mark.asyncio
+    async def test_execute_retryable_failure_skips_hook(self, mock_queue, job):
+        """Test the failure hook does not run while retries remain."""
+        worker = JobWorker(mock_queue, concurrency=1)
+        on_failure = AsyncMock()
+        worker.register("test.job", AsyncMock(side_effect=Exception("boom")), on_failure=on_failure)
+        mock_queue.fail.return_value = False
+
+        await worker._execute(job)
+
+        on_failure.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_survives_transient_errors(self, mock_queue):
+        """Test a failed renewal is logged and the lease keeps being renewed."""
+        worker = JobWorker(mock_queue, concurrency=1)
+        mock_queue.heartbeat.side_effect = [Exception("network blip"), True, False]
+
+        with patch('core.jobs.settings') as mock_settings, patch('core.jobs.asyncio.sleep', new=AsyncMock()):
+            mock_settings.job_lease_seconds = 3
+            await worker._heartbeat("507f1f77bcf86cd799439011")
+
+        assert mock_queue.heartbeat.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_dead_letter_runs_failure_hook(self, mock_queue):
+        """Test jobs dead-lettered after crashing their workers still run the failure hook."""
+        worker = JobWorker(mock_queue, concurrency=1)
+        on_failure = AsyncMock()
+        worker.register("test.job", AsyncMock(), on_failure=on_failure)
+        mock_queue.dead_letter_expired.side_effect = [
+            {"_id": "507f1f77bcf86cd799439011", "type": "test.job", "payload": {"user_id": "u1"}},
+            None
+        ]
+
+        await worker._dead_letter_expired()
+
+        on_failure.assert_awaited_once()
+        assert on_failure.await_args.args[0] == {"user_id": "u1"}
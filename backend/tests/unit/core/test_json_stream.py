@@ -0,0 +1,52 @@
+"""
+Unit tests for core.json_stream module.
+"""
+import json
+
+from core.json_stream import JSONArrayStreamParser
+
+
+class TestJSONArrayStreamParser:
+    """Test cases for JSONArrayStreamParser class."""
+
+    def feed_in_chunks(self, parser, text, size):
+        """Feed ``text`` in fixed-size chunks, recording items per chunk."""
+        results = []
+        for i in range(0, len(text), size):
+            results.append(parser.feed(text[i:i + size]))
+        return results
+
+    def test_items_emitted_as_they_close(self):
+        """Test each object is returned by the chunk that closes it."""
+        parser = JSONArrayStreamParser("recommendations")
+
+        assert parser.feed('{"recommendations": [{"name": "A", "tags": ["x"]}') == [{"name": "A", "tags": ["x"]}]
+        assert parser.feed(', {"name": "B"') == []
+        assert parser.feed('}]}') == [{"name": "B"}]
+        assert parser.done
+
+    def test_braces_inside_strings_ignored(self):
+        """Test braces, brackets and escaped quotes inside strings do not end an item."""
+        items = [{"name": 'Tricky "}]" name', "notes": ["{", "\\"]}, {"name": "Next"}]
+        text = json.dumps({"recommendations": items})
+        parser = JSONArrayStreamParser("recommendations")
+
+        results = self.feed_in_chunks(parser, text, 3)
+
+        assert [item for chunk in results for item in chunk] == items
+
+    def test_key_split_across_chunks(self):
+        """Test the array is found when its key arrives in pieces."""
+        parser = JSONArrayStreamParser("recommendations")
+
+        results = self.feed_in_chunks(parser, '{"meta": {}, "recommend' + 'ations" : [{"a": 1}]}', 5)
+
+        assert [item for chunk in results for item in chunk] == [{"a": 1}]
+        assert parser.text.endswith("]}")
+
+    def test_missing_key_yields_nothing(self):
+        """Test nothing is emitted when the document has no such array."""
+        parser = JSONArrayStreamParser("recommendations")
+
+        assert parser.feed('[{"a": 1}]') == []
+        assert not parser.done
@@ -0,0 +1,185 @@
+"""
+Unit tests for core.llm module.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from core.llm import BATCH, INTERACTIVE, LLMCapacityError, LLMClient, LLMScheduler
+from core.telemetry import LLMTelemetry
+
+
+class TestLLMClient:
+    """Test cases for LLMClient class."""
+
+    @pytest.fixture
+    def mock_openai(self):
+        """Mock AsyncOpenAI client."""
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Hello"
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_client.responses.create = AsyncMock(return_value=MagicMock(output_text="[]"))
+        mock_client.close = AsyncMock()
+        return mock_client
+
+    @pytest.fixture
+    def llm(self, mock_openai):
+        """Create LLMClient instance with mock OpenAI client."""
+        client = LLMClient()
+        client._client = mock_openai
+        return client
+
+    def test_client_created_lazily_once(self):
+        """Test the underlying client is created on first use and reused."""
+        client = LLMClient()
+        assert client._client is None
+
+        first = client.client
+        second = client.client
+
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_chat_text(self, llm, mock_openai):
+        """Test chat_text awaits the async client and returns content."""
+        messages = [{"role": "user", "content": "Hi"}]
+
+        result = await llm.chat_text(model="gpt-4o", messages=messages, max_tokens=10)
+
+        mock_openai.chat.completions.create.assert_awaited_once_with(
+            model="gpt-4o", messages=messages, max_tokens=10
+        )
+        assert result == "Hello"
+
+    @pytest.mark.asyncio
+    async def test_usage_recorded_per_model(self, llm, mock_openai):
+        """Test provider-reported tokens are added to the per-model totals."""
+        mock_openai.chat.completions.create.return_value.usage = MagicMock(prompt_tokens=120, completion_tokens=30)
+        mock_openai.responses.create.return_value.usage = MagicMock(input_tokens=50, output_tokens=5, spec=["input_tokens", "output_tokens"])
+
+        await llm.chat_text(model="gpt-4o", messages=[])
+        await llm.chat_text(model="gpt-4o", messages=[])
+        await llm.create_response(model="gpt-4.1", input=[])
+
+        assert llm.token_usage["gpt-4o"] == {"calls": 2, "prompt_tokens": 240, "completion_tokens": 60}
+        assert llm.token_usage["gpt-4.1"] == {"calls": 1, "prompt_tokens": 50, "completion_tokens": 5}
+
+    @pytest.mark.asyncio
+    async def test_stream_requests_and_records_usage(self, llm, mock_openai):
+        """Test streams ask for usage and record it from the final chunk."""
+        content_chunk = MagicMock(usage=None)
+        content_chunk.choices = [MagicMock()]
+        content_chunk.choices[0].delta.content = "Hi"
+        usage_chunk = MagicMock(choices=[], usage=MagicMock(prompt_tokens=10, completion_tokens=1))
+
+        async def stream():
+            for chunk in (content_chunk, usage_chunk):
+                yield chunk
+
+        mock_openai.chat.completions.create = AsyncMock(return_value=stream())
+
+        tokens = [token async for token in llm.stream_chat_text(model="gpt-4o", messages=[])]
+
+        assert tokens == ["Hi"]
+        assert mock_openai.chat.completions.create.call_args.kwargs["stream_options"] == {"include_usage": True}
+        assert llm.token_usage["gpt-4o"]["prompt_tokens"] == 10
+
+    @pytest.mark.asyncio
+    async def test_call_site_tracked_not_forwarded(self, llm, mock_openai):
+        """Test the call site labels telemetry and is not sent to the provider."""
+        with patch("core.llm.llm_telemetry", LLMTelemetry()) as telemetry:
+            await llm.chat_text(model="gpt-4o", messages=[], call_site="profile")
+
+        assert "call_site" not in mock_openai.chat.completions.create.call_args.kwargs
+        assert telemetry.calls[("gpt-4o", "profile", "ok")] == 1
+
+    @pytest.mark.asyncio
+    async def test_create_response(self, llm, mock_openai):
+        """Test create_response forwards to the Responses API."""
+        result = await llm.create_response(model="gpt-4.1", input=[], tools=[])
+
+        mock_openai.responses.create.assert_awaited_once_with(model="gpt-4.1", input=[], tools=[])
+        assert result.output_text == "[]"
+
+    @pytest.mark.asyncio
+    async def test_close(self, llm, mock_openai):
+        """Test close releases the connection pool."""
+        await llm.close()
+
+        mock_openai.close.assert_awaited_once()
+        assert llm._client is None
+
+    @pytest.mark.asyncio
+    async def test_calls_hold_a_slot_in_their_pool(self, llm, mock_openai):
+        """Test a batch call occupies a batch slot only while it runs."""
+        in_flight = []
+
+        async def create(**kwargs):
+            in_flight.append(llm.scheduler.stats()["pools"][BATCH]["in_flight"])
+            return MagicMock()
+
+        mock_openai.chat.completions.create = AsyncMock(side_effect=create)
+
+        await llm.chat_completion(model="gpt-4o", messages=[], pool=BATCH)
+
+        assert in_flight == [1]
+        assert llm.scheduler.stats()["pools"][BATCH]["in_flight"] == 0
+
+
+class TestLLMScheduler:
+    """Test cases for LLMScheduler class."""
+
+    @pytest.fixture
+    def scheduler(self):
+        """Two slots, one reserved for interactive calls."""
+        return LLMScheduler(capacity=2, interactive_reserved=1, max_wait_seconds={INTERACTIVE: 1, BATCH: 1})
+
+    @pytest.mark.asyncio
+    async def test_batch_cannot_use_reserved_slot(self, scheduler):
+        """Test batch calls leave the reserved slot free for interactive calls."""
+        await scheduler.acquire(BATCH)
+        scheduler.max_wait_seconds[BATCH] = 0.05
+
+        with pytest.raises(LLMCapacityError):
+            await scheduler.acquire(BATCH)
+
+        await scheduler.acquire(INTERACTIVE)
+        stats = scheduler.stats()
+        assert stats["pools"][BATCH]["in_flight"] == 1
+        assert stats["pools"][BATCH]["rejected"] == 1
+        assert stats["pools"][INTERACTIVE]["in_flight"] == 1
+
+    @pytest.mark.asyncio
+    async def test_interactive_waiters_admitted_first(self, scheduler):
+        """Test a freed slot goes to a waiting interactive call before a waiting batch call."""
+        await scheduler.acquire(INTERACTIVE)
+        await scheduler.acquire(INTERACTIVE)
+        order = []
+
+        async def call(pool):
+            async with scheduler.slot(pool):
+                order.append(pool)
+
+        batch_task = asyncio.create_task(call(BATCH))
+        await asyncio.sleep(0)
+        interactive_task = asyncio.create_task(call(INTERACTIVE))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["pools"][BATCH]["queued"] == 1
+        assert scheduler.stats()["pools"][INTERACTIVE]["queued"] == 1
+
+        scheduler.release(INTERACTIVE)
+        scheduler.release(INTERACTIVE)
+        await asyncio.gather(batch_task, interactive_task)
+
+        assert order == [INTERACTIVE, BATCH]
+
+    @pytest.mark.asyncio
+    async def test_slot_released_on_error(self, scheduler):
+        """Test a failing call gives its slot back."""
+        with pytest.raises(ValueError):
+            async with scheduler.slot(INTERACTIVE):
+                raise ValueError("boom")
+
+        assert scheduler.stats()["pools"][INTERACTIVE]["in_flight"] == 0
@@ -0,0 +1,52 @@
+"""
+Unit tests for core.responses module.
+"""
+from datetime import datetime
+import json
+
+import pytest
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from core.responses import FastJSONResponse
+
+
+class Item(BaseModel):
+    name: str
+    score: int
+
+
+class TestFastJSONResponse:
+    """Test cases for FastJSONResponse class."""
+
+    def test_serializes_nested_object_ids(self):
+        """Test ObjectIds are stringified anywhere in the document."""
+        oid = ObjectId()
+        response = FastJSONResponse({"_id": oid, "items": [{"ref": oid}]})
+
+        assert json.loads(response.body) == {"_id": str(oid), "items": [{"ref": str(oid)}]}
+        assert response.media_type == "application/json"
+
+    def test_datetimes_match_jsonable_encoder(self):
+        """Test datetimes render the same as the default FastAPI encoder."""
+        doc = {"updated_at": datetime(2024, 1, 1, 12, 30, 15, 123456)}
+
+        assert json.loads(FastJSONResponse(doc).body) == jsonable_encoder(doc)
+
+    def test_serializes_pydantic_models(self):
+        """Test models embedded in the content are dumped."""
+        response = FastJSONResponse({"items": [Item(name="a", score=1)]})
+
+        assert json.loads(response.body) == {"items": [{"name": "a", "score": 1}]}
+
+    def test_headers_are_kept(self):
+        """Test explicitly passed headers are set on the response."""
+        response = FastJSONResponse([], headers={"ETag": '"abc"'})
+
+        assert response.headers["etag"] == '"abc"'
+
+    def test_unsupported_type_raises(self):
+        """Test unknown types fail loudly instead of being dropped."""
+        with pytest.raises(TypeError):
+            FastJSONResponse({"value": object()})
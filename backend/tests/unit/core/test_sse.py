@@ -0,0 +1,60 @@
+"""
+Unit tests for core.sse module.
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.events import event_bus
+from core.sse import format_sse_event, status_events, status_recheck_seconds
+
+
+class TestFormatSSEEvent:
+    """Test cases for format_sse_event function."""
+
+    def test_named_event(self):
+        """Test the event name precedes the JSON data line."""
+        assert format_sse_event({"a": 1}, event="status") == 'event: status\ndata: {"a": 1}\n\n'
+
+
+class TestStatusRecheckSeconds:
+    """Test cases for status_recheck_seconds function."""
+
+    def test_short_poll_without_change_streams(self):
+        """Test streams poll quickly when other processes cannot publish to them."""
+        with patch('core.sse.settings') as mock_settings:
+            mock_settings.status_change_streams = False
+            mock_settings.status_stream_poll_seconds = 1
+            mock_settings.status_stream_recheck_seconds = 15
+            assert status_recheck_seconds() == 1
+
+    def test_safety_net_with_change_streams(self):
+        """Test the long re-check applies once writes from every process are relayed."""
+        with patch('core.sse.settings') as mock_settings:
+            mock_settings.status_change_streams = True
+            mock_settings.status_stream_poll_seconds = 1
+            mock_settings.status_stream_recheck_seconds = 15
+            assert status_recheck_seconds() == 15
+
+
+class TestStatusEvents:
+    """Test cases for status_events function."""
+
+    @pytest.mark.asyncio
+    async def test_pushes_transitions_until_terminal(self):
+        """Test a published event triggers a re-read and the stream ends on a terminal status."""
+        fetch_status = AsyncMock(side_effect=[{"status": "generating"}, {"status": "completed"}])
+        stream = status_events("profile:user123", fetch_status)
+
+        first = await stream.__anext__()
+        next_frame = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        event_bus.publish("profile:user123", {"status": "completed"})
+        second = await next_frame
+
+        assert json.loads(first.split("data: ")[1]) == {"status": "generating"}
+        assert json.loads(second.split("data: ")[1]) == {"status": "completed"}
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        assert event_bus.subscriber_count() == 0
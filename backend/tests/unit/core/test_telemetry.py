@@ -0,0 +1,122 @@
+"""
+Unit tests for core.telemetry module.
+"""
+import asyncio
+import pytest
+
+from core.telemetry import (
+    Histogram, LLMTelemetry, _current_call, count_attempt, estimate_cost, track_generation
+)
+
+
+class TestHistogram:
+    """Test cases for Histogram class."""
+
+    def test_buckets_are_cumulative(self):
+        """Test each observation counts in every bucket at or above it."""
+        histogram = Histogram((1.0, 5.0, 10.0))
+        for value in (0.5, 3.0, 3.0, 20.0):
+            histogram.observe(value)
+
+        assert histogram.counts == [1, 3, 3]
+        assert histogram.count == 4
+        assert histogram.sum == 26.5
+
+    def test_quantile_returns_bucket_bound(self):
+        """Test quantiles resolve to the bound of the bucket holding the rank."""
+        histogram = Histogram((1.0, 5.0, 10.0))
+        for value in (0.5, 0.5, 3.0, 8.0):
+            histogram.observe(value)
+
+        assert histogram.quantile(0.5) == 1.0
+        assert histogram.quantile(0.95) == 10.0
+        assert Histogram((1.0,)).quantile(0.5) is None
+
+
+class TestLLMTelemetry:
+    """Test cases for LLMTelemetry class."""
+
+    @pytest.fixture
+    def telemetry(self):
+        """Fresh telemetry registry."""
+        return LLMTelemetry()
+
+    def test_track_records_successful_call(self, telemetry):
+        """Test tokens, cost and outcome are recorded per model and call site."""
+        with telemetry.track("gpt-4o", "profile") as call:
+            call.usage(1000, 200)
+
+        assert telemetry.calls[("gpt-4o", "profile", "ok")] == 1
+        assert telemetry.tokens[("gpt-4o", "profile", "prompt")] == 1000
+        assert telemetry.tokens[("gpt-4o", "profile", "completion")] == 200
+        assert telemetry.cost[("gpt-4o", "profile")] == pytest.approx(0.0045)
+        assert telemetry.duration[("gpt-4o", "profile")].count == 1
+        assert ("gpt-4o", "profile") not in telemetry.ttft
+
+    def test_track_records_errors_and_reraises(self, telemetry):
+        """Test a failing call is counted as an error and the exception propagates."""
+        with pytest.raises(RuntimeError):
+            with telemetry.track("gpt-4o", "mentor_chat"):
+                raise RuntimeError("boom")
+
+        assert telemetry.calls[("gpt-4o", "mentor_chat", "error")] == 1
+
+    def test_track_records_first_token(self, telemetry):
+        """Test streams record time to first token."""
+        with telemetry.track("gpt-4o", "mentor_chat") as call:
+            call.first_token()
+
+        assert telemetry.ttft[("gpt-4o", "mentor_chat")].count == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_counted_from_http_attempts(self, telemetry):
+        """Test every HTTP attempt beyond the first counts as a retry."""
+        with telemetry.track("gpt-4o", "profile") as call:
+            assert _current_call.get() is call
+            for _ in range(3):
+                await count_attempt(object())
+
+        assert _current_call.get() is None
+        assert telemetry.retries[("gpt-4o", "profile")] == 2
+
+    def test_unpriced_model_has_no_cost(self):
+        """Test models missing from the price table are not assigned a cost."""
+        assert estimate_cost("unknown-model", 1000, 1000) is None
+
+    def test_render_prometheus(self, telemetry):
+        """Test the text exposition includes counters and histogram series."""
+        with telemetry.track("gpt-4o", "profile") as call:
+            call.usage(10, 5)
+
+        text = telemetry.render_prometheus()
+
+        assert "# TYPE llm_calls_total counter" in text
+        assert 'llm_calls_total{model="gpt-4o",call_site="profile",outcome="ok"} 1' in text
+        assert 'llm_tokens_total{model="gpt-4o",call_site="profile",kind="prompt"} 10' in text
+        assert 'llm_call_duration_seconds_bucket{model="gpt-4o",call_site="profile",le="+Inf"} 1' in text
+        assert 'llm_call_duration_seconds_count{model="gpt-4o",call_site="profile"} 1' in text
+        assert text.endswith("\n")
+
+
+class TestTrackGeneration:
+    """Test cases for track_generation."""
+
+    @pytest.mark.asyncio
+    async def test_breakdown_includes_concurrent_tasks(self):
+        """Test calls made in tasks spawned inside the block are aggregated per call site."""
+        telemetry = LLMTelemetry()
+
+        async def call(site: str):
+            with telemetry.track("gpt-4o", site) as tracked:
+                tracked.usage(100, 10)
+
+        with track_generation() as usage:
+            await asyncio.gather(call("profile_sections"), call("profile_sections"), call("college_links"))
+        with telemetry.track("gpt-4o", "profile_sections"):
+            pass
+
+        assert set(usage) == {"profile_sections", "college_links"}
+        assert usage["profile_sections"]["calls"] == 2
+        assert usage["profile_sections"]["prompt_tokens"] == 200
+        assert usage["profile_sections"]["errors"] == 0
+        assert usage["college_links"]["cost_usd"] == pytest.approx(0.00035)
@@ -0,0 +1,79 @@
+"""
+Unit tests for core.tokens module.
+"""
+from unittest.mock import MagicMock, patch
+
+from core.tokens import (
+    _encoding, allocate_token_caps, count_message_tokens, count_tokens, fit_history, truncate_to_tokens,
+    CHARS_PER_TOKEN, ELLIPSIS
+)
+
+
+class TestTokenCounting:
+    """Test cases for token counting and truncation."""
+
+    def test_count_tokens(self):
+        """Test empty text is free and longer text costs more."""
+        assert count_tokens("") == 0
+        assert 0 < count_tokens("hello world") < count_tokens("hello world " * 50)
+
+    def test_encoding_load_failure_falls_back_to_estimate(self):
+        """Test an encoding download failure degrades to the character estimate."""
+        failing = MagicMock()
+        failing.encoding_for_model.side_effect = OSError("network unreachable")
+        _encoding.cache_clear()
+        try:
+            with patch('core.tokens.tiktoken', failing):
+                assert count_tokens("a" * 35, "gpt-4o") == 35 / CHARS_PER_TOKEN
+        finally:
+            _encoding.cache_clear()
+
+    def test_count_message_tokens_includes_framing(self):
+        """Test each message adds framing overhead on top of its content."""
+        messages = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": None}]
+
+        assert count_message_tokens(messages) > count_tokens("hi")
+
+    def test_truncate_to_tokens(self):
+        """Test long text is cut within budget and marked; short text is untouched."""
+        text = "word " * 400
+
+        truncated = truncate_to_tokens(text, 20)
+
+        assert truncated.endswith(ELLIPSIS)
+        assert count_tokens(truncated) <= 22
+        assert truncate_to_tokens("short", 20) == "short"
+        assert truncate_to_tokens("anything", 0) == ""
+
+
+class TestAllocateTokenCaps:
+    """Test cases for allocate_token_caps function."""
+
+    def test_fits_without_trimming(self):
+        """Test sizes within budget are kept."""
+        assert allocate_token_caps([5, 10], 20) == [5, 10]
+
+    def test_long_items_trimmed_first(self):
+        """Test short items stay whole and the long ones share what remains."""
+        caps = allocate_token_caps([5, 100, 300], 105)
+
+        assert caps == [5, 50, 50]
+        assert sum(caps) <= 105
+
+
+class TestFitHistory:
+    """Test cases for fit_history function."""
+
+    def test_drops_oldest_messages(self):
+        """Test the newest messages are kept within the budget."""
+        history = [{"role": "user", "content": f"message {i} " + "word " * 50} for i in range(5)]
+
+        fitted = fit_history(history, budget=2 * (count_tokens(history[0]["content"]) + 4))
+
+        assert fitted == history[-2:]
+
+    def test_always_keeps_newest(self):
+        """Test the latest message survives even when it alone exceeds the budget."""
+        history = [{"role": "user", "content": "word " * 100}]
+
+        assert fit_history(history, budget=5) == history
@@ -0,0 +1,110 @@
+"""
+Unit tests for AIService.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.ai_service import AIService, MENTOR_FALLBACK_RESPONSE
+from core.exceptions import ExternalServiceError
+
+
+class TestAIService:
+    """Test cases for AIService."""
+
+    @pytest.fixture
+    def mock_llm(self):
+        """Mock shared LLM client."""
+        return MagicMock()
+
+    @pytest.fixture
+    def ai_service(self, mock_llm):
+        """Create AIService instance with mock LLM client."""
+        service = AIService()
+        service.llm = mock_llm
+        return service
+
+    def test_build_mentor_messages_keeps_unsummarized_history(self, ai_service):
+        """Test every unsummarized message is sent while it fits the token budget."""
+        history = [{"role": "user", "content": f"msg {i}"} for i in range(15)]
+
+        messages = ai_service.build_mentor_messages("Hi", history)
+
+        assert messages[0]["role"] == "system"
+        assert messages[1]["content"] == "msg 0"
+        assert messages[-1] == {"role": "user", "content": "Hi"}
+        assert len(messages) == 17
+
+    def test_build_mentor_messages_student_context_prefix(self, ai_service):
+        """Test the student context is part of the leading system message, identical across turns."""
+        first = ai_service.build_mentor_messages("Hi", [], student_context="- Core: curious")
+        second = ai_service.build_mentor_messages("Next", [{"role": "user", "content": "Hi"}], student_context="- Core: curious")
+
+        assert "- Core: curious" in first[0]["content"]
+        assert first[0] == second[0]
+
+    @pytest.mark.asyncio
+    async def test_get_student_context_prefers_profile_summary(self, ai_service):
+        """Test the cached profile summary is used when a profile exists."""
+        with patch('services.ai_service.profile_service') as mock_profiles, \
+                patch('services.ai_service.student_context_service') as mock_context:
+            mock_profiles.get_chat_summary = AsyncMock(return_value="- Core: curious")
+            mock_context.get = AsyncMock()
+
+            assert await ai_service.get_student_context("user") == "- Core: curious"
+            mock_context.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_student_context_falls_back_to_answers(self, ai_service):
+        """Test form answers are used, truncated to the budget, before a profile exists."""
+        with patch('services.ai_service.profile_service') as mock_profiles, \
+                patch('services.ai_service.student_context_service') as mock_context, \
+                patch('services.ai_service.settings') as mock_settings:
+            mock_profiles.get_chat_summary = AsyncMock(return_value=None)
+            mock_context.get = AsyncMock(return_value={"responses": [{}], "text": "word " * 1000})
+            mock_settings.chat_profile_max_tokens = 10
+
+            context = await ai_service.get_student_context("user")
+
+        assert len(context) <= 41
+
+    @pytest.mark.asyncio
+    async def test_get_student_context_failure(self, ai_service):
+        """Test context errors degrade to an unpersonalized turn."""
+        with patch('services.ai_service.profile_service') as mock_profiles:
+            mock_profiles.get_chat_summary = AsyncMock(side_effect=Exception("db down"))
+
+            assert await ai_service.get_student_context("user") is None
+
+    @pytest.mark.asyncio
+    async def test_generate_mentor_response_fallback(self, ai_service, mock_llm):
+        """Test fallback message is returned when the model call fails."""
+        mock_llm.chat_text = AsyncMock(side_effect=Exception("boom"))
+
+        result = await ai_service.generate_mentor_response("Hi", [])
+
+        assert result == MENTOR_FALLBACK_RESPONSE
+
+    @pytest.mark.asyncio
+    async def test_stream_mentor_response(self, ai_service, mock_llm):
+        """Test tokens are forwarded as they are produced."""
+        async def fake_stream(**kwargs):
+            for token in ["Hel", "lo"]:
+                yield token
+
+        mock_llm.stream_chat_text = fake_stream
+
+        tokens = [token async for token in ai_service.stream_mentor_response("Hi", [])]
+
+        assert tokens == ["Hel", "lo"]
+
+    @pytest.mark.asyncio
+    async def test_stream_mentor_response_error(self, ai_service, mock_llm):
+        """Test streaming errors surface as ExternalServiceError."""
+        async def failing_stream(**kwargs):
+            raise Exception("boom")
+            yield
+
+        mock_llm.stream_chat_text = failing_stream
+
+        with pytest.raises(ExternalServiceError):
+            [token async for token in ai_service.stream_mentor_response("Hi", [])]
@@ -0,0 +1,108 @@
+"""
+Unit tests for ConversationMemoryService.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services.conversation_memory_service import ConversationMemoryService
+
+
+def messages(count):
+    """Serialized message documents, oldest first."""
+    return [
+        {"_id": str(ObjectId()), "role": "user" if i % 2 == 0 else "assistant", "content": f"msg {i}"}
+        for i in range(count)
+    ]
+
+
+class TestConversationMemoryService:
+    """Test cases for ConversationMemoryService."""
+
+    @pytest.fixture
+    def mock_settings(self):
+        """Small window and batch sizes."""
+        with patch('services.conversation_memory_service.settings') as mock_settings:
+            mock_settings.chat_history_messages = 4
+            mock_settings.chat_summary_batch_messages = 6
+            mock_settings.chat_summary_max_tokens = 200
+            yield mock_settings
+
+    @pytest.fixture
+    def memory_service(self, mock_settings):
+        """ConversationMemoryService with mock repositories and LLM client."""
+        service = ConversationMemoryService()
+        service.llm = MagicMock()
+        service.llm.chat_text = AsyncMock(return_value=" The student wants to study biology. ")
+        service.messages_repository = MagicMock()
+        service.summaries_repository = MagicMock()
+        service.summaries_repository.update_one = AsyncMock(return_value=True)
+        service.summaries_repository.collection.insert_one = AsyncMock()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_load_reads_summary_and_unsummarized_messages(self, memory_service):
+        """Test a turn reads the summary and every message past it, newest-first query returned oldest first."""
+        recent = messages(4)
+        through = ObjectId()
+        memory_service.summaries_repository.find_one = AsyncMock(return_value={"summary": "Earlier talk", "summarized_through": through})
+        memory_service.messages_repository.find_many = AsyncMock(return_value=list(reversed(recent)))
+
+        memory = await memory_service.load("c1")
+
+        assert memory["summary"] == "Earlier talk"
+        assert [m["content"] for m in memory["recent"]] == ["msg 0", "msg 1", "msg 2", "msg 3"]
+        query, kwargs = memory_service.messages_repository.find_many.call_args.args[0], memory_service.messages_repository.find_many.call_args.kwargs
+        assert query["_id"] == {"$gt": through}
+        assert kwargs["limit"] == 10
+
+    @pytest.mark.asyncio
+    async def test_load_without_summary_keeps_messages_beyond_window(self, memory_service):
+        """Test messages not yet folded into a summary are still sent, not dropped."""
+        memory_service.summaries_repository.find_one = AsyncMock(return_value=None)
+        memory_service.messages_repository.find_many = AsyncMock(return_value=list(reversed(messages(9))))
+
+        memory = await memory_service.load("c1")
+
+        assert memory["summary"] is None
+        assert len(memory["recent"]) == 9
+        assert "_id" not in memory_service.messages_repository.find_many.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_summarize_waits_for_a_full_batch(self, memory_service):
+        """Test nothing is summarized until a batch has left the recent window."""
+        memory_service.summaries_repository.find_one = AsyncMock(return_value=None)
+        memory_service.messages_repository.find_many = AsyncMock(return_value=messages(9))
+
+        assert await memory_service.summarize("c1") is False
+        memory_service.llm.chat_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_summarize_folds_messages_outside_window(self, memory_service):
+        """Test older messages are folded and the boundary is set to the last folded one."""
+        pending = messages(10)
+        memory_service.summaries_repository.find_one = AsyncMock(return_value=None)
+        memory_service.messages_repository.find_many = AsyncMock(return_value=pending)
+
+        assert await memory_service.summarize("c1") is True
+
+        prompt = memory_service.llm.chat_text.call_args.kwargs["messages"][1]["content"]
+        assert "msg 5" in prompt and "msg 6" not in prompt
+        stored = memory_service.summaries_repository.collection.insert_one.call_args.args[0]
+        assert stored["summary"] == "The student wants to study biology."
+        assert stored["summarized_through"] == ObjectId(pending[5]["_id"])
+
+    @pytest.mark.asyncio
+    async def test_summarize_advances_from_read_boundary(self, memory_service):
+        """Test an existing summary is only advanced from the boundary that was read."""
+        through = ObjectId()
+        memory_service.summaries_repository.find_one = AsyncMock(
+            return_value={"summary": "Earlier", "summarized_through": through}
+        )
+        memory_service.messages_repository.find_many = AsyncMock(return_value=messages(10))
+
+        await memory_service.summarize("c1")
+
+        assert memory_service.messages_repository.find_many.call_args.args[0]["_id"] == {"$gt": through}
+        filter_dict = memory_service.summaries_repository.update_one.call_args.args[0]
+        assert filter_dict == {"conversationId": "c1", "summarized_through": through}
@@ -0,0 +1,230 @@
+"""
+Unit tests for ProfileService.
+"""
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.profile_service import (
+    ProfileService, PROFILE_PROMPT_VERSION, PROFILE_SECTION_ORDER, SECTION_GROUPS, affected_sections,
+    answer_fingerprints, build_profile_summary, changed_answers, merge_profile_sections
+)
+
+
+def response_doc(form_id, *answers):
+    """Response document with (question_id, answer) pairs."""
+    return {
+        "form_id": form_id,
+        "responses": [
+            {"question_id": qid, "question_text": f"Question {qid}", "answer": answer}
+            for qid, answer in answers
+        ]
+    }
+
+
+def section(section_id, content="text"):
+    """Profile section stub."""
+    return {"section_id": section_id, "title": section_id, "type": "paragraph", "content": content}
+
+
+class TestChangeDetection:
+    """Test cases for answer fingerprinting and section mapping."""
+
+    def test_changed_answers(self):
+        """Test edited, added and removed answers are all reported."""
+        before = answer_fingerprints([response_doc("introduction", ("1", "a"), ("2", "b"))])
+        after = answer_fingerprints([
+            response_doc("introduction", ("1", "a"), ("3", "c")),
+            response_doc("college_preferences", ("1", "urban"))
+        ])
+
+        assert changed_answers(before, after) == {
+            ("introduction", "2"), ("introduction", "3"), ("college_preferences", "1")
+        }
+
+    def test_affected_sections_for_one_form(self):
+        """Test a change in one form maps to its sections plus the holistic ones."""
+        sections = affected_sections({("college_preferences", "4")})
+
+        assert sections == ["core_snapshot", "college_fit", "future_aspiration", "final_insight", "advising_notes"]
+
+    def test_affected_sections_unknown_form(self):
+        """Test unmapped forms require a full regeneration."""
+        assert affected_sections({("new_form", "1")}) is None
+        assert affected_sections(set()) == []
+
+    def test_merge_profile_sections(self):
+        """Test sections are replaced in place and new ones land in display order."""
+        previous = [section("core_snapshot"), section("college_fit"), section("final_insight")]
+        updated = [section("college_fit", "new"), section("future_aspiration")]
+
+        merged = merge_profile_sections(previous, updated)
+
+        assert [s["section_id"] for s in merged] == ["core_snapshot", "college_fit", "future_aspiration", "final_insight"]
+        assert merged[1]["content"] == "new"
+
+
+class TestChatSummary:
+    """Test cases for the compact chat summary of a profile."""
+
+    def test_summary_flattens_sections(self):
+        """Test bullets and tables collapse to one line per section, skipping placeholders."""
+        profile = {"student_profile": {"student_profile": [
+            section("core_snapshot", "You are  curious."),
+            {"section_id": "academic_profile", "title": "Academics", "type": "bullets", "content": ["GPA 3.9", "Loves math"]},
+            {"section_id": "college_fit", "title": "Fit", "type": "table", "content": {"Size": "Small"}},
+            section("error")
+        ]}}
+
+        summary = build_profile_summary(profile, max_tokens=600)
+
+        assert summary.splitlines() == [
+            "- core_snapshot: You are curious.",
+            "- Academics: GPA 3.9; Loves math",
+            "- Fit: Size: Small"
+        ]
+
+    def test_summary_respects_budget(self):
+        """Test long profiles are cut to the token budget."""
+        profile = {"student_profile": {"student_profile": [
+            section(section_id, "word " * 500) for section_id in PROFILE_SECTION_ORDER
+        ]}}
+
+        summary = build_profile_summary(profile, max_tokens=300)
+
+        assert len(summary) <= 300 * 4
+
+    def test_summary_empty_profile(self):
+        """Test a profile without sections has no summary."""
+        assert build_profile_summary({"student_profile": None}, max_tokens=600) is None
+
+
+class TestProfileService:
+    """Test cases for ProfileService incremental generation."""
+
+    @pytest.fixture
+    def mock_llm(self):
+        """Mock shared LLM client."""
+        llm = MagicMock()
+        llm.chat_text = AsyncMock()
+        return llm
+
+    @pytest.fixture
+    def profile_service(self, mock_llm):
+        """Create ProfileService instance with a mock LLM client and repositories."""
+        service = ProfileService()
+        service.llm = mock_llm
+        service.profile_generations_repository = MagicMock()
+        return service
+
+    @pytest.fixture
+    def previous_docs(self):
+        """Responses at the time of the previous generation."""
+        return [response_doc("college_preferences", ("1", "urban")), response_doc("introduction", ("1", "hi"))]
+
+    def previous_generation(self, docs):
+        """Completed generation document built from ``docs``."""
+        return {
+            "student_profile": {"student_profile": [section("core_snapshot"), section("college_fit"), section("growth")]},
+            "answer_fingerprints": answer_fingerprints(docs),
+            "generation_metadata": {"prompt_version": PROFILE_PROMPT_VERSION}
+        }
+
+    @pytest.mark.asyncio
+    async def test_unchanged_answers_reuse_profile(self, profile_service, mock_llm, previous_docs):
+        """Test no model call is made when no answer changed."""
+        profile_service.profile_generations_repository.find_one = AsyncMock(return_value=self.previous_generation(previous_docs))
+
+        result = await profile_service.build_profile("user", previous_docs, "context")
+
+        mock_llm.chat_text.assert_not_called()
+        assert result["generation_metadata.mode"] == "unchanged"
+
+    @pytest.mark.asyncio
+    async def test_changed_form_rewrites_only_its_sections(self, profile_service, mock_llm, previous_docs):
+        """Test only the sections mapped to the changed form are requested and merged."""
+        profile_service.profile_generations_repository.find_one = AsyncMock(return_value=self.previous_generation(previous_docs))
+        mock_llm.chat_text.return_value = json.dumps({"student_profile": [section("college_fit", "new"), section("growth", "ignored")]})
+        current_docs = [response_doc("college_preferences", ("1", "rural")), previous_docs[1]]
+
+        result = await profile_service.build_profile("user", current_docs, "context")
+
+        assert result["generation_metadata.mode"] == "incremental"
+        assert "growth" not in result["generation_metadata.regenerated_sections"]
+        sections = {s["section_id"]: s["content"] for s in result["student_profile"]["student_profile"]}
+        assert sections == {"core_snapshot": "text", "college_fit": "new", "growth": "text"}
+        assert mock_llm.chat_text.call_args.kwargs["max_tokens"] < 10000
+
+    @pytest.mark.asyncio
+    async def test_no_previous_profile_generates_in_full(self, profile_service, mock_llm, previous_docs):
+        """Test the first generation writes every section and records fingerprints."""
+        profile_service.profile_generations_repository.find_one = AsyncMock(return_value=None)
+        mock_llm.chat_text.return_value = json.dumps({"student_profile": [section("core_snapshot")]})
+
+        result = await profile_service.build_profile("user", previous_docs, "context")
+
+        assert result["generation_metadata.mode"] == "full"
+        assert result["answer_fingerprints"] == answer_fingerprints(previous_docs)
+
+    def test_section_groups_cover_every_section_once(self):
+        """Test sectional mode writes each known section in exactly one group."""
+        grouped = [section_id for group in SECTION_GROUPS for section_id in group]
+
+        assert sorted(grouped) == sorted(PROFILE_SECTION_ORDER)
+
+    @pytest.mark.asyncio
+    async def test_sectional_generation_assembles_groups(self, profile_service, mock_llm):
+        """Test one call per group, assembled in display order."""
+        async def write_group(**kwargs):
+            system_prompt = kwargs["messages"][0]["content"]
+            group = next(g for g in SECTION_GROUPS if f"Write ONLY these sections: {', '.join(g)}." in system_prompt)
+            return json.dumps({"student_profile": [section(section_id) for section_id in group]})
+
+        mock_llm.chat_text.side_effect = write_group
+        with patch('services.profile_service.settings') as mock_settings:
+            mock_settings.profile_sectional_generation = True
+            mock_settings.profile_section_concurrency = 2
+            result = await profile_service.generate_profile("context")
+
+        assert mock_llm.chat_text.await_count == len(SECTION_GROUPS)
+        assert [s["section_id"] for s in result["student_profile"]] == PROFILE_SECTION_ORDER
+
+    @pytest.mark.asyncio
+    async def test_sectional_generation_failure(self, profile_service, mock_llm):
+        """Test a failed group propagates so the job queue can retry."""
+        mock_llm.chat_text.side_effect = Exception("boom")
+        with patch('services.profile_service.settings') as mock_settings:
+            mock_settings.profile_sectional_generation = True
+            mock_settings.profile_section_concurrency = 2
+            with pytest.raises(Exception, match="boom"):
+                await profile_service.generate_profile("context")
+
+    @pytest.mark.asyncio
+    async def test_failed_generation_propagates_from_job(self, profile_service, mock_llm, previous_docs):
+        """Test a model failure fails the job instead of storing a completed error profile."""
+        profile_service.profile_generations_repository.find_one = AsyncMock(return_value=None)
+        profile_service.profile_generations_repository.update_one = AsyncMock()
+        mock_llm.chat_text.side_effect = Exception("rate limited")
+        context = {"responses": previous_docs, "text": "context"}
+        with patch('services.profile_service.student_context_service') as mock_context:
+            mock_context.get = AsyncMock(return_value=context)
+            with pytest.raises(Exception, match="rate limited"):
+                await profile_service.run_generation_job({"profile_generation_id": "507f1f77bcf86cd799439011", "user_id": "user"})
+
+        statuses = [call.args[1].get("status") for call in profile_service.profile_generations_repository.update_one.await_args_list]
+        assert "completed" not in statuses
+
+    @pytest.mark.asyncio
+    async def test_chat_summary_cached_per_profile_version(self, profile_service):
+        """Test the summary is rebuilt only when a newer profile completes."""
+        version = {"_id": "507f1f77bcf86cd799439011", "updated_at": None}
+        profile_service.get_latest_profile_version = AsyncMock(return_value=version)
+        profile_service.profile_generations_repository.find_one = AsyncMock(
+            return_value={"student_profile": {"student_profile": [section("core_snapshot")]}}
+        )
+
+        first = await profile_service.get_chat_summary("user")
+        second = await profile_service.get_chat_summary("user")
+
+        assert first == second == "- core_snapshot: text"
+        profile_service.profile_generations_repository.find_one.assert_awaited_once()
@@ -0,0 +1,154 @@
+"""
+Unit tests for RecommendationService.
+"""
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from services.recommendation_service import RecommendationService, OPPORTUNITY_LINKS_SCHEMA, normalize_search_query
+
+
+class TestRecommendationService:
+    """Test cases for RecommendationService."""
+
+    @pytest.fixture
+    def mock_llm(self):
+        """Mock shared LLM client."""
+        return MagicMock()
+
+    @pytest.fixture
+    def mock_url_cache(self):
+        """Mock URL resolution cache with no entries."""
+        cache = MagicMock()
+        cache.get_many = AsyncMock(return_value={})
+        cache.set_many = AsyncMock()
+        return cache
+
+    @pytest.fixture
+    def recommendation_service(self, mock_llm, mock_url_cache):
+        """Create RecommendationService instance with mock LLM client and URL cache."""
+        service = RecommendationService()
+        service.llm = mock_llm
+        service.url_cache = mock_url_cache
+        return service
+
+    def test_normalize_search_query(self):
+        """Test case, punctuation and spacing do not change the cache key."""
+        assert normalize_search_query("MIT  UROP: Undergraduate Research!") == "mit urop undergraduate research"
+
+    @pytest.fixture
+    def recommendations_json(self):
+        """Two colleges whose opportunities share a title."""
+        return {
+            "recommendations": [
+                {
+                    "name": "College A",
+                    "distinctive_opportunities": [
+                        {"title": "Research", "search_query": "college a research", "url": "https://a.edu"}
+                    ]
+                },
+                {
+                    "name": "College B",
+                    "distinctive_opportunities": [
+                        {"title": "Research", "search_query": "college b research", "url": "https://b.edu"}
+                    ]
+                }
+            ]
+        }
+
+    @pytest.mark.asyncio
+    async def test_fetch_links_searches_each_college(self, recommendation_service, mock_llm, recommendations_json):
+        """Test one structured web search per college, with results matched within that college."""
+        async def create_response(model, input, **kwargs):
+            college = json.loads(input[1]["content"])["college"]
+            url = "https://a.edu/research" if college == "College A" else "https://b.edu/research"
+            return MagicMock(output_text=json.dumps({"links": [{"title": "Research", "url": url}]}))
+
+        mock_llm.create_response = AsyncMock(side_effect=create_response)
+
+        result = await recommendation_service.fetch_links_with_web_search(recommendations_json)
+
+        assert mock_llm.create_response.await_count == 2
+        assert mock_llm.create_response.await_args.kwargs["text"] == {"format": OPPORTUNITY_LINKS_SCHEMA}
+        college_a, college_b = result["recommendations"]
+        assert college_a["distinctive_opportunities"][0] == {"title": "Research", "url": "https://a.edu/research"}
+        assert college_b["distinctive_opportunities"][0] == {"title": "Research", "url": "https://b.edu/research"}
+
+    @pytest.mark.asyncio
+    async def test_fetch_links_failed_college_keeps_original_url(self, recommendation_service, mock_llm, recommendations_json):
+        """Test a failed search only affects its own college."""
+        async def create_response(model, input, **kwargs):
+            if json.loads(input[1]["content"])["college"] == "College A":
+                raise Exception("search failed")
+            return MagicMock(output_text=json.dumps({"links": [{"title": "Research", "url": "https://b.edu/research"}]}))
+
+        mock_llm.create_response = AsyncMock(side_effect=create_response)
+
+        result = await recommendation_service.fetch_links_with_web_search(recommendations_json)
+
+        college_a, college_b = result["recommendations"]
+        assert college_a["distinctive_opportunities"][0] == {"title": "Research", "url": "https://a.edu"}
+        assert college_b["distinctive_opportunities"][0]["url"] == "https://b.edu/research"
+
+    @pytest.mark.asyncio
+    async def test_fetch_links_serves_cached_queries(self, recommendation_service, mock_llm, mock_url_cache, recommendations_json):
+        """Test cached queries skip web search, including cached misses."""
+        mock_url_cache.get_many.return_value = {
+            "college a research": {"url": "https://a.edu/cached"},
+            "college b research": {"url": None}
+        }
+        mock_llm.create_response = AsyncMock()
+
+        result = await recommendation_service.fetch_links_with_web_search(recommendations_json)
+
+        mock_llm.create_response.assert_not_called()
+        college_a, college_b = result["recommendations"]
+        assert college_a["distinctive_opportunities"][0] == {"title": "Research", "url": "https://a.edu/cached"}
+        assert college_b["distinctive_opportunities"][0] == {"title": "Research", "url": "https://b.edu"}
+
+    @pytest.mark.asyncio
+    async def test_fetch_links_caches_search_outcomes(self, recommendation_service, mock_llm, mock_url_cache, recommendations_json):
+        """Test found links are cached and unmatched queries are negatively cached."""
+        async def create_response(model, input, **kwargs):
+            if json.loads(input[1]["content"])["college"] == "College A":
+                return MagicMock(output_text=json.dumps({"links": [{"title": "Research", "url": "https://a.edu/research"}]}))
+            return MagicMock(output_text=json.dumps({"links": []}))
+
+        mock_llm.create_response = AsyncMock(side_effect=create_response)
+
+        await recommendation_service.fetch_links_with_web_search(recommendations_json)
+
+        positive, negative = mock_url_cache.set_many.await_args_list
+        assert positive.args[0] == {"college a research": {"url": "https://a.edu/research"}}
+        assert negative.args[0] == {"college b research": {"url": None}}
+        assert "ttl_seconds" in negative.kwargs
+
+    @pytest.mark.asyncio
+    async def test_generate_full_recommendations_streams_colleges(self, recommendation_service, mock_llm, recommendations_json):
+        """Test each college reaches on_college before links, then on_links once resolved."""
+        document = json.dumps(recommendations_json)
+
+        async def stream_chat_text(**kwargs):
+            for i in range(0, len(document), 20):
+                yield document[i:i + 20]
+
+        mock_llm.stream_chat_text = stream_chat_text
+        mock_llm.create_response = AsyncMock(return_value=MagicMock(output_text=json.dumps({"links": []})))
+        recommendation_service._get_cached_recommendations = AsyncMock(return_value=None)
+        recommendation_service._set_cached_recommendations = AsyncMock()
+        events = []
+
+        async def on_college(index, rec_data):
+            events.append(("college", index, "search_query" in rec_data["distinctive_opportunities"][0]))
+
+        async def on_links(index, rec_data):
+            events.append(("links", index, "search_query" in rec_data["distinctive_opportunities"][0]))
+
+        result = await recommendation_service.generate_full_recommendations(
+            "user123", context="profile", on_college=on_college, on_links=on_links
+        )
+
+        assert [r.name for r in result.recommendations] == ["College A", "College B"]
+        assert events[0] == ("college", 0, True)
+        assert sorted(events) == [("college", 0, True), ("college", 1, True), ("links", 0, False), ("links", 1, False)]
+        recommendation_service._set_cached_recommendations.assert_awaited_once()
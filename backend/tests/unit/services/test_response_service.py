@@ -6,10 +6,19 @@ import pytest_asyncio
 from unittest.mock import AsyncMock, patch, MagicMock
 from datetime import datetime
 
-from services.response_service import ResponseService
+from services.response_service import ResponseService, build_answers_patch_pipeline, merge_answer_patches
 from core.exceptions import NotFoundError, ConflictError
 
 
+@pytest.fixture(autouse=True)
+def mock_student_context():
+    """Mock the shared student context so response writes don't touch the version store."""
+    context = MagicMock()
+    context.invalidate = AsyncMock()
+    with patch('services.response_service.student_context_service', context):
+        yield context
+
+
 class TestResponseService:
     """Test cases for ResponseService."""
 
@@ -65,7 +74,9 @@ class TestResponseService:
         }
 
     @pytest.mark.asyncio
-    async def test_create_response_success(self, response_service, mock_repository, sample_response_data, sample_response_from_db):
+    async def test_create_response_success(
+        self, response_service, mock_repository, mock_student_context, sample_response_data, sample_response_from_db
+    ):
         """Test successful response creation."""
         # Mock repository methods
         mock_repository.find_one.return_value = None  # Response doesn't exist
@@ -79,6 +90,7 @@ class TestResponseService:
         
         # Verify result
         assert result == sample_response_from_db
+        mock_student_context.invalidate.assert_awaited_once_with("test_user_123")
 
     @pytest.mark.asyncio
     async def test_get_response_found(self, response_service, mock_repository, sample_response_from_db):
@@ -238,14 +250,17 @@ class TestResponseService:
             "responses": [{"question_id": "q1", "answer": "3.8"}]
         }
 
-        # Mock that response doesn't exist
-        mock_repository.find_one.return_value = None
-        mock_repository.create.return_value = {"response_id": "new_resp_123", **response_data}
+        mock_repository.upsert_one.return_value = {"response_id": "new_resp_123", **response_data}
 
         result = await response_service.upsert_response(response_data)
 
-        mock_repository.find_one.assert_called_once_with({"user_id": user_id, "form_id": form_id})
-        mock_repository.create.assert_called_once()
+        # One atomic round trip, no read-before-write
+        mock_repository.find_one.assert_not_called()
+        mock_repository.create.assert_not_called()
+        args, kwargs = mock_repository.upsert_one.call_args
+        assert args[0] == {"user_id": user_id, "form_id": form_id}
+        assert args[1]["responses"] == response_data["responses"]
+        assert "response_id" in kwargs["set_on_insert"]
         assert result["response_id"] == "new_resp_123"
 
     @pytest.mark.asyncio
@@ -303,4 +318,54 @@ class TestResponseService:
         result = await response_service.get_many({})
 
         mock_repository.find_many.assert_called_once_with({}, None)
-        assert len(result) == 3 
\ No newline at end of file
+        assert len(result) == 3 
+
+class TestResponsePatch:
+    """Test cases for per-question delta autosave."""
+
+    @pytest_asyncio.fixture
+    async def mock_repository(self):
+        """Mock repository for testing."""
+        return AsyncMock()
+
+    @pytest_asyncio.fixture
+    async def response_service(self, mock_repository):
+        """Create ResponseService instance with mock repository."""
+        with patch('services.response_service.BaseRepository', return_value=mock_repository):
+            service = ResponseService()
+            service.repository = mock_repository
+            return service
+
+    @pytest.mark.asyncio
+    async def test_patch_response_single_upsert(self, response_service, mock_repository, mock_student_context):
+        """Test a patch is applied as one pipeline upsert."""
+        mock_repository.find_one_and_update.return_value = {"user_id": "u1", "form_id": "f1"}
+        answers = [{"question_id": "q2", "question_text": "Q2", "answer": "new"}]
+
+        await response_service.patch_response("u1", "f1", answers, ["q3"])
+
+        args, kwargs = mock_repository.find_one_and_update.call_args
+        assert args[0] == {"user_id": "u1", "form_id": "f1"}
+        assert isinstance(args[1], list)
+        assert kwargs["upsert"] is True
+        mock_student_context.invalidate.assert_awaited_once_with("u1")
+
+    def test_pipeline_wraps_user_text_in_literal(self):
+        """Test answers are passed as literals so '$' text is not a field path."""
+        pipeline = build_answers_patch_pipeline(
+            [{"question_id": "q1", "question_text": "Budget", "answer": "$100"}], [], datetime.now()
+        )
+
+        responses_expr = pipeline[0]["$set"]["responses"]
+        append_stage = responses_expr["$let"]["in"]["$concatArrays"][1]
+        assert append_stage["$filter"]["input"] == {"$literal": [{"question_id": "q1", "question_text": "Budget", "answer": "$100"}]}
+
+    def test_merge_answer_patches(self):
+        """Test later patches win and removals cancel pending answers."""
+        first = {"answers": [{"question_id": "q1", "answer": "a"}, {"question_id": "q2", "answer": "b"}], "removed_question_ids": ["q3"]}
+        second = {"answers": [{"question_id": "q1", "answer": "a2"}, {"question_id": "q3", "answer": "c"}], "removed_question_ids": ["q2"]}
+
+        merged = merge_answer_patches(first, second)
+
+        assert {a["question_id"]: a["answer"] for a in merged["answers"]} == {"q1": "a2", "q3": "c"}
+        assert merged["removed_question_ids"] == ["q2"]
@@ -0,0 +1,92 @@
+"""
+Unit tests for StudentContextService.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from core.tokens import count_tokens
+from services.student_context_service import StudentContextService, build_responses_context, NO_RESPONSES_CONTEXT
+
+
+class TestStudentContextService:
+    """Test cases for StudentContextService."""
+
+    @pytest.fixture
+    def response_docs(self):
+        """One form with an answered and an unanswered question."""
+        return [{
+            "form_id": "academic_information",
+            "responses": [
+                {"question_id": "1", "question_text": "What is your GPA?", "answer": "3.8"},
+                {"question_id": "2", "question_text": "Favorite subject?", "answer": ""}
+            ]
+        }]
+
+    @pytest.fixture
+    def context_service(self, response_docs):
+        """StudentContextService with mock repositories at version 1."""
+        service = StudentContextService()
+        service.responses_repository = MagicMock()
+        service.responses_repository.find_many = AsyncMock(return_value=response_docs)
+        service.versions_repository = MagicMock()
+        service.versions_repository.find_one = AsyncMock(return_value={"version": 1})
+        service.versions_repository.collection.update_one = AsyncMock()
+        return service
+
+    def test_build_responses_context(self, response_docs):
+        """Test forms become headed sections and blank answers are skipped."""
+        text = build_responses_context(response_docs)
+
+        assert "Academic Information:" in text
+        assert "- What is your GPA?: 3.8" in text
+        assert "Favorite subject?" not in text
+        assert build_responses_context([]) == NO_RESPONSES_CONTEXT
+
+    def test_build_responses_context_packs_to_budget(self):
+        """Test long answers are trimmed to fit while short ones stay intact."""
+        docs = [{
+            "form_id": "personal_reflections",
+            "responses": [
+                {"question_id": "1", "question_text": "GPA?", "answer": "3.9"},
+                {"question_id": "2", "question_text": "Essay?", "answer": "story " * 2000}
+            ]
+        }]
+
+        text = build_responses_context(docs, max_tokens=200)
+
+        assert count_tokens(text) <= 200
+        assert "- GPA?: 3.9" in text
+        assert "- Essay?: story" in text
+
+    @pytest.mark.asyncio
+    async def test_same_version_reuses_context(self, context_service):
+        """Test repeat reads skip the responses scan while the version is unchanged."""
+        first = await context_service.get("user")
+        second = await context_service.get("user")
+
+        assert first is second
+        context_service.responses_repository.find_many.assert_awaited_once()
+        assert context_service.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_new_version_rebuilds_context(self, context_service):
+        """Test a write from any process (a higher version) forces a rebuild."""
+        await context_service.get("user")
+        context_service.versions_repository.find_one.return_value = {"version": 2}
+
+        entry = await context_service.get("user")
+
+        assert entry["version"] == 2
+        assert context_service.responses_repository.find_many.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_bumps_version(self, context_service):
+        """Test invalidation drops the local entry and increments the shared counter."""
+        await context_service.get("user")
+
+        await context_service.invalidate("user")
+
+        args, kwargs = context_service.versions_repository.collection.update_one.call_args
+        assert args[1]["$inc"] == {"version": 1}
+        assert kwargs["upsert"] is True
+        assert context_service.stats()["entries"] == 0
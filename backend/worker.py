@@ -0,0 +1,58 @@
+"""
+Background job worker for profile and recommendation generation.
+
+Run one or more of these processes alongside the API to scale generation
+throughput independently of request handling:
+
+    python worker.py
+"""
+import asyncio
+import logging
+import signal
+
+from dotenv import load_dotenv
+
+from core.database import db_manager
+from core.jobs import JobWorker, job_queue
+from core.llm import llm_client
+from services.profile_service import PROFILE_JOB, profile_service
+from services.recommendation_service import RECOMMENDATION_JOB, recommendation_service
+
+
+def build_worker() -> JobWorker:
+    """Create a worker with every generation job type registered."""
+    worker = JobWorker(job_queue)
+    worker.register(
+        RECOMMENDATION_JOB,
+        recommendation_service.run_generation_job,
+        on_failure=recommendation_service.mark_generation_failed
+    )
+    worker.register(
+        PROFILE_JOB,
+        profile_service.run_generation_job,
+        on_failure=profile_service.mark_generation_failed
+    )
+    return worker
+
+
+async def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    await db_manager.connect()
+    await job_queue.ensure_indexes()
+
+    worker = build_worker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, lambda: asyncio.create_task(worker.stop()))
+
+    try:
+        await worker.run()
+    finally:
+        await llm_client.close()
+        await db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
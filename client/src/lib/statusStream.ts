@@ -0,0 +1,34 @@
+import { API_BASE_URL } from './config';
+
+const TERMINAL_STATUSES = ['completed', 'failed', 'not_found'];
+
+// Subscribe to pushed generation status (Server-Sent Events). The server sends a
+// "status" event on every change and ends the stream once the status is terminal.
+// onError is called if the stream can't be used, so callers can fall back to polling.
+// Returns a function that closes the subscription.
+export function subscribeToStatus<T extends { status: string }>(
+  path: string,
+  onStatus: (status: T) => void,
+  onError: () => void
+): () => void {
+  const source = new EventSource(`${API_BASE_URL}${path}`);
+
+  source.addEventListener('status', (event) => {
+    const status = JSON.parse((event as MessageEvent).data) as T;
+    if (TERMINAL_STATUSES.includes(status.status)) {
+      source.close();
+    }
+    onStatus(status);
+  });
+  source.addEventListener('timeout', () => {
+    source.close();
+    onError();
+  });
+  // Don't let EventSource reconnect on its own
+  source.onerror = () => {
+    source.close();
+    onError();
+  };
+
+  return () => source.close();
+}
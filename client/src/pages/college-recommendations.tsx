@@ -35,6 +35,7 @@ export default function CollegeRecommendations() {
   const isGeneratingRef = useRef(false);
   const pollingIntervalRef = useRef<NodeJS.Timeout | null>(null);
   const pollingTimeoutRef = useRef<NodeJS.Timeout | null>(null);
+  const closeStreamRef = useRef<(() => void) | null>(null);
   
   // Update ref whenever isGenerating changes
   useEffect(() => {
@@ -50,6 +51,9 @@ export default function CollegeRecommendations() {
       if (pollingTimeoutRef.current) {
         clearTimeout(pollingTimeoutRef.current);
       }
+      if (closeStreamRef.current) {
+        closeStreamRef.current();
+      }
     };
   }, []);
 
@@ -88,8 +92,8 @@ export default function CollegeRecommendations() {
         setIsGenerating(true);
         setStatusMessage('Generation in progress... This may take 1-2 minutes.');
         
-        // Start polling for this ongoing generation
-        startPolling();
+        // Stream colleges from this ongoing generation as they land
+        startStreaming();
       } else {
         setIsGenerating(false);
         
@@ -104,8 +108,11 @@ export default function CollegeRecommendations() {
         }
       }
       
-      // Then load recommendations
-      await loadRecommendationsWithoutStatusUpdate();
+      // Then load the completed set, unless the stream is filling in the new one;
+      // its done event loads the completed set once generation finishes
+      if (!isCurrentlyGenerating) {
+        await loadRecommendationsWithoutStatusUpdate();
+      }
       
     } catch (error) {
       console.error('Error initializing page:', error);
@@ -199,6 +206,45 @@ export default function CollegeRecommendations() {
     }, 300000);
   };
 
+  const startStreaming = () => {
+    if (!user?.uid) return;
+
+    stopPolling();
+    if (closeStreamRef.current) {
+      closeStreamRef.current();
+    }
+
+    // Colleges replace the previous set as they arrive, in generation order
+    const streamed: SchoolRecommendation[] = [];
+    closeStreamRef.current = SchoolRecommendationsService.streamRecommendations(user.uid, {
+      onRecommendation: (index, recommendation) => {
+        streamed[index] = recommendation;
+        const received = streamed.filter(Boolean);
+        setRecommendations(received);
+        setStatusMessage(`Generating your personalized recommendations... ${received.length} ready so far.`);
+      },
+      onDone: async (status) => {
+        closeStreamRef.current = null;
+        setGenerationStatus(status);
+        setIsGenerating(false);
+
+        if (status.status === 'completed') {
+          await loadRecommendations();
+          setStatusMessage('New recommendations generated successfully!');
+        } else if (status.status === 'failed') {
+          setStatusMessage('Generation failed. Please try again.');
+        } else {
+          setStatusMessage('No recommendations found. Generate your first set of personalized recommendations!');
+        }
+      },
+      onError: () => {
+        // Streaming unavailable (e.g. a proxy closed the connection); fall back to status polling
+        closeStreamRef.current = null;
+        startPolling();
+      },
+    });
+  };
+
   const checkGenerationStatus = async () => {
     if (!user?.uid) return;
     
@@ -211,7 +257,7 @@ export default function CollegeRecommendations() {
         setIsGenerating(true);
         setStatusMessage('Generation in progress... This may take 1-2 minutes.');
         
-        startPolling();
+        startStreaming();
       } else if (status.status === 'completed') {
         setIsGenerating(false);
         setStatusMessage('Your personalized recommendations are ready!');
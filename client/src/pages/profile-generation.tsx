@@ -6,6 +6,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Progress } from '@/components/ui/progress';
 import { CheckCircle, Brain, Sparkles, User, FileText, ArrowRight, AlertCircle } from 'lucide-react';
 import { API_BASE_URL } from '@/lib/config';
+import { subscribeToStatus } from '@/lib/statusStream';
 
 interface ProfileGenerationProps {
   userId?: string;
@@ -28,6 +29,7 @@ export function ProfileGeneration({ userId: propUserId }: ProfileGenerationProps
   const [generationComplete, setGenerationComplete] = useState(false);
   const [generationStatus, setGenerationStatus] = useState<GenerationStatus | null>(null);
   const [error, setError] = useState<string | null>(null);
+  const [statusStreamUnavailable, setStatusStreamUnavailable] = useState(false);
 
   const generationSteps = [
     { label: "Analyzing your responses", icon: Brain, description: "Processing your answers across all sections" },
@@ -41,11 +43,22 @@ export function ProfileGeneration({ userId: propUserId }: ProfileGenerationProps
     checkExistingGeneration();
   }, [userId]);
 
-  // Poll for status updates when generating
+  // Subscribe to pushed status updates when generating
+  useEffect(() => {
+    if (!userId || !isGenerating || generationStatus?.status !== 'generating' || statusStreamUnavailable) return;
+
+    return subscribeToStatus<GenerationStatus>(
+      `/profile/${userId}/status/stream`,
+      applyGenerationStatus,
+      () => setStatusStreamUnavailable(true)
+    );
+  }, [userId, isGenerating, generationStatus?.status, statusStreamUnavailable]);
+
+  // Fall back to polling if the status stream can't be used
   useEffect(() => {
     let pollInterval: NodeJS.Timeout;
     
-    if (isGenerating && generationStatus?.status === 'generating') {
+    if (statusStreamUnavailable && isGenerating && generationStatus?.status === 'generating') {
       pollInterval = setInterval(async () => {
         await checkGenerationStatus();
       }, 2000); // Poll every 2 seconds
@@ -56,7 +69,7 @@ export function ProfileGeneration({ userId: propUserId }: ProfileGenerationProps
         clearInterval(pollInterval);
       }
     };
-  }, [isGenerating, generationStatus?.status]);
+  }, [statusStreamUnavailable, isGenerating, generationStatus?.status]);
 
   // Update UI steps based on generation progress
   useEffect(() => {
@@ -97,6 +110,19 @@ export function ProfileGeneration({ userId: propUserId }: ProfileGenerationProps
     }
   };
 
+  const applyGenerationStatus = (status: GenerationStatus) => {
+    setGenerationStatus(status);
+    
+    if (status.status === 'completed') {
+      setGenerationComplete(true);
+      setIsGenerating(false);
+      setGenerationStep(generationSteps.length);
+    } else if (status.status === 'failed') {
+      setError(status.error || 'Profile generation failed');
+      setIsGenerating(false);
+    }
+  };
+
   const checkGenerationStatus = async () => {
     if (!userId) return;
     
@@ -104,17 +130,7 @@ export function ProfileGeneration({ userId: propUserId }: ProfileGenerationProps
       console.log('🔍 Checking status for userId:', userId);
       const response = await fetch(`${API_BASE_URL}/profile/${userId}/status`);
       if (response.ok) {
-        const status = await response.json();
-        setGenerationStatus(status);
-        
-        if (status.status === 'completed') {
-          setGenerationComplete(true);
-          setIsGenerating(false);
-          setGenerationStep(generationSteps.length);
-        } else if (status.status === 'failed') {
-          setError(status.error || 'Profile generation failed');
-          setIsGenerating(false);
-        }
+        applyGenerationStatus(await response.json());
       }
     } catch (err) {
       console.error('Failed to check generation status:', err);
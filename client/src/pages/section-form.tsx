@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useLocation } from 'wouter';
 import { Card, CardContent, CardHeader } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -38,6 +38,9 @@ const SectionForm: React.FC = () => {
   const [isLoading, setIsLoading] = useState(true);
   const [isSaving, setIsSaving] = useState(false);
   const [hasChanges, setHasChanges] = useState(false);
+  // Question ids edited since the last successful save, mapped to a per-question edit count;
+  // autosave sends only these
+  const dirtyQuestionIds = useRef<Map<string, number>>(new Map());
   const [lastSaved, setLastSaved] = useState<Date | null>(null);
   const [completedSections, setCompletedSections] = useState<Set<string>>(new Set());
   const [chatMessages, setChatMessages] = useState<Message[]>([]);
@@ -133,6 +136,7 @@ const SectionForm: React.FC = () => {
       setIsLoading(true);
       setResponses({}); // Clear previous responses
       setHasChanges(false);
+      dirtyQuestionIds.current.clear();
       setLastSaved(null);
 
       try {
@@ -235,22 +239,48 @@ const SectionForm: React.FC = () => {
           answer: responses[q.id.toString()].trim()
         }));
 
-      const payload: Omit<FormResponse, 'response_id' | 'submitted_at'> = {
-        user_id: user.uid,
-        form_id: formId,
-        responses: answersArray
-      };
-
-      const response = await fetch(`${API_BASE_URL}/responses/upsert`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(payload),
-      });
+      // Snapshot the edit counts being sent so later edits can be told apart
+      const sentEditCounts = new Map(dirtyQuestionIds.current);
+      const savedQuestionIds = Array.from(sentEditCounts.keys());
+      let response: Response;
+
+      if (isAutosave && savedQuestionIds.length > 0) {
+        // Delta autosave: send only the answers that changed since the last save
+        const changedIds = new Set(savedQuestionIds);
+        response = await fetch(`${API_BASE_URL}/responses/${user.uid}/${formId}`, {
+          method: 'PATCH',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({
+            responses: answersArray.filter((answer) => changedIds.has(answer.question_id)),
+            removed_question_ids: savedQuestionIds.filter((id) => !responses[id]?.trim()),
+          }),
+        });
+      } else {
+        const payload: Omit<FormResponse, 'response_id' | 'submitted_at'> = {
+          user_id: user.uid,
+          form_id: formId,
+          responses: answersArray
+        };
+
+        response = await fetch(`${API_BASE_URL}/responses/upsert`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify(payload),
+        });
+      }
 
       if (response.ok) {
-        setHasChanges(false);
+        // Edits made while the request was in flight stay dirty for the next save
+        sentEditCounts.forEach((editCount, id) => {
+          if (dirtyQuestionIds.current.get(id) === editCount) {
+            dirtyQuestionIds.current.delete(id);
+          }
+        });
+        setHasChanges(dirtyQuestionIds.current.size > 0);
         setLastSaved(new Date());
         
         // Update completion status based on section-specific threshold
@@ -297,6 +327,7 @@ const SectionForm: React.FC = () => {
       ...prev,
       [questionId]: value
     }));
+    dirtyQuestionIds.current.set(questionId, (dirtyQuestionIds.current.get(questionId) ?? 0) + 1);
     setHasChanges(true);
   };
 
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useLocation } from 'wouter';
 import { useAuth } from '@/context/AuthContext';
 import { useNavigationData } from '@/hooks/useNavigationData';
@@ -34,6 +34,7 @@ import {
 } from 'lucide-react';
 import { Navigation } from '@/components/Navigation';
 import { API_BASE_URL } from '@/lib/config';
+import { subscribeToStatus } from '@/lib/statusStream';
 
 interface ProfileSection {
   section_id: string;
@@ -68,6 +69,7 @@ export function StudentProfileView({ userId: propUserId }: StudentProfileViewPro
   const [, navigate] = useLocation();
   const [hasProfileData, setHasProfileData] = useState(false);
   const [hasRealRecommendations, setHasRealRecommendations] = useState(false);
+  const closeStatusStreamRef = useRef<(() => void) | null>(null);
 
   useEffect(() => {
     if (userId) {
@@ -75,6 +77,15 @@ export function StudentProfileView({ userId: propUserId }: StudentProfileViewPro
     }
   }, [userId]);
 
+  // Close any open status stream on unmount
+  useEffect(() => {
+    return () => {
+      if (closeStatusStreamRef.current) {
+        closeStatusStreamRef.current();
+      }
+    };
+  }, []);
+
   // Check for profile data and recommendations availability
   useEffect(() => {
     const checkDataAvailability = async () => {
@@ -177,8 +188,8 @@ export function StudentProfileView({ userId: propUserId }: StudentProfileViewPro
         const result = await response.json();
         console.log('Profile regeneration started:', result);
         
-        // Start polling for completion
-        pollForCompletion();
+        // Wait for completion via pushed status updates
+        waitForCompletion();
       } else {
         throw new Error('Failed to start profile regeneration');
       }
@@ -190,6 +201,36 @@ export function StudentProfileView({ userId: propUserId }: StudentProfileViewPro
     }
   };
 
+  const handleGenerationStatus = async (status: { status: string; error?: string }) => {
+    if (status.status === 'generating') {
+      setGenerationProgress('Generating your profile...');
+    } else if (status.status === 'completed') {
+      setGenerationProgress('Profile generated successfully!');
+      // Refresh the profile data
+      await fetchProfileData();
+      setIsRegenerating(false);
+      setGenerationProgress('');
+    } else if (status.status === 'failed') {
+      setError(status.error || 'Profile generation failed');
+      setIsRegenerating(false);
+      setGenerationProgress('');
+    }
+  };
+
+  const waitForCompletion = () => {
+    if (!userId) return;
+
+    if (closeStatusStreamRef.current) {
+      closeStatusStreamRef.current();
+    }
+    // Fall back to polling if the status stream can't be used
+    closeStatusStreamRef.current = subscribeToStatus(
+      `/profile/${userId}/status/stream`,
+      handleGenerationStatus,
+      pollForCompletion
+    );
+  };
+
   const pollForCompletion = async () => {
     if (!userId) return;
     
@@ -200,21 +241,10 @@ export function StudentProfileView({ userId: propUserId }: StudentProfileViewPro
         if (response.ok) {
           const status = await response.json();
           
-          if (status.status === 'generating') {
-            setGenerationProgress('Generating your profile...');
-          } else if (status.status === 'completed') {
-            clearInterval(pollInterval);
-            setGenerationProgress('Profile generated successfully!');
-            // Refresh the profile data
-            await fetchProfileData();
-            setIsRegenerating(false);
-            setGenerationProgress('');
-          } else if (status.status === 'failed') {
+          if (status.status === 'completed' || status.status === 'failed') {
             clearInterval(pollInterval);
-            setError(status.error || 'Profile generation failed');
-            setIsRegenerating(false);
-            setGenerationProgress('');
           }
+          await handleGenerationStatus(status);
         }
       } catch (error) {
         console.error('Failed to check generation status:', error);
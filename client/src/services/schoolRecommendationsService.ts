@@ -77,22 +77,7 @@ export class SchoolRecommendationsService {
 
         console.log(`Successfully loaded ${data.recommendations.length} recommendations from API`);
         return {
-          recommendations: data.recommendations.map((rec: any) => ({
-            ...rec,
-            // Ensure all required fields are present with fallbacks
-            location: rec.location || 'Location not specified',
-            fit_score: rec.fit_score || "50",
-            fit: {
-              academic: rec.fit?.academic || 'Good',
-              social_cultural: rec.fit?.social_cultural || 'Good',
-              financial: rec.fit?.financial || 'Good',
-            },
-            overall_fit_rationale: rec.overall_fit_rationale || [],
-            distinctive_opportunities: rec.distinctive_opportunities || [],
-            potential_challenges: rec.potential_challenges || [],
-            why_school_essay_points: rec.why_school_essay_points || [],
-            how_to_stand_out: rec.how_to_stand_out || [],
-          }))
+          recommendations: data.recommendations.map((rec: any) => this.normalizeRecommendation(rec))
         };
       } else if (response.status === 404) {
         throw new Error('No recommendations found for this user');
@@ -106,6 +91,58 @@ export class SchoolRecommendationsService {
     }
   }
 
+  // Ensure all required fields are present with fallbacks
+  static normalizeRecommendation(rec: any): SchoolRecommendation {
+    return {
+      ...rec,
+      location: rec.location || 'Location not specified',
+      fit_score: rec.fit_score || "50",
+      fit: {
+        academic: rec.fit?.academic || 'Good',
+        social_cultural: rec.fit?.social_cultural || 'Good',
+        financial: rec.fit?.financial || 'Good',
+      },
+      overall_fit_rationale: rec.overall_fit_rationale || [],
+      distinctive_opportunities: rec.distinctive_opportunities || [],
+      potential_challenges: rec.potential_challenges || [],
+      why_school_essay_points: rec.why_school_essay_points || [],
+      how_to_stand_out: rec.how_to_stand_out || [],
+    };
+  }
+
+  // Stream the latest generation: each college arrives as soon as it is generated,
+  // and again once its links are filled in. Returns a function that closes the stream.
+  static streamRecommendations(
+    userId: string,
+    handlers: {
+      onRecommendation: (index: number, recommendation: SchoolRecommendation) => void;
+      onDone: (status: GenerationStatus) => void;
+      onError: () => void;
+    }
+  ): () => void {
+    const source = new EventSource(`${this.API_BASE_URL}/recommendations/${userId}/stream`);
+
+    source.addEventListener('recommendation', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      handlers.onRecommendation(data.index, this.normalizeRecommendation(data.recommendation));
+    });
+    source.addEventListener('done', (event) => {
+      source.close();
+      handlers.onDone(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('timeout', () => {
+      source.close();
+      handlers.onError();
+    });
+    // Don't let EventSource reconnect on its own; the caller falls back to polling
+    source.onerror = () => {
+      source.close();
+      handlers.onError();
+    };
+
+    return () => source.close();
+  }
+
   // Check generation status for a user
   static async getGenerationStatus(userId: string): Promise<GenerationStatus> {
     try {
@@ -16,5 +16,5 @@ if __name__ == "__main__":
         "main:app", 
         "--host", "0.0.0.0", 
         "--port", "8000", 
-        "--workers", "8"
+        "--workers", os.environ.get("WORKERS", "8")
     ])
\ No newline at end of file